@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Conversation, Message, AgentState
+from django.db import connections
+from django.utils import timezone
+from django.contrib.postgres.search import SearchQuery
+from .models import Conversation, Message, AgentState, CachedResponse
+from .response_cache import response_cache
+from core.search import SEARCH_CONFIG
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
@@ -13,7 +18,35 @@ class MessageAdmin(admin.ModelAdmin):
     list_filter = ('is_user', 'created_at')
     search_fields = ('content', 'conversation__user__username')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the GIN-indexed search_vector instead of an icontains scan over content
+        if search_term and self._uses_postgresql(queryset):
+            matches = queryset.filter(
+                search_vector=SearchQuery(search_term, config=SEARCH_CONFIG, search_type='websearch')
+            )
+            by_username = queryset.filter(conversation__user__username__icontains=search_term)
+            return matches | by_username, False
+        return super().get_search_results(request, queryset, search_term)
+
+    def _uses_postgresql(self, queryset):
+        return connections[queryset.db].vendor == 'postgresql'
+
 @admin.register(AgentState)
 class AgentStateAdmin(admin.ModelAdmin):
     list_display = ('conversation', 'current_intent', 'created_at', 'updated_at')
     search_fields = ('conversation__user__username', 'current_intent')
+
+@admin.register(CachedResponse)
+class CachedResponseAdmin(admin.ModelAdmin):
+    list_display = ('normalized_message', 'hits', 'created_at', 'expires_at')
+    list_filter = ('created_at', 'expires_at')
+    search_fields = ('normalized_message', 'response')
+    actions = ['purge_expired']
+
+    # Deleted or expired entries stop being served at once: every hit is confirmed against the table.
+    # Purging the whole table without a selection: manage.py purge_response_cache [--all]
+    @admin.action(description="Purge selected cached responses that have expired")
+    def purge_expired(self, request, queryset):
+        deleted, _ = queryset.filter(expires_at__lte=timezone.now()).delete()
+        response_cache.clear()
+        self.message_user(request, f"Purged {deleted} expired cached responses.")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AgentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'agent'
+
+    def ready(self):
+        # Connects the signals that evict cached user contexts on change
+        from . import context  # noqa: F401
@@ -0,0 +1,199 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import AgentState, Message
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many agent messages are waiting...
+AGENT_LOG_BUFFER_SIZE = getattr(settings, 'AGENT_LOG_BUFFER_SIZE', 50)
+# ...or this many seconds after the first one arrived, whichever comes first
+AGENT_LOG_FLUSH_INTERVAL = getattr(settings, 'AGENT_LOG_FLUSH_INTERVAL', 0.5)
+# Seconds an in-progress slot-filling state is kept in the cache between turns
+AGENT_STATE_CACHE_TTL = getattr(settings, 'AGENT_STATE_CACHE_TTL', 3600)
+# Seconds before cached slot-filling progress is written to AgentState. Only with a cache
+# shared by all workers; otherwise, or at 0, every change is written through
+AGENT_STATE_FLUSH_INTERVAL = getattr(settings, 'AGENT_STATE_FLUSH_INTERVAL', 5)
+
+
+class MessageLogBuffer:
+    """
+    Process-wide write-behind buffer for agent conversation turns. Requests hand
+    over unsaved Message objects and return immediately; a background thread
+    writes them with one bulk_create per flush. Until then ``pending_for``
+    exposes them so the next turn's memory still sees them.
+    """
+
+    def __init__(self, max_size=AGENT_LOG_BUFFER_SIZE, flush_interval=AGENT_LOG_FLUSH_INTERVAL):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._in_flight = []
+        self._timer = None
+        self._lock = threading.Lock()
+        # One bulk insert at a time; messages arriving meanwhile join the next one
+        self._flush_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agent-log')
+
+    def add(self, messages):
+        with self._lock:
+            self._pending.extend(messages)
+            if len(self._pending) >= self.max_size:
+                self._flush_pool.submit(self.flush)
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_pool.submit, args=(self.flush,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def pending_for(self, conversation_id):
+        """Messages of ``conversation_id`` not yet in the database, oldest first."""
+        with self._lock:
+            return [
+                message for message in self._in_flight + self._pending
+                if message.conversation_id == conversation_id
+            ]
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+            self._in_flight = batch
+        if not batch:
+            return
+
+        close_old_connections()
+        try:
+            Message.objects.bulk_create(batch)
+        except Exception:
+            logger.exception("Failed to persist %d agent messages", len(batch))
+        finally:
+            with self._lock:
+                self._in_flight = []
+            close_old_connections()
+
+
+def _state_key(state_id):
+    return f"agent_state:{state_id}"
+
+
+def _cache_is_shared():
+    # A per-process cache would let one worker's copy hide what another worker wrote
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+class AgentStateBuffer:
+    """
+    Cache tier in front of AgentState for the slot-filling state machine. With a
+    cache shared by all workers, progress through a flow goes to the cache and is
+    written to the database at most once per flush interval; returning to idle is
+    written through, so a crash can cost the last answers of an unfinished flow
+    but never resumes a finished one. With a per-process cache every change is
+    written through and the row is the only copy.
+
+    Each change bumps AgentState.version. A cached copy is only used while it is
+    newer than the row, and writes never replace a newer row with an older one.
+    """
+
+    def __init__(self, flush_interval=AGENT_STATE_FLUSH_INTERVAL, ttl=AGENT_STATE_CACHE_TTL):
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        # state id -> (current_intent, collected_data, version) not yet written
+        self._dirty = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        # One flush at a time; states changed meanwhile join the next one
+        self._flush_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agent-state')
+
+    @property
+    def deferred(self):
+        return self.flush_interval > 0 and _cache_is_shared()
+
+    def _overlay(self, state, cached):
+        if cached is not None and cached['version'] > state.version:
+            state.current_intent = cached['current_intent']
+            state.collected_data = cached['collected_data']
+            state.version = cached['version']
+        return state
+
+    def load(self, state):
+        """Bring ``state``, fresh from the database, up to date with a newer cached copy."""
+        if not self.deferred:
+            return state
+        return self._overlay(state, cache.get(_state_key(state.pk)))
+
+    async def aload(self, state):
+        if not self.deferred:
+            return state
+        return self._overlay(state, await cache.aget(_state_key(state.pk)))
+
+    def save(self, state):
+        state.version += 1
+        row = (state.pk, state.current_intent, state.collected_data, state.version)
+        if not self.deferred:
+            self._write([row])
+            return
+
+        cache.set(_state_key(state.pk), {
+            'current_intent': state.current_intent,
+            'collected_data': state.collected_data,
+            'version': state.version,
+        }, self.ttl)
+        with self._lock:
+            if state.current_intent:
+                self._dirty[state.pk] = row[1:]
+                if self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval, self._flush_pool.submit, args=(self.flush,))
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            self._dirty.pop(state.pk, None)
+        self._write([row])
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+
+        close_old_connections()
+        try:
+            # The cache has the newest values, possibly from a later turn or another worker
+            cached = cache.get_many([_state_key(state_id) for state_id in dirty])
+            rows = []
+            for state_id, values in dirty.items():
+                latest = cached.get(_state_key(state_id))
+                if latest is not None and latest['version'] > values[2]:
+                    values = (latest['current_intent'], latest['collected_data'], latest['version'])
+                rows.append((state_id, *values))
+            self._write(rows)
+        except Exception:
+            logger.exception("Failed to persist %d agent states", len(dirty))
+        finally:
+            close_old_connections()
+
+    def _write(self, rows):
+        now = timezone.now()
+        for state_id, intent, data, version in rows:
+            AgentState.objects.filter(pk=state_id, version__lt=version).update(
+                current_intent=intent, collected_data=data, version=version, updated_at=now
+            )
+
+
+message_log = MessageLogBuffer()
+agent_states = AgentStateBuffer()
+# Write whatever is still buffered when the worker shuts down
+atexit.register(message_log.flush)
+atexit.register(agent_states.flush)
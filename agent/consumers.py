@@ -0,0 +1,67 @@
+import asyncio
+import json
+import logging
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .services import AgentService
+
+logger = logging.getLogger(__name__)
+
+
+class AgentConsumer(AsyncWebsocketConsumer):
+    """
+    Streams agent replies token by token. The client sends ``{"message": ...}``
+    and receives ``agent.start``, one ``agent.token`` frame per chunk and a final
+    ``agent.done`` frame with the whole reply. One reply streams at a time.
+    """
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        self.stream_task = None
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        # Stopping the stream still saves the part already sent
+        if getattr(self, 'stream_task', None) is not None:
+            self.stream_task.cancel()
+
+    async def send_error(self, error):
+        await self.send(text_data=json.dumps({'type': 'error', 'error': error}))
+
+    async def receive(self, text_data):
+        try:
+            message = json.loads(text_data).get('message')
+        except (ValueError, AttributeError):
+            message = None
+        if not message:
+            await self.send_error("Message is required")
+            return
+        if self.stream_task is not None and not self.stream_task.done():
+            await self.send_error("Wait for the current reply to finish")
+            return
+
+        # Streamed from a task so this socket keeps handling frames meanwhile
+        self.stream_task = asyncio.create_task(self.stream_reply(message))
+
+    async def stream_reply(self, message):
+        try:
+            agent_service = await AgentService.acreate(self.user.id)
+            await self.send(text_data=json.dumps({'type': 'agent.start'}))
+            parts = []
+            async for chunk in agent_service.stream_message(message):
+                parts.append(chunk)
+                await self.send(text_data=json.dumps({'type': 'agent.token', 'token': chunk}))
+            await self.send(text_data=json.dumps({
+                'type': 'agent.done',
+                'response': ''.join(parts),
+                'intent': agent_service.handled_intent
+            }))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Agent stream failed for user %s", self.user.id)
+            await self.send_error(str(e))
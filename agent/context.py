@@ -0,0 +1,156 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Hobby, Routine, Task, UserHobby, UserRoutine, UserSetting
+from core.signals import tasks_bulk_changed
+
+from .buffers import _cache_is_shared
+from .intents import WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+# Seconds a user's agent context stays cached; writes through the ORM evict it sooner. Only
+# used with a cache shared by all workers, since an eviction reaches no other worker's own cache
+AGENT_CONTEXT_CACHE_TTL = getattr(settings, 'AGENT_CONTEXT_CACHE_TTL', 300)
+# Most tasks / hobbies / routine entries described to the LLM
+AGENT_CONTEXT_PROMPT_ITEMS = 20
+
+
+def _cache_key(user_id):
+    return f"agent_user_context:{user_id}"
+
+
+def _load_tasks(user_id):
+    return list(Task.objects.filter(user_id=user_id).values(
+        'task_name', 'priority', 'days_associated', 'time_required', 'is_fixed_time', 'fixed_time_slot'
+    ))
+
+
+def _load_hobbies(user_id):
+    return [
+        {'name': name, 'category': category}
+        for name, category in UserHobby.objects.filter(user_id=user_id).values_list('hobby__name', 'hobby__category')
+    ]
+
+
+def _load_routine(user_id):
+    return Routine.objects.filter(
+        user_routines__user_id=user_id,
+        user_routines__is_primary=True
+    ).values_list('routine_data', flat=True).first()
+
+
+def _load_settings(user_id):
+    return UserSetting.objects.filter(user_id=user_id).values(
+        'off_day_toggle', 'day_start_time', 'day_end_time'
+    ).first()
+
+
+_LOADERS = {
+    'tasks': _load_tasks,
+    'hobbies': _load_hobbies,
+    'routine': _load_routine,
+    'settings': _load_settings,
+}
+
+
+def get_user_context(user_id):
+    """
+    The user's tasks, hobbies, primary routine (all days) and settings, as plain
+    values. Served from the cache when it is shared; otherwise, or on a miss,
+    read with four small queries on the caller's connection.
+    """
+    cached = AGENT_CONTEXT_CACHE_TTL and _cache_is_shared()
+    context = cache.get(_cache_key(user_id)) if cached else None
+    if context is not None:
+        return context
+
+    context = {name: loader(user_id) for name, loader in _LOADERS.items()}
+    if cached and not connection.in_atomic_block:
+        # Inside a transaction the rows may yet be rolled back
+        cache.set(_cache_key(user_id), context, AGENT_CONTEXT_CACHE_TTL)
+    return context
+
+
+async def aget_user_context(user_id):
+    return await sync_to_async(get_user_context)(user_id)
+
+
+def invalidate_user_context(user_id):
+    cache.delete(_cache_key(user_id))
+    # A reader between this write and its commit could cache the old rows again
+    transaction.on_commit(lambda: cache.delete(_cache_key(user_id)))
+
+
+def routine_for_day(context, day=None):
+    """Activities of the primary routine on ``day`` (a weekday name, default today)."""
+    day = day or WEEKDAYS[timezone.localdate().weekday()]
+    return (context['routine'] or {}).get(day) or []
+
+
+def format_user_context(context):
+    """Short plain-text description of ``context`` for the general-chat prompt."""
+    limit = AGENT_CONTEXT_PROMPT_ITEMS
+    lines = []
+    tasks = context['tasks']
+    if tasks:
+        lines.append("Tasks: " + "; ".join(
+            f"{task['task_name']} ({task['priority']}, {', '.join(task['days_associated'] or []) or 'no days'})"
+            for task in tasks[:limit]
+        ))
+    hobbies = context['hobbies']
+    if hobbies:
+        lines.append("Hobbies: " + "; ".join(f"{hobby['name']} ({hobby['category']})" for hobby in hobbies[:limit]))
+    today = WEEKDAYS[timezone.localdate().weekday()]
+    activities = routine_for_day(context, today)
+    if activities:
+        lines.append(f"Today's routine ({today}): " + "; ".join(
+            f"{activity['start_time']}-{activity['end_time']} {activity['activity']}" for activity in activities[:limit]
+        ))
+    user_settings = context['settings']
+    if user_settings and user_settings['day_start_time'] and user_settings['day_end_time']:
+        lines.append(
+            f"Day runs {user_settings['day_start_time']:%H:%M}-{user_settings['day_end_time']:%H:%M}"
+            + (", off days enabled" if user_settings['off_day_toggle'] else "")
+        )
+    return "\n".join(lines) or "Nothing recorded yet."
+
+
+# QuerySet.update() bypasses these (callers invalidate themselves), as do bulk task writes (see tasks_bulk_changed)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=UserHobby)
+@receiver(post_delete, sender=UserHobby)
+@receiver(post_save, sender=UserRoutine)
+@receiver(post_delete, sender=UserRoutine)
+@receiver(post_save, sender=UserSetting)
+@receiver(post_delete, sender=UserSetting)
+def _invalidate_on_user_row_change(sender, instance, **kwargs):
+    invalidate_user_context(instance.user_id)
+
+
+@receiver(post_save, sender=Routine)
+@receiver(post_delete, sender=Routine)
+def _invalidate_on_routine_change(sender, instance, **kwargs):
+    for user_id in UserRoutine.objects.filter(routine_id=instance.pk).values_list('user_id', flat=True):
+        invalidate_user_context(user_id)
+
+
+@receiver(tasks_bulk_changed)
+def _invalidate_on_bulk_task_change(sender, user_ids, **kwargs):
+    for user_id in user_ids:
+        invalidate_user_context(user_id)
+
+
+@receiver(post_save, sender=Hobby)
+def _invalidate_on_hobby_change(sender, instance, created, **kwargs):
+    if not created:
+        for user_id in UserHobby.objects.filter(hobby_id=instance.pk).values_list('user_id', flat=True):
+            invalidate_user_context(user_id)
@@ -0,0 +1,263 @@
+"""
+Labeled utterances for the local intent router. TRAINING_UTTERANCES fit the
+classifier in agent.intents; EVALUATION_UTTERANCES are held out and only used
+by ``manage.py bench_intents``.
+"""
+
+TRAINING_UTTERANCES = [
+    # create_task
+    ("create a task", "create_task"),
+    ("add a new task", "create_task"),
+    ("new task please", "create_task"),
+    ("i need to add something to my to do list", "create_task"),
+    ("can you make a task for me", "create_task"),
+    ("put laundry on my list of things to do", "create_task"),
+    ("remind me to study every monday", "create_task"),
+    ("i have a new chore to track", "create_task"),
+    ("schedule a task for the weekend", "create_task"),
+    ("set up a recurring task", "create_task"),
+    ("add gym to my tasks", "create_task"),
+    ("i want to start tracking my reading sessions", "create_task"),
+    ("help me create a to do item", "create_task"),
+    ("there is something new i have to do each week", "create_task"),
+    ("log a new assignment", "create_task"),
+    ("add homework", "create_task"),
+    ("add gym 1h mon wed fri high priority at 18:00", "create_task"),
+    ("new task reading 30 minutes daily", "create_task"),
+    # list_tasks
+    ("show my tasks", "list_tasks"),
+    ("list tasks", "list_tasks"),
+    ("what tasks do i have", "list_tasks"),
+    ("what is on my to do list", "list_tasks"),
+    ("display all my tasks", "list_tasks"),
+    ("which chores have i added", "list_tasks"),
+    ("let me see my tasks", "list_tasks"),
+    ("give me an overview of my tasks", "list_tasks"),
+    ("how many tasks do i have", "list_tasks"),
+    ("what am i supposed to be working on", "list_tasks"),
+    ("remind me what my tasks are", "list_tasks"),
+    ("pull up my task list", "list_tasks"),
+    # update_task
+    ("change the priority of gym to high", "update_task"),
+    ("update my reading task", "update_task"),
+    ("edit the laundry task", "update_task"),
+    ("move gym to friday", "update_task"),
+    ("reschedule my study session to tuesday", "update_task"),
+    ("make cooking low priority", "update_task"),
+    ("rename gym to workout", "update_task"),
+    ("set piano practice to 18:00", "update_task"),
+    ("i want gym on mondays and thursdays instead", "update_task"),
+    ("modify my homework task", "update_task"),
+    ("bump the priority of studying", "update_task"),
+    ("switch laundry to saturday", "update_task"),
+    ("fix the time of my meditation task", "update_task"),
+    # delete_task
+    ("delete my gym task", "delete_task"),
+    ("remove the laundry task", "delete_task"),
+    ("cancel my reading task", "delete_task"),
+    ("get rid of the homework task", "delete_task"),
+    ("i dont need the cooking task anymore", "delete_task"),
+    ("drop studying from my tasks", "delete_task"),
+    ("erase the task called groceries", "delete_task"),
+    ("take gym off my list", "delete_task"),
+    ("stop tracking my meditation task", "delete_task"),
+    ("delete task laundry", "delete_task"),
+    ("clear the cleaning chore", "delete_task"),
+    ("remove jogging from my to do list", "delete_task"),
+    # create_hobby
+    ("add a hobby", "create_hobby"),
+    ("create a new hobby", "create_hobby"),
+    ("i picked up a new hobby", "create_hobby"),
+    ("add painting to my hobbies", "create_hobby"),
+    ("i started learning guitar", "create_hobby"),
+    ("new hobby", "create_hobby"),
+    ("i have a new interest i want to add", "create_hobby"),
+    ("put chess in my hobbies", "create_hobby"),
+    ("i took up photography recently", "create_hobby"),
+    ("register a hobby for me", "create_hobby"),
+    ("i want to add a pastime", "create_hobby"),
+    ("add knitting as a hobby", "create_hobby"),
+    # list_hobbies
+    ("show my hobbies", "list_hobbies"),
+    ("list hobbies", "list_hobbies"),
+    ("what hobbies do i have", "list_hobbies"),
+    ("which hobbies did i add", "list_hobbies"),
+    ("display my interests", "list_hobbies"),
+    ("what are my pastimes", "list_hobbies"),
+    ("let me see my hobbies", "list_hobbies"),
+    ("what do i do for fun according to my profile", "list_hobbies"),
+    ("pull up my hobby list", "list_hobbies"),
+    ("remind me of my hobbies", "list_hobbies"),
+    # update_hobby
+    ("change the category of chess to games", "update_hobby"),
+    ("update my painting hobby", "update_hobby"),
+    ("move guitar to the music category", "update_hobby"),
+    ("edit my chess hobby", "update_hobby"),
+    ("set the category of photography to art", "update_hobby"),
+    ("recategorize knitting as crafts", "update_hobby"),
+    ("change my hobby category", "update_hobby"),
+    ("modify the running hobby", "update_hobby"),
+    # delete_hobby
+    ("delete my chess hobby", "delete_hobby"),
+    ("remove painting from my hobbies", "delete_hobby"),
+    ("i quit guitar", "delete_hobby"),
+    ("i am not into photography anymore", "delete_hobby"),
+    ("drop the knitting hobby", "delete_hobby"),
+    ("get rid of my running hobby", "delete_hobby"),
+    ("take swimming off my hobbies", "delete_hobby"),
+    ("i gave up skating", "delete_hobby"),
+    ("delete hobby chess", "delete_hobby"),
+    ("remove a hobby", "delete_hobby"),
+    # routine_query
+    ("whats on friday", "routine_query"),
+    ("what do i have today", "routine_query"),
+    ("show me my routine", "routine_query"),
+    ("whats my schedule for tomorrow", "routine_query"),
+    ("what is planned for monday", "routine_query"),
+    ("what should i do today", "routine_query"),
+    ("whats next on my schedule", "routine_query"),
+    ("how does my wednesday look", "routine_query"),
+    ("what am i doing on saturday", "routine_query"),
+    ("anything planned for sunday", "routine_query"),
+    ("tell me todays plan", "routine_query"),
+    ("what is my agenda on thursday", "routine_query"),
+    ("am i busy tomorrow", "routine_query"),
+    ("give me my daily schedule", "routine_query"),
+    # general_chat
+    ("hello", "general_chat"),
+    ("hi there", "general_chat"),
+    ("thanks", "general_chat"),
+    ("what can you do", "general_chat"),
+    ("how are you", "general_chat"),
+    ("tell me a joke", "general_chat"),
+    ("i feel unmotivated lately", "general_chat"),
+    ("any tips for staying focused", "general_chat"),
+    ("how do i balance work and hobbies", "general_chat"),
+    ("what is the weather like", "general_chat"),
+    ("good morning", "general_chat"),
+    ("who are you", "general_chat"),
+    ("give me advice on time management", "general_chat"),
+    ("why is it hard to build habits", "general_chat"),
+    ("can you recommend a book", "general_chat"),
+    ("i am stressed about exams", "general_chat"),
+    ("what is the meaning of life", "general_chat"),
+    ("suggest a fun activity for a rainy day", "general_chat"),
+    ("how should i prioritize my week", "general_chat"),
+    ("ok", "general_chat"),
+    ("bye", "general_chat"),
+    ("explain the pomodoro technique", "general_chat"),
+    ("what hobbies are good for relaxing", "general_chat"),
+    ("is it better to exercise in the morning", "general_chat"),
+    # Questions and advice that mention tasks, hobbies or the routine without asking to change them
+    ("how can i create a task", "general_chat"),
+    ("how do i remove a hobby", "general_chat"),
+    ("should i drop a task if i keep skipping it", "general_chat"),
+    ("what are some good hobbies to try", "general_chat"),
+    ("ideas for a relaxing evening routine", "general_chat"),
+    ("i do not want to delete anything yet", "general_chat"),
+    ("my routine feels too busy", "general_chat"),
+]
+
+EVALUATION_UTTERANCES = [
+    # create_task
+    ("add task", "create_task"),
+    ("make a new task", "create_task"),
+    ("i want to create a task for cleaning", "create_task"),
+    ("please add a to do for groceries", "create_task"),
+    ("could you set up a new chore", "create_task"),
+    ("remind me to call mom on sundays", "create_task"),
+    ("log a new task", "create_task"),
+    ("add yoga to my to do list", "create_task"),
+    # list_tasks
+    ("show tasks", "list_tasks"),
+    ("my tasks", "list_tasks"),
+    ("what's on my task list", "list_tasks"),
+    ("list all of my chores", "list_tasks"),
+    ("which tasks have i got", "list_tasks"),
+    ("can i see my to do list", "list_tasks"),
+    ("what are my tasks", "list_tasks"),
+    ("view tasks", "list_tasks"),
+    # update_task
+    ("change gym priority to low", "update_task"),
+    ("update the reading task", "update_task"),
+    ("move laundry to sunday", "update_task"),
+    ("rename study to revision", "update_task"),
+    ("make homework high priority", "update_task"),
+    ("edit my cooking task", "update_task"),
+    ("reschedule gym to wednesday", "update_task"),
+    ("set my meditation task to 07:00", "update_task"),
+    # delete_task
+    ("delete the gym task", "delete_task"),
+    ("remove my homework task", "delete_task"),
+    ("please cancel the laundry task", "delete_task"),
+    ("get rid of my study task", "delete_task"),
+    ("i no longer need the cooking task", "delete_task"),
+    ("delete task groceries", "delete_task"),
+    ("drop the cleaning task", "delete_task"),
+    ("remove reading from my tasks", "delete_task"),
+    # create_hobby
+    ("add hobby", "create_hobby"),
+    ("i want to add a new hobby", "create_hobby"),
+    ("add swimming to my hobbies", "create_hobby"),
+    ("create hobby", "create_hobby"),
+    ("i took up pottery", "create_hobby"),
+    ("i started learning piano", "create_hobby"),
+    ("add a new interest", "create_hobby"),
+    ("make a hobby for drawing", "create_hobby"),
+    # list_hobbies
+    ("show hobbies", "list_hobbies"),
+    ("my hobbies", "list_hobbies"),
+    ("list my hobbies", "list_hobbies"),
+    ("what are my hobbies", "list_hobbies"),
+    ("which interests do i have", "list_hobbies"),
+    ("can i see my hobbies", "list_hobbies"),
+    ("view my hobby list", "list_hobbies"),
+    ("what hobbies have i added", "list_hobbies"),
+    # update_hobby
+    ("change chess category to strategy", "update_hobby"),
+    ("update the guitar hobby", "update_hobby"),
+    ("edit the painting hobby", "update_hobby"),
+    ("move running to the sport category", "update_hobby"),
+    ("set the category of knitting to crafts", "update_hobby"),
+    ("modify my photography hobby", "update_hobby"),
+    # delete_hobby
+    ("delete the chess hobby", "delete_hobby"),
+    ("remove guitar from my hobbies", "delete_hobby"),
+    ("i quit painting", "delete_hobby"),
+    ("drop my photography hobby", "delete_hobby"),
+    ("get rid of the knitting hobby", "delete_hobby"),
+    ("remove my running hobby", "delete_hobby"),
+    # routine_query
+    ("what's on friday", "routine_query"),
+    ("what do i have tomorrow", "routine_query"),
+    ("show my schedule", "routine_query"),
+    ("what is my routine for monday", "routine_query"),
+    ("whats planned for today", "routine_query"),
+    ("what should i do on saturday", "routine_query"),
+    ("how does thursday look", "routine_query"),
+    ("what's next", "routine_query"),
+    ("my routine today", "routine_query"),
+    ("am i free on sunday", "routine_query"),
+    # general_chat
+    ("hey", "general_chat"),
+    ("thank you so much", "general_chat"),
+    ("what can you help me with", "general_chat"),
+    ("tell me something interesting", "general_chat"),
+    ("i am feeling tired today", "general_chat"),
+    ("how can i be more productive", "general_chat"),
+    ("what is a good hobby for beginners", "general_chat"),
+    ("how do i stop procrastinating", "general_chat"),
+    ("good night", "general_chat"),
+    ("who made you", "general_chat"),
+    ("recommend a podcast", "general_chat"),
+    ("how long should a workout be", "general_chat"),
+    ("how do i add a hobby", "general_chat"),
+    ("how do i add a task?", "general_chat"),
+    ("any tips to make my tasks more fun?", "general_chat"),
+    ("i feel overwhelmed by my routine", "general_chat"),
+    ("can you help me make my schedule less stressful?", "general_chat"),
+    ("what are good tasks for a productive morning", "general_chat"),
+    ("don't delete my gym task", "general_chat"),
+    ("i never want to remove my reading hobby", "general_chat"),
+    ("should i cancel tasks when i am sick?", "general_chat"),
+]
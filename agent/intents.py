@@ -0,0 +1,198 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .intent_data import TRAINING_UTTERANCES
+
+# Classifier predictions below this posterior go to the LLM as general chat
+AGENT_INTENT_MIN_CONFIDENCE = getattr(settings, 'AGENT_INTENT_MIN_CONFIDENCE', 0.7)
+
+GENERAL_CHAT = 'general_chat'
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+IntentMatch = namedtuple('IntentMatch', ['intent', 'confidence', 'source'])
+
+_token_re = re.compile(r'\w+')
+
+_TASK = r'(?:tasks?|to dos?|todos?|chores?)'
+_HOBBY = r'(?:hobby|hobbies|interests?|pastimes?)'
+_DAY = r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|today|tonight|tomorrow)'
+# Durations, priorities and days, as in "add gym 1h mon wed high"
+_SLOT = (
+    r'(?:\d+ ?(?:h|hrs?|hours?|m|mins?|minutes?)|high|medium|low|daily|every day|weekdays?|weekends?'
+    r'|(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tues?|wed|thur?s?|fri|sat|sun)s?)'
+)
+_FEW = r'(?: \w+){0,3}?'  # up to three words in between
+_SOME = r'(?: \w+){0,5}?'
+# Only these may sit between "show"/"what are" and the noun, so "what are good tasks" isn't a listing
+_LIST_FILLER = r'(?: (?:me|all|of|my|the|current|on|i|have|got|added)){0,4}'
+_COMMAND_VERB = (
+    r'(?:delete|remove|drop|cancel|erase|get rid|add|create|make|new|schedule|set|log|register'
+    r'|change|update|edit|modify|rename|move|reschedule|switch|bump)'
+)
+
+# Negated commands, questions about how to do something and requests for advice
+# are conversation, however much they look like a command: "dont delete my gym
+# task", "should i cancel tasks when i am sick", "how do i add a hobby"
+_NOT_A_COMMAND_RE = re.compile(
+    r'\b(?:dont|do not|never|not|cant|cannot|wont|shouldnt|how (?:do|can|should|would|could) (?:i|you|we)'
+    r'|how to|should (?:i|we)|why (?:do|should|would) (?:i|you))(?: \w+){0,2}? '
+    + _COMMAND_VERB + r'\b'
+    r'|\b(?:tips?|advice|ideas?|suggestions?|help me(?! (?:to )?' + _COMMAND_VERB + r'\b)'
+    r'|feel|feels|feeling|overwhelmed|stressed|stressful|motivat\w*)\b'
+)
+
+# Checked in order, so where two patterns match at the same position the more
+# specific one (delete/update before create/list) wins
+INTENT_PATTERNS = [
+    ('delete_task', rf'\b(?:delete|remove|drop|cancel|erase|get rid of){_SOME} {_TASK}\b'),
+    ('delete_task', rf'\b(?:delete|remove) {_TASK}\b'),
+    ('delete_hobby', rf'\b(?:delete|remove|drop|get rid of){_SOME} {_HOBBY}\b'),
+    ('delete_hobby', rf'\b(?:delete|remove) {_HOBBY}\b'),
+    ('update_hobby', rf'\b(?:change|update|edit|modify|set|move){_SOME} (?:category|{_HOBBY})\b'),
+    ('update_task', rf'\b(?:change|update|edit|modify|rename|reschedule){_SOME} {_TASK}\b'),
+    ('update_task', rf'\b(?:change|set|make|bump){_SOME} (?:high |medium |low )?priority\b'),
+    ('update_task', rf'\b(?:move|reschedule|switch|set|change) \w+(?: \w+)? to (?:\d|{_DAY}\b)'),
+    ('update_task', r'\brename \w+(?: \w+)? to\b'),
+    ('create_task', rf'\b(?:create|add|new|make|schedule|set up|log){_FEW} {_TASK}\b'),
+    ('create_task', rf'\bnew {_TASK}\b'),
+    ('create_hobby', rf'\b(?:create|add|new|make|register){_FEW} {_HOBBY}\b'),
+    ('create_hobby', rf'\bnew {_HOBBY}\b'),
+    # A task given in one go, with its details
+    ('create_task', rf'^(?:please )?(?:add|create|new|schedule|log)\b(?!.*\b{_HOBBY}\b).*\b{_SLOT}\b'),
+    ('create_task', r'^(?:please )?remind me to\b'),
+    # A bare "add laundry" / "delete gym"; the ones naming a hobby matched above
+    ('create_task', r'^(?:please )?(?:add|create) \w+'),
+    ('delete_task', r'^(?:please )?(?:delete|remove) \w+'),
+    ('delete_hobby', r'^i (?:quit|gave up) \w+$'),
+    ('list_tasks', rf'\b(?:show|list|see|view|display|what are|whats|which){_LIST_FILLER} {_TASK}\b'),
+    ('list_tasks', rf'^(?:my|all my) {_TASK}$'),
+    ('list_hobbies', rf'\b(?:show|list|see|view|display|what are|which){_LIST_FILLER} {_HOBBY}\b'),
+    ('list_hobbies', rf'^(?:my|all my) {_HOBBY}$'),
+    ('routine_query', r'\b(?:my|the|todays|tomorrows|daily) (?:routine|schedule|agenda|plan)\b'),
+    ('routine_query', rf'\bwhat(?:s| is| do i have| am i doing)?(?: \w+){{0,3}}? (?:on |for )?{_DAY}\b'),
+    ('routine_query', r'\b(?:whats|what is) next\b'),
+    ('routine_query', rf'\bhow does (?:my )?{_DAY} look\b'),
+]
+
+# One alternation, so every pattern is tried in a single pass over the text
+_intent_re = re.compile('|'.join(
+    f'(?P<{intent}__{index}>{pattern})' for index, (intent, pattern) in enumerate(INTENT_PATTERNS)
+))
+
+
+def normalize(text):
+    """Lowercase words joined by single spaces, with apostrophes dropped ("what's" -> "whats")."""
+    return ' '.join(_token_re.findall(text.lower().replace("'", '').replace('’', '')))
+
+
+def match_pattern(text):
+    """The intent of the first pattern matching normalized ``text``, or None."""
+    match = _intent_re.search(text)
+    return match.lastgroup.split('__')[0] if match else None
+
+
+class NaiveBayesIntentClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams with add-one smoothing."""
+
+    def __init__(self, examples=()):
+        self.log_priors = {}
+        self.log_likelihoods = {}
+        self.log_unseen = {}
+        if examples:
+            self.fit(examples)
+
+    @staticmethod
+    def features(text):
+        words = text.split()
+        return words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+    def fit(self, examples):
+        counts = defaultdict(Counter)
+        intent_totals = Counter()
+        for text, intent in examples:
+            counts[intent].update(self.features(normalize(text)))
+            intent_totals[intent] += 1
+        vocabulary = set().union(*counts.values())
+
+        for intent, feature_counts in counts.items():
+            denominator = sum(feature_counts.values()) + len(vocabulary)
+            self.log_priors[intent] = math.log(intent_totals[intent] / len(examples))
+            self.log_likelihoods[intent] = {
+                feature: math.log((count + 1) / denominator) for feature, count in feature_counts.items()
+            }
+            self.log_unseen[intent] = math.log(1 / denominator)
+        self.vocabulary = vocabulary
+        return self
+
+    def predict(self, text):
+        """(intent, posterior probability) for normalized ``text``."""
+        # Features never seen in training carry no evidence for any intent
+        features = [feature for feature in self.features(text) if feature in self.vocabulary]
+        scores = {
+            intent: prior + sum(
+                self.log_likelihoods[intent].get(feature, self.log_unseen[intent]) for feature in features
+            )
+            for intent, prior in self.log_priors.items()
+        }
+        best = max(scores, key=scores.get)
+        # Softmax over the log scores, shifted by the best one to avoid underflow
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / total
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """The classifier trained on TRAINING_UTTERANCES, built on first use."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = NaiveBayesIntentClassifier(TRAINING_UTTERANCES)
+    return _classifier
+
+
+def classify_intent(message):
+    """
+    Route ``message`` to an intent without calling the LLM: the compiled patterns
+    first, then the classifier. Anything neither is sure about is general chat.
+    """
+    text = normalize(message)
+    if _NOT_A_COMMAND_RE.search(text):
+        return IntentMatch(GENERAL_CHAT, 1.0, 'pattern')
+    intent = match_pattern(text)
+    if intent:
+        return IntentMatch(intent, 1.0, 'pattern')
+
+    intent, confidence = get_classifier().predict(text)
+    if intent == GENERAL_CHAT or confidence >= AGENT_INTENT_MIN_CONFIDENCE:
+        return IntentMatch(intent, confidence, 'classifier')
+    # Too unsure to act on; let the LLM answer
+    return IntentMatch(GENERAL_CHAT, None, 'fallback')
+
+
+def extract_day(message, today=None):
+    """The weekday ``message`` asks about; today when it names none."""
+    today = today or timezone.localdate()
+    words = normalize(message).split()
+    for day in WEEKDAYS:
+        if day.lower() in words:
+            return day
+    if 'tomorrow' in words:
+        return WEEKDAYS[(today + timedelta(days=1)).weekday()]
+    return WEEKDAYS[today.weekday()]
+
+
+def find_name(message, names):
+    """The longest of ``names`` that appears as whole words in ``message``, or None."""
+    text = f' {normalize(message)} '
+    found = [name for name in names if normalize(name) and f' {normalize(name)} ' in text]
+    return max(found, key=len) if found else None
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from agent.services import AgentComponents, AgentService, create_llm
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-request AgentService overhead, excluding LLM time, with the LLM client, tools, "
+        "prompt and chain built per request against the process-wide pooled components. "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user(username='bench_agent', email='agent@bench.local', password='x')
+            # Messages answered by tools, so no LLM call is made
+            messages = ['show tasks', 'show hobbies']
+            count = options['requests']
+
+            for name, components in (('per-request', lambda: AgentComponents(create_llm())),
+                                     ('pooled', lambda: None)):
+                AgentService(user.id, components=components()).process_message(messages[0])  # warm-up
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for index in range(count):
+                        AgentService(user.id, components=components()).process_message(messages[index % 2])
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:<12} {elapsed / count * 1e3:8.2f} ms/request  "
+                    f"{len(queries) / count:.2f} queries/request"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
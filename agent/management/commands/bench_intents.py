@@ -0,0 +1,54 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from agent.intent_data import EVALUATION_UTTERANCES
+from agent.intents import GENERAL_CHAT, classify_intent, get_classifier, match_pattern, normalize
+
+
+class Command(BaseCommand):
+    help = (
+        "Accuracy and latency of the local intent router on the held-out labeled utterances: "
+        "the compiled patterns alone, the classifier alone, and both as AgentService uses them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help="Timing passes over the utterance set")
+        parser.add_argument('--verbose', action='store_true', help="List every misrouted utterance")
+
+    def handle(self, *args, **options):
+        classifier = get_classifier()
+        routers = (
+            ('patterns', lambda message: match_pattern(normalize(message)) or GENERAL_CHAT),
+            ('classifier', lambda message: classifier.predict(normalize(message))[0]),
+            ('router', lambda message: classify_intent(message).intent),
+        )
+        labels = Counter(label for _, label in EVALUATION_UTTERANCES)
+        self.stdout.write(f"{len(EVALUATION_UTTERANCES)} utterances, {len(labels)} intents")
+
+        for name, route in routers:
+            misses = [(text, label, route(text)) for text, label in EVALUATION_UTTERANCES if route(text) != label]
+            # General chat sent to a tool is the costly mistake; the reverse only costs an LLM call
+            wrongly_local = sum(1 for _, label, got in misses if label == GENERAL_CHAT)
+
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                for text, _ in EVALUATION_UTTERANCES:
+                    route(text)
+            per_call = (time.perf_counter() - started) / (options['repeat'] * len(EVALUATION_UTTERANCES))
+
+            self.stdout.write(
+                f"{name:<11} accuracy {1 - len(misses) / len(EVALUATION_UTTERANCES):6.1%}  "
+                f"general chat routed to tools {wrongly_local}/{labels[GENERAL_CHAT]}  "
+                f"{per_call * 1e6:7.1f} us/utterance"
+            )
+            if options['verbose']:
+                for text, label, got in misses:
+                    self.stdout.write(f"    {text!r}: expected {label}, got {got}")
+
+        local = sum(1 for text, _ in EVALUATION_UTTERANCES if classify_intent(text).intent != GENERAL_CHAT)
+        self.stdout.write(
+            f"LLM calls avoided: {local}/{len(EVALUATION_UTTERANCES)} "
+            f"({local / len(EVALUATION_UTTERANCES):.0%}) of these messages"
+        )
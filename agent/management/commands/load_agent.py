@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agent import services
+from agent.response_cache import response_cache
+from agent.services import AgentComponents
+from core.authentication import get_tokens_for_user
+from core.models import User
+
+
+class StubChatModel(BaseChatModel):
+    """Answers after a fixed delay, like a remote LLM, and records peak concurrency."""
+
+    delay: float = 0.5
+    in_flight: int = 0
+    peak: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Let's plan a task for that."))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return self._result()
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent agent conversations against the async chat endpoint (and optionally the "
+        "sync one) in a single process, with a stub LLM that takes --llm-delay seconds. "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=200, help="Users chatting at once")
+        parser.add_argument('--llm-delay', type=float, default=0.5)
+        parser.add_argument('--compare-sync', action='store_true',
+                            help="Also run the sync DRF ChatView (expect concurrency x delay seconds)")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        previous_components = services._components
+        previous_threshold = response_cache.threshold
+        # Every user sends the same message; measure the LLM path, not the response cache
+        response_cache.threshold = 2
+        try:
+            count = options['concurrency']
+            # Unusable passwords: hashing hundreds of real ones would dominate the setup
+            User.objects.bulk_create([
+                User(username=f'load_agent_{index}', email=f'load{index}@bench.local', password='!')
+                for index in range(count)
+            ])
+            tokens = [
+                str(get_tokens_for_user(user).access_token)
+                for user in User.objects.filter(username__startswith='load_agent_')
+            ]
+
+            endpoints = [('async', '/api/agent/chat/async/')]
+            if options['compare_sync']:
+                endpoints.append(('sync', '/api/agent/chat/'))
+            for name, path in endpoints:
+                llm = StubChatModel(delay=options['llm_delay'])
+                # Every request in the process shares these, as in production
+                services._components = AgentComponents(llm)
+                elapsed, latencies, failures = asyncio.run(self.run_load(path, tokens))
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:<6} {count} conversations in {elapsed:6.2f}s  "
+                    f"p50 {latencies[len(latencies) // 2]:5.2f}s  p95 {latencies[int(len(latencies) * 0.95)]:5.2f}s  "
+                    f"peak concurrent LLM calls {llm.peak}  failures {failures}"
+                )
+        finally:
+            services._components = previous_components
+            response_cache.threshold = previous_threshold
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    async def run_load(self, path, tokens):
+        client = AsyncClient()
+
+        async def converse(token):
+            started = time.perf_counter()
+            response = await client.post(
+                path, {'message': 'tell me something nice'}, content_type='application/json',
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            return time.perf_counter() - started, response.status_code == 200
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(converse(token) for token in tokens))
+        elapsed = time.perf_counter() - started
+        return elapsed, [latency for latency, _ in results], sum(1 for _, ok in results if not ok)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from agent.models import CachedResponse
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired entries of the general-chat response cache, or every entry with --all. "
+        "Workers stop serving deleted entries at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Delete every entry, not just the expired ones")
+
+    def handle(self, *args, **options):
+        entries = CachedResponse.objects.all()
+        if not options['all']:
+            entries = entries.filter(expires_at__lte=timezone.now())
+        deleted, _ = entries.delete()
+        self.stdout.write(f"Purged {deleted} cached responses.")
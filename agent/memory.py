@@ -0,0 +1,179 @@
+import logging
+import threading
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+
+import tiktoken
+from django.conf import settings
+from django.db import close_old_connections
+from langchain_core.output_parsers import StrOutputParser
+
+from .buffers import message_log
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+# Tokens of history (summary + recent turns) sent with each general-chat prompt
+AGENT_MEMORY_TOKEN_BUDGET = getattr(settings, 'AGENT_MEMORY_TOKEN_BUDGET', 1500)
+# Longest the rolling summary may grow; it counts against the budget above
+AGENT_MEMORY_SUMMARY_TOKENS = getattr(settings, 'AGENT_MEMORY_SUMMARY_TOKENS', 300)
+AGENT_MEMORY_ENCODING = getattr(settings, 'AGENT_MEMORY_ENCODING', 'cl100k_base')
+# Upper bound on rows read per load, whatever their size
+AGENT_MEMORY_MAX_MESSAGES = 100
+
+SUMMARY_PROMPT = """Progressively summarize the conversation between a user and a task and hobby assistant.
+Keep facts about the user's goals, tasks, hobbies and preferences. Stay under {max_tokens} tokens.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+New summary:"""
+
+_summary_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'AGENT_SUMMARY_WORKERS', 2),
+    thread_name_prefix='agent-summary'
+)
+# Conversations with a refresh queued or running, so a busy chat doesn't queue several
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.get_encoding(AGENT_MEMORY_ENCODING)
+                except Exception:
+                    # The BPE file is downloaded on first use; without it fall back to an estimate
+                    logger.warning("tiktoken encoding %s unavailable, estimating tokens", AGENT_MEMORY_ENCODING)
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if not encoding:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens):
+    encoding = _get_encoding()
+    if not encoding:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def format_turn(content, is_user):
+    return f"{'User' if is_user else 'Assistant'}: {content}"
+
+
+class ConversationMemory:
+    """
+    Prompt history for one agent conversation: the rolling summary plus as many of
+    the newest turns as fit in AGENT_MEMORY_TOKEN_BUDGET. Turns that fall out of
+    the window are folded into the summary on a background thread.
+    """
+
+    def __init__(self, conversation, llm):
+        self.conversation = conversation
+        self.llm = llm
+
+    def load(self) -> str:
+        conversation = self.conversation
+        summary = conversation.summary
+        budget = AGENT_MEMORY_TOKEN_BUDGET - (count_tokens(summary) if summary else 0)
+
+        stored = Message.objects.filter(
+            conversation=conversation, id__gt=conversation.summarized_until
+        ).order_by('-id').values_list('id', 'content', 'is_user')[:AGENT_MEMORY_MAX_MESSAGES + 1]
+        # Turns still in the write-behind buffer are the newest ones
+        buffered = [(None, message.content, message.is_user) for message in message_log.pending_for(conversation.id)]
+        recent = reversed(buffered)
+
+        lines = []
+        used = 0
+        overflow = False
+        fold_before = None  # oldest id within half the budget; older turns get summarized
+        for message_id, content, is_user in chain(recent, stored):
+            line = format_turn(content, is_user)
+            tokens = count_tokens(line) + 1
+            if used + tokens > budget or len(lines) == AGENT_MEMORY_MAX_MESSAGES:
+                overflow = True
+                break
+            lines.append(line)
+            used += tokens
+            if used <= budget // 2 and message_id is not None:
+                fold_before = message_id
+
+        if overflow:
+            # Folding down to half the budget leaves room for several turns before the next refresh
+            fold_before = fold_before or message_id
+            if fold_before is not None:
+                self.schedule_summary_refresh(fold_before)
+
+        lines.reverse()
+        history = "\n".join(lines)
+        if summary:
+            history = f"Summary of earlier conversation: {summary}\n{history}"
+        return history
+
+    def save_turn(self, user_message, agent_message, intent=None, latency_ms=None):
+        # Written by the buffer's background thread, off the request path
+        message_log.add([
+            Message(conversation=self.conversation, content=user_message, is_user=True, intent=intent),
+            Message(
+                conversation=self.conversation, content=agent_message, is_user=False,
+                intent=intent, latency_ms=latency_ms
+            ),
+        ])
+
+    def schedule_summary_refresh(self, fold_before_id):
+        conversation_id = self.conversation.id
+        with _refreshing_lock:
+            if conversation_id in _refreshing:
+                return None
+            _refreshing.add(conversation_id)
+        return _summary_pool.submit(_refresh_summary, conversation_id, fold_before_id, self.llm)
+
+
+def _refresh_summary(conversation_id, fold_before_id, llm):
+    """Fold every message before ``fold_before_id`` into the conversation's summary."""
+    close_old_connections()
+    try:
+        conversation = Conversation.objects.get(pk=conversation_id)
+        rows = list(Message.objects.filter(
+            conversation_id=conversation_id,
+            id__gt=conversation.summarized_until,
+            id__lt=fold_before_id
+        ).order_by('id').values_list('id', 'content', 'is_user'))
+        if not rows:
+            return
+
+        summary = (llm | StrOutputParser()).invoke(SUMMARY_PROMPT.format(
+            max_tokens=AGENT_MEMORY_SUMMARY_TOKENS,
+            summary=conversation.summary or "(none)",
+            lines="\n".join(format_turn(content, is_user) for _, content, is_user in rows)
+        ))
+        # Only move forward from the summary this one was built on
+        Conversation.objects.filter(
+            pk=conversation_id, summarized_until=conversation.summarized_until
+        ).update(
+            summary=truncate_tokens(summary.strip(), AGENT_MEMORY_SUMMARY_TOKENS),
+            summarized_until=rows[-1][0]
+        )
+    except Exception:
+        logger.exception("Could not refresh the summary of agent conversation %s", conversation_id)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(conversation_id)
+        close_old_connections()
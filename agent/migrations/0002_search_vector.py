@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:08
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# search_vector is only maintained on PostgreSQL; other backends fall back to token matching
+CREATE_SQL = [
+    """
+    CREATE TRIGGER agent_msg_search_vector_update
+    BEFORE INSERT OR UPDATE OF content ON agent_message
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.english', content)
+    """,
+    "UPDATE agent_message SET search_vector = to_tsvector('pg_catalog.english', content)",
+    "CREATE INDEX agent_msg_search_gin ON agent_message USING gin (search_vector)",
+]
+DROP_SQL = [
+    "DROP INDEX IF EXISTS agent_msg_search_gin",
+    "DROP TRIGGER IF EXISTS agent_msg_search_vector_update ON agent_message",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(CREATE_SQL), run_on_postgresql(DROP_SQL)),
+    ]
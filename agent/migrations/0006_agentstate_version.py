@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent', '0005_cached_response'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentstate',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from core.models import User, Task, Hobby, UserHobby
 from django.utils import timezone
@@ -7,6 +8,9 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Rolling summary of every message up to summarized_until (a Message id), see agent.memory
+    summary = models.TextField(blank=True, default='')
+    summarized_until = models.BigIntegerField(default=0)
     
     def __str__(self):
         return f"Conversation with {self.user.username}"
@@ -16,6 +20,17 @@ class Message(models.Model):
     content = models.TextField()
     is_user = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Intent that handled the turn, and on agent replies how long it took to produce
+    intent = models.CharField(max_length=100, null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    # Maintained by a PostgreSQL trigger and GIN-indexed (see migration 0002); unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Newest-first reads of one conversation (memory window, history pages)
+            models.Index(fields=['conversation', 'id'], name='agent_msg_conv_id_idx'),
+        ]
     
     def __str__(self):
         return f"{'User' if self.is_user else 'Agent'} message in conversation {self.conversation.id}"
@@ -24,8 +39,21 @@ class AgentState(models.Model):
     conversation = models.OneToOneField(Conversation, on_delete=models.CASCADE, related_name='agent_state')
     current_intent = models.CharField(max_length=100, null=True, blank=True)
     collected_data = models.JSONField(default=dict)
+    # Bumped on every change, so a stale cached copy (see agent.buffers) can't win over the row
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Agent state for conversation {self.conversation.id}"
+
+class CachedResponse(models.Model):
+    """A general-chat reply that didn't depend on the user, served again for similar messages (see agent.response_cache)."""
+    normalized_message = models.TextField()
+    response = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.normalized_message[:50]
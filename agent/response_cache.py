@@ -0,0 +1,276 @@
+"""
+Semantic cache of general-chat replies. Messages are compared as unit-length
+sparse vectors of weighted words, word bigrams and character trigrams (pure
+Python, no model or external service); a reply is served again when a new
+message is similar enough to one it was generated for and has the same
+content words. Only messages that ``is_cacheable`` accepts take part, and
+their replies are generated without history or user data (see AgentService).
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .intents import WEEKDAYS, normalize
+from .models import CachedResponse
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity a message needs with a cached one to reuse its reply (above 1 disables the cache)
+AGENT_RESPONSE_CACHE_THRESHOLD = getattr(settings, 'AGENT_RESPONSE_CACHE_THRESHOLD', 0.75)
+# Seconds a new entry is served for; each entry's expires_at can be changed in the admin
+AGENT_RESPONSE_CACHE_TTL = getattr(settings, 'AGENT_RESPONSE_CACHE_TTL', 7 * 24 * 3600)
+# Seconds between checks for other workers' entries (and pruning of expired ones)
+AGENT_RESPONSE_CACHE_REFRESH = getattr(settings, 'AGENT_RESPONSE_CACHE_REFRESH', 60)
+# Entries kept at most; the least used go first
+AGENT_RESPONSE_CACHE_MAX_ENTRIES = getattr(settings, 'AGENT_RESPONSE_CACHE_MAX_ENTRIES', 1000)
+# A reply is only stored once a message with the same content words missed this many times
+AGENT_RESPONSE_CACHE_MIN_MISSES = getattr(settings, 'AGENT_RESPONSE_CACHE_MIN_MISSES', 2)
+
+_DATE_WORDS = r'today|tonight|tomorrow|yesterday|' + '|'.join(day.lower() for day in WEEKDAYS)
+# Words that make a message depend on the user's data, the conversation so far or the date
+_PERSONAL_RE = re.compile(
+    r'\b(?:my|mine|our|ours|it|its|this|that|these|those|they|them|he|she|him|her|again|'
+    r'earlier|before|above|last|next|now|' + _DATE_WORDS + r')\b'
+)
+# ...and a reply that speaks to one user in particular
+_PERSONAL_REPLY_RE = re.compile(
+    r'\b(?:your|yours|again|earlier|last time|you mentioned|you said|you told|' + _DATE_WORDS + r')\b',
+    re.IGNORECASE
+)
+
+# Tuned so paraphrases ("how do i add hobbies", "how can i add a hobby?") score
+# above the threshold and one-word changes ("add a task", "delete a hobby") below it
+_STOP_WORDS = frozenset(
+    'a an the do does can could would should how what whats is are be for on to of in at with and or '
+    'some any please give tell me about'.split()
+)
+_STOP_WEIGHT = 0.3
+_BIGRAM_WEIGHT = 0.7
+_TRIGRAM_WEIGHT = 0.4
+_ALIASES = {'u': 'you', 'ur': 'your', 'r': 'are', 'pls': 'please', 'plz': 'please', 'thx': 'thanks'}
+
+
+def _stem(word):
+    word = _ALIASES.get(word, word)
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def content_words(text):
+    """The stemmed words of normalized ``text`` other than function words, negations included."""
+    return frozenset(_stem(word) for word in text.split()) - _STOP_WORDS
+
+
+def vectorize(text):
+    """Unit-length sparse vector of normalized ``text``, as {feature: weight}."""
+    words = [_stem(word) for word in text.split()]
+    # Function words count for little, so "add a hobby" and "add a task" stay apart
+    weights = Counter()
+    for word in words:
+        weights[word] += _STOP_WEIGHT if word in _STOP_WORDS else 1.0
+    for first, second in zip(words, words[1:]):
+        both_stop = first in _STOP_WORDS and second in _STOP_WORDS
+        weights[f"{first} {second}"] += _BIGRAM_WEIGHT * (_STOP_WEIGHT if both_stop else 1.0)
+    # Trigrams of content words (prefixed so they can't collide with words) tolerate typos
+    for word in words:
+        if word not in _STOP_WORDS:
+            padded = f" {word} "
+            for index in range(len(padded) - 2):
+                weights[f"#{padded[index:index + 3]}"] += _TRIGRAM_WEIGHT
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {feature: weight / norm for feature, weight in weights.items()} if norm else {}
+
+
+def _user_names(user_context):
+    names = [task['task_name'] for task in user_context['tasks']]
+    names += [hobby['name'] for hobby in user_context['hobbies']]
+    for activities in (user_context['routine'] or {}).values():
+        names += [activity.get('activity') or '' for activity in activities]
+    return {name.lower() for name in names if len(name) > 2}
+
+
+def is_cacheable(text, user_context):
+    """
+    Whether normalized ``text`` can be answered the same way for any user: it
+    refers to nothing personal, earlier in the conversation or date-relative,
+    and mentions none of the user's tasks, hobbies or routine.
+    """
+    if not text or _PERSONAL_RE.search(text):
+        return False
+    return not any(name in text for name in _user_names(user_context))
+
+
+def is_generic_reply(response, user_context):
+    """Whether ``response`` addresses no one in particular and mentions none of the user's data."""
+    if not response or _PERSONAL_REPLY_RE.search(response):
+        return False
+    lowered = response.lower()
+    return not any(name in lowered for name in _user_names(user_context))
+
+
+class ResponseCache:
+    """
+    Process-wide index over the CachedResponse table. Entries are matched in
+    memory; a hit is confirmed (and counted) against the table with one UPDATE,
+    so entries purged or expired elsewhere stop being served at once.
+    """
+
+    def __init__(self, threshold=AGENT_RESPONSE_CACHE_THRESHOLD, ttl=AGENT_RESPONSE_CACHE_TTL,
+                 refresh=AGENT_RESPONSE_CACHE_REFRESH, max_entries=AGENT_RESPONSE_CACHE_MAX_ENTRIES,
+                 min_misses=AGENT_RESPONSE_CACHE_MIN_MISSES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.refresh = refresh
+        self.max_entries = max_entries
+        self.min_misses = min_misses
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Drop the in-process index; the next lookup reloads it from the table."""
+        with self._lock:
+            # pk -> (response, expires_at, vector, content words)
+            self._entries = {}
+            self._exact = {}
+            # feature -> {pk: weight}
+            self._postings = defaultdict(dict)
+            self._loaded_at = None
+            # (newest pk, row count) of the table when it was last loaded
+            self._table_marker = None
+
+    def _add(self, pk, text, response, expires_at):
+        vector = vectorize(text)
+        self._entries[pk] = (response, expires_at, vector, content_words(text))
+        self._exact[text] = pk
+        for feature, weight in vector.items():
+            self._postings[feature][pk] = weight
+
+    def _forget(self, pk):
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return
+        for feature in entry[2]:
+            self._postings[feature].pop(pk, None)
+        self._exact = {text: other for text, other in self._exact.items() if other != pk}
+
+    def _reload_if_stale(self):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh:
+                return
+            self._loaded_at = time.monotonic()
+        now = timezone.now()
+        # Expired rows are pruned here, by whichever worker gets to it first
+        CachedResponse.objects.filter(expires_at__lte=now).delete()
+        marker = CachedResponse.objects.aggregate(newest=Max('pk'), count=Count('pk'))
+        if marker == self._table_marker:
+            with self._lock:
+                for pk in [pk for pk, entry in self._entries.items() if entry[1] <= now]:
+                    self._forget(pk)
+            return
+        rows = list(CachedResponse.objects.filter(expires_at__gt=now).values_list(
+            'pk', 'normalized_message', 'response', 'expires_at'
+        ))
+        with self._lock:
+            self._entries, self._exact, self._postings = {}, {}, defaultdict(dict)
+            for row in rows:
+                self._add(*row)
+            self._table_marker = marker
+
+    def _best_match(self, text):
+        now = timezone.now()
+        words = content_words(text)
+        with self._lock:
+            pk = self._exact.get(text)
+            if pk is not None and self._entries[pk][1] > now:
+                return pk, 1.0, self._entries[pk][0]
+            scores = defaultdict(float)
+            for feature, weight in vectorize(text).items():
+                for entry, entry_weight in self._postings.get(feature, {}).items():
+                    scores[entry] += weight * entry_weight
+            for pk, score in sorted(scores.items(), key=lambda item: -item[1]):
+                if score < self.threshold:
+                    break
+                response, expires_at, _, entry_words = self._entries[pk]
+                # Close wording isn't enough: "is it good/bad...", "i am (not) stressed"
+                if expires_at > now and entry_words == words:
+                    return pk, score, response
+        return None, 0.0, None
+
+    def cacheable(self, message, user_context):
+        """Whether ``message`` should get a user-independent reply that may be stored."""
+        return self.threshold <= 1 and is_cacheable(normalize(message), user_context)
+
+    def lookup(self, message):
+        """The cached reply for a message similar enough to ``message``, or None."""
+        text = normalize(message)
+        if not text or self.threshold > 1:
+            return None
+        try:
+            self._reload_if_stale()
+            pk, score, response = self._best_match(text)
+            if pk is None:
+                return None
+            if not CachedResponse.objects.filter(pk=pk, expires_at__gt=timezone.now()).update(hits=F('hits') + 1):
+                with self._lock:
+                    self._forget(pk)
+                return None
+            logger.debug("Response cache hit %s (similarity %.2f) for %r", pk, score, text)
+            return response
+        except Exception:
+            logger.exception("Response cache lookup failed")
+            return None
+
+    def _admit(self, text):
+        # Counted in the Django cache, so a shared cache counts the misses of every worker
+        signature = ' '.join(sorted(content_words(text))) or text
+        key = f"agent_response_misses:{hashlib.md5(signature.encode()).hexdigest()}"
+        cache.add(key, 0, self.ttl)
+        try:
+            return cache.incr(key) >= self.min_misses
+        except ValueError:
+            return self.min_misses <= 1
+
+    def store(self, message, response, user_context):
+        """Keep ``response`` to ``message`` once such messages keep coming and the reply is generic."""
+        text = normalize(message)
+        if not self.cacheable(message, user_context) or not is_generic_reply(response, user_context):
+            return
+        try:
+            if not self._admit(text):
+                return
+            entry = CachedResponse.objects.create(
+                normalized_message=text, response=response,
+                expires_at=timezone.now() + timedelta(seconds=self.ttl)
+            )
+            excess = CachedResponse.objects.count() - self.max_entries
+            evicted = []
+            if excess > 0:
+                # Least used first, oldest among equals
+                evicted = list(CachedResponse.objects.order_by('hits', 'created_at').values_list(
+                    'pk', flat=True
+                )[:excess])
+                CachedResponse.objects.filter(pk__in=evicted).delete()
+        except Exception:
+            logger.exception("Could not store a cached agent response")
+            return
+        with self._lock:
+            for pk in evicted:
+                self._forget(pk)
+            if entry.pk not in evicted:
+                self._add(entry.pk, text, response, entry.expires_at)
+
+
+response_cache = ResponseCache()
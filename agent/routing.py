@@ -0,0 +1,7 @@
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    # Token-by-token agent replies
+    re_path(r'ws/agent/$', consumers.AgentConsumer.as_asgi()),
+]
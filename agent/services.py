@@ -1,38 +1,37 @@
+import logging
 import re
-from typing import List, Dict, Any
+import threading
+import time
+from datetime import timedelta
+from typing import List, Dict, Any, Optional
+from asgiref.sync import sync_to_async
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory
-from .tools import CreateTaskTool, CreateHobbyTool, GetUserTasksTool, GetUserHobbiesTool
+from .memory import ConversationMemory
+from .buffers import agent_states
+from .intents import GENERAL_CHAT, WEEKDAYS, classify_intent, extract_day, find_name, normalize
+from .tools import (
+    CreateTaskTool, CreateHobbyTool, GetUserTasksTool, GetUserHobbiesTool,
+    UpdateTaskTool, DeleteTaskTool, UpdateHobbyTool, DeleteHobbyTool, GetRoutineTool
+)
 from .models import Conversation, Message, AgentState
+from .context import aget_user_context, format_user_context, get_user_context
+from .response_cache import response_cache
 from django.conf import settings
 import json
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage, AIMessage
-from langchain.chains import ConversationChain
+from langchain_core.output_parsers import StrOutputParser
 from langchain.prompts import PromptTemplate
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.utils import timezone
 from django.utils.dateparse import parse_duration, parse_time
 
-class AgentService:
-    def __init__(self, user_id: int):
-        self.user_id = user_id
-        self.conversation = self._get_or_create_conversation()
-        self.agent_state = self._get_or_create_agent_state()
-        self.tools = [
-            CreateTaskTool(),
-            CreateHobbyTool(),
-            GetUserTasksTool(),
-            GetUserHobbiesTool()
-        ]
-        self.agent = self._create_agent()
-        
-        # Create a more specific prompt template
-        self.prompt = PromptTemplate(
-        input_variables=["history", "input"],
-        template="""You are a friendly task and hobby management assistant. Your main functions are:
+logger = logging.getLogger(__name__)
+
+AGENT_INSTRUCTIONS = """You are a friendly task and hobby management assistant. Your main functions are:
         1. Help users manage their tasks and hobbies
         2. Create new tasks by collecting required information
         3. Add new hobbies to users' profiles
@@ -45,22 +44,170 @@ class AgentService:
         For hobbies: collect name and category.
         
         If the user's request isn't about tasks or hobbies, provide a helpful response and suggest task/hobby related actions.
+        """
+
+AGENT_PROMPT_TEMPLATE = AGENT_INSTRUCTIONS + """
+        What you know about the user:
+        {user_context}
         
         Current conversation state:
         {history}
         
         User: {input}
         Assistant:"""
+
+# For messages any user could send (see agent.response_cache): the reply may be reused for others
+GENERIC_PROMPT_TEMPLATE = AGENT_INSTRUCTIONS + """
+        Answer in general terms. You know nothing about this user or any earlier conversation.
+
+        User: {input}
+        Assistant:"""
+
+
+GENERAL_CHAT_FALLBACK = "I'm here to help with managing your tasks and hobbies. " + \
+    "You can ask me to:\n" + \
+    "- Create a new task\n" + \
+    "- Add a hobby\n" + \
+    "- Show your tasks\n" + \
+    "- Show your hobbies"
+
+
+# Slots recognised in a single task-creation utterance, e.g.
+# "add gym 1h Mon Wed Fri high priority at 18:00"
+# A bare "to 2" is left alone: it may belong to a duration ("to 2 hours")
+_TIME_SLOT_RE = re.compile(
+    r'\b(?:at|to|@)\s*(\d{1,2})(?=:\d{2}|\s*(?:am|pm)\b)(?::(\d{2}))?\s*(am|pm)?\b', re.IGNORECASE
+)
+_DURATION_RE = re.compile(
+    r'\b(?:for\s+)?(?:(\d{1,2}:\d{2}:\d{2})'
+    r'|(\d+(?:\.\d+)?)\s*(?:h|hrs?|hours?)(?:\s*(?:and\s+)?(\d+)\s*(?:m|mins?|minutes?))?'
+    r'|(\d+)\s*(?:m|mins?|minutes?))\b',
+    re.IGNORECASE
+)
+_PRIORITY_RE = re.compile(r'\b(?:(high|medium|low)(?:\s+priority)?|priority\s+(?:of\s+)?(high|medium|low))\b', re.IGNORECASE)
+_DAY_ALIASES = {
+    'mon': ['Monday'], 'tue': ['Tuesday'], 'tues': ['Tuesday'], 'wed': ['Wednesday'], 'weds': ['Wednesday'],
+    'thu': ['Thursday'], 'thur': ['Thursday'], 'thurs': ['Thursday'], 'fri': ['Friday'], 'sat': ['Saturday'],
+    'sun': ['Sunday'], 'daily': WEEKDAYS, 'everyday': WEEKDAYS, 'weekday': WEEKDAYS[:5], 'weekend': WEEKDAYS[5:],
+    **{day.lower(): [day] for day in WEEKDAYS},
+}
+_DAYS_RE = re.compile(
+    r'\b(?:every\s+day|(?:on\s+|every\s+)?(?:' + '|'.join(sorted(_DAY_ALIASES, key=len, reverse=True)) + r')s?)\b',
+    re.IGNORECASE
+)
+# Resolved against the local date when the message is read
+_RELATIVE_DAY_RE = re.compile(r'\b(?:(?:for|on)\s+)?(today|tonight|tomorrow)\b', re.IGNORECASE)
+_FIXED_RE = re.compile(r'\b(?:(fixed)(?:\s+time)?|(flexible|any\s*time))\b', re.IGNORECASE)
+_CREATE_PREFIX_RE = re.compile(
+    r'^.*?\b(?:create|add|make|new|schedule|set\s+up|log|remind\s+me\s+to)\b'
+    r'(?:\s+(?:a|an|the|new|my))*(?:\s+(?:task|to\s*do|chore))?(?:\s+(?:called|named|for|to))?\b',
+    re.IGNORECASE
+)
+_NAME_FILLER_RE = re.compile(
+    r'^(?:\W|\b(?:and|on|every|with|for|me|please|task|called|named|today|tonight|tomorrow)\b)+'
+    r'|(?:\W|\b(?:and|on|every|with|for|me|please|task|today|tonight|tomorrow'
+    r'|to my (?:tasks|task list|to\s*do list|list))\b)+$',
+    re.IGNORECASE
+)
+
+
+def create_llm():
+    if not settings.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not configured in settings.py")
+
+    return ChatGoogleGenerativeAI(
+        model="models/gemini-1.5-pro-latest",
+        google_api_key=settings.GEMINI_API_KEY,
+        temperature=0.7
     )
-        
-        self.memory = ConversationBufferMemory()
-        self.conversation_chain = ConversationChain(
-            llm=self.agent,
-            memory=self.memory,
-            prompt=self.prompt,
-            verbose=True
+
+
+class AgentComponents:
+    """
+    The user-independent parts of the agent: LLM client, tools, prompt and chain.
+    None of them hold per-user state, so one instance is shared by every request
+    in the process (see get_agent_components).
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.tools = [
+            CreateTaskTool(),
+            CreateHobbyTool(),
+            GetUserTasksTool(),
+            GetUserHobbiesTool(),
+            UpdateTaskTool(),
+            DeleteTaskTool(),
+            UpdateHobbyTool(),
+            DeleteHobbyTool(),
+            GetRoutineTool()
+        ]
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        self.prompt = PromptTemplate(input_variables=["history", "input", "user_context"], template=AGENT_PROMPT_TEMPLATE)
+        # Stateless: the conversation history is passed in on every call
+        self.chain = self.prompt | self.llm | StrOutputParser()
+        self.generic_chain = (
+            PromptTemplate(input_variables=["input"], template=GENERIC_PROMPT_TEMPLATE) | self.llm | StrOutputParser()
         )
-        
+
+
+_components = None
+_components_lock = threading.Lock()
+
+
+def get_agent_components() -> AgentComponents:
+    """The process-wide AgentComponents, built on first use."""
+    global _components
+    if _components is None:
+        with _components_lock:
+            if _components is None:
+                _components = AgentComponents(create_llm())
+    return _components
+
+
+class AgentService:
+    def __init__(self, user_id: int, components: AgentComponents = None, agent_state: AgentState = None):
+        components = components or get_agent_components()
+        self.user_id = user_id
+        # Only the per-user state is loaded per request
+        self.agent_state = agent_state or self._get_agent_state()
+        self.conversation = self.agent_state.conversation
+        self.tools = components.tools
+        self.tools_by_name = components.tools_by_name
+        self.agent = components.llm
+        self.prompt = components.prompt
+        self.conversation_chain = components.chain
+        self.generic_chain = components.generic_chain
+        self.memory = ConversationMemory(self.conversation, components.llm)
+        # What the last message was routed to, logged with the turn
+        self.handled_intent = None
+
+    def _get_agent_state(self) -> AgentState:
+        # One query for the usual case where both rows already exist
+        state = AgentState.objects.select_related('conversation').filter(
+            conversation__user_id=self.user_id,
+            conversation__is_active=True
+        ).first()
+        if state is None:
+            self.conversation = self._get_or_create_conversation()
+            state = self._get_or_create_agent_state()
+        # Slot-filling progress newer than the row lives in the cache
+        return agent_states.load(state)
+
+    @classmethod
+    async def acreate(cls, user_id: int, components: AgentComponents = None) -> 'AgentService':
+        """Build the service from an async context, loading its state with the async ORM."""
+        state = await AgentState.objects.select_related('conversation').filter(
+            conversation__user_id=user_id,
+            conversation__is_active=True
+        ).afirst()
+        if state is None:
+            conversation, created = await Conversation.objects.aget_or_create(user_id=user_id, is_active=True)
+            state, created = await AgentState.objects.select_related('conversation').aget_or_create(
+                conversation=conversation
+            )
+        return cls(user_id, components=components, agent_state=await agent_states.aload(state))
+
     def _get_or_create_conversation(self) -> Conversation:
         conversation, created = Conversation.objects.get_or_create(
             user_id=self.user_id,
@@ -74,29 +221,100 @@ class AgentService:
         )
         return state
         
-    def _create_agent(self):
-        if not settings.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY not configured in settings.py")
-        
-        return ChatGoogleGenerativeAI(
-            model="models/gemini-1.5-pro-latest",
-            google_api_key=settings.GEMINI_API_KEY,
-            temperature=0.7
-        )
-        
     def process_message(self, message: str) -> str:
+        started = time.perf_counter()
+        response = self._respond(message)
+        if response is None:
+            response = self._general_chat(message)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        self.memory.save_turn(message, response, intent=self.handled_intent, latency_ms=latency_ms)
+        return response
+
+    async def aprocess_message(self, message: str) -> str:
+        """
+        Async counterpart of process_message. The LLM call is awaited, so a wait on
+        Gemini holds no worker thread; only the quick local routing and tool ORM
+        work runs in a thread.
+        """
+        started = time.perf_counter()
+        response = await sync_to_async(self._respond)(message)
+        if response is None:
+            response = await self._ageneral_chat(message)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        self.memory.save_turn(message, response, intent=self.handled_intent, latency_ms=latency_ms)
+        return response
+
+    async def stream_message(self, message: str):
+        """
+        Async counterpart of process_message that yields the reply in chunks: LLM
+        tokens as they arrive for general chat, the whole reply at once otherwise.
+        The turn is saved when the stream ends, with whatever was sent if it is
+        cut short.
+        """
+        started = time.perf_counter()
+        # Intent handling and tools are quick ORM work; only the LLM call is streamed
+        response = await sync_to_async(self._respond)(message)
+        parts = []
+        try:
+            if response is None:
+                # A cached general-chat reply is sent whole, with its suggestions
+                cached = await sync_to_async(response_cache.lookup)(message)
+                if cached is not None:
+                    response = cached + self._suggestions_for(cached)
+            if response is not None:
+                parts.append(response)
+                yield response
+                return
+
+            chain, inputs, user_context = await self._achat_call(message)
+            try:
+                async for chunk in chain.astream(inputs):
+                    parts.append(chunk)
+                    yield chunk
+            except Exception:
+                logger.exception("Streaming an agent reply failed for user %s", self.user_id)
+                if parts:
+                    return
+                parts.append(GENERAL_CHAT_FALLBACK)
+                yield GENERAL_CHAT_FALLBACK
+                return
+
+            if chain is self.generic_chain:
+                await sync_to_async(response_cache.store)(message, "".join(parts), user_context)
+            suggestions = self._suggestions_for("".join(parts))
+            if suggestions:
+                parts.append(suggestions)
+                yield suggestions
+        finally:
+            if parts:
+                latency_ms = int((time.perf_counter() - started) * 1000)
+                self.memory.save_turn(message, "".join(parts), intent=self.handled_intent, latency_ms=latency_ms)
+
+    def _respond(self, message: str) -> Optional[str]:
+        """The reply from intents and tools, or None when the LLM should answer."""
         try:
             current_intent = self.agent_state.current_intent
             collected_data = self.agent_state.collected_data.copy()
 
             if current_intent:
+                self.handled_intent = current_intent
                 return self._handle_current_intent(message, current_intent, collected_data)
             return self._handle_new_intent(message)
         except Exception as e:
             self._reset_agent_state()
             return f"Oops! Something went wrong. Let's start over. Error: {str(e)}"
 
-    def _handle_current_intent(self, message: str, intent: str, collected_data: Dict) -> str:
+    def _handle_current_intent(self, message: str, intent: str, collected_data: Dict) -> Optional[str]:
+        if intent in ('delete_task', 'delete_hobby'):
+            return self._confirm_delete(intent, message, collected_data['name'])
+        if self._leaves_flow(message, intent):
+            # A new command or query drops the pending flow, as an unclear answer to a delete does
+            self._reset_agent_state()
+            return self._handle_new_intent(message)
+        if intent == 'update_hobby':
+            self._reset_agent_state()
+            return self.tools_by_name['update_hobby']._run(self.user_id, collected_data['name'], message.strip())
+
         required_fields = self._get_required_fields(intent, collected_data)
         missing_fields = [f for f in required_fields if f not in collected_data]
 
@@ -106,53 +324,174 @@ class AgentService:
         field = missing_fields[0]
         parsed_value = self._parse_field(field, message)
         
-        if parsed_value is None:
-            return self._get_invalid_prompt(field)
-        
-        collected_data[field] = parsed_value
+        if parsed_value is not None:
+            collected_data[field] = parsed_value
+        else:
+            # The answer may cover several fields at once ("1h, Mon Wed, high")
+            extracted = self._extract_task_fields(message, with_name=False) if intent == 'create_task' else {}
+            # Fields already given stay as they are
+            extracted = {key: value for key, value in extracted.items() if key not in collected_data}
+            if not extracted:
+                return self._get_invalid_prompt(field)
+            collected_data.update(extracted)
         self._update_agent_state(collected_data)
 
+        required_fields = self._get_required_fields(intent, collected_data)
         next_missing = [f for f in required_fields if f not in collected_data]
         return self._get_next_prompt(next_missing, intent) if next_missing else self._finalize_creation(intent, collected_data)
 
-    def _handle_new_intent(self, message: str) -> str:
-        if self._is_task_creation_request(message):
-            self._initialize_agent_state('create_task')
-            return "Let's create a new task! What's the name of the task?"
-        if self._is_hobby_creation_request(message):
+    def _leaves_flow(self, message: str, intent: str) -> bool:
+        """Whether ``message``, sent while ``intent`` waits for an answer, is a new command or query instead."""
+        match = classify_intent(message)
+        # A classifier guess of the pending intent is an answer covering several fields ("1h, mon wed, high")
+        return match.intent != GENERAL_CHAT and (match.source == 'pattern' or match.intent != intent)
+
+    def _handle_new_intent(self, message: str) -> Optional[str]:
+        # Structured requests are routed locally; only general chat reaches the LLM
+        intent = classify_intent(message).intent
+        self.handled_intent = intent
+
+        if intent == 'create_task':
+            return self._start_task_creation(message)
+        if intent == 'create_hobby':
             self._initialize_agent_state('create_hobby')
             return "Let's add a new hobby! What's the name of the hobby?"
-        return self._handle_general_conversation(message)
+        if intent == 'list_tasks':
+            return self.tools[2]._run(self.user_id)  # GetUserTasksTool
+        if intent == 'list_hobbies':
+            return self.tools[3]._run(self.user_id)  # GetUserHobbiesTool
+        if intent in ('update_task', 'delete_task'):
+            return self._handle_task_change(intent, message)
+        if intent in ('update_hobby', 'delete_hobby'):
+            return self._handle_hobby_change(intent, message)
+        if intent == 'routine_query':
+            return self.tools_by_name['get_routine']._run(self.user_id, extract_day(message))
+        return None
+
+    def _start_task_creation(self, message: str) -> str:
+        collected_data = self._extract_task_fields(message)
+        # Only ask for what the message didn't already say
+        required_fields = self._get_required_fields('create_task', collected_data)
+        missing_fields = [f for f in required_fields if f not in collected_data]
+        if not missing_fields:
+            return self._finalize_creation('create_task', collected_data)
+
+        self._initialize_agent_state('create_task', collected_data)
+        if 'task_name' in missing_fields:
+            return "Let's create a new task! What's the name of the task?"
+        return f"Got it: {collected_data['task_name']}. " + self._get_next_prompt(missing_fields, 'create_task')
+
+    def _handle_task_change(self, intent: str, message: str) -> str:
+        names = [task['task_name'] for task in get_user_context(self.user_id)['tasks']]
+        task_name = find_name(message, names)
+        if task_name is None:
+            # "remove chess" with no task of that name is about the hobby
+            hobbies = [hobby['name'] for hobby in get_user_context(self.user_id)['hobbies']]
+            if intent == 'delete_task' and find_name(message, hobbies):
+                return self._handle_hobby_change('delete_hobby', message)
+            return "Which task do you mean? Your tasks are:\n" + self.tools[2]._run(self.user_id)
+
+        if intent == 'delete_task':
+            return self._ask_delete(intent, task_name)
+        changes = self._parse_task_changes(message, task_name)
+        if not changes:
+            return f"What should I change about '{task_name}'? You can set its priority, days, time or name."
+        return self.tools_by_name['update_task']._run(self.user_id, task_name, changes)
+
+    def _parse_task_changes(self, message: str, task_name: str) -> Dict:
+        renamed = re.search(r'\brename\b.*?\bto\s+(.+?)[.!]*$', message, re.IGNORECASE)
+        if renamed:
+            return {'task_name': renamed.group(1).strip()}
+        without_name = re.sub(re.escape(task_name), ' ', message, flags=re.IGNORECASE)
+        return self._extract_task_fields(without_name, with_name=False)
+
+    def _handle_hobby_change(self, intent: str, message: str) -> str:
+        names = [hobby['name'] for hobby in get_user_context(self.user_id)['hobbies']]
+        hobby_name = find_name(message, names)
+        if hobby_name is None:
+            return "Which hobby do you mean? Your hobbies are:\n" + self.tools[3]._run(self.user_id)
+
+        if intent == 'delete_hobby':
+            return self._ask_delete(intent, hobby_name)
+        # The category follows the hobby ("move chess to games"); an earlier "to" is part of the request
+        named = re.search(rf'\b{re.escape(hobby_name)}\b', message, re.IGNORECASE)
+        category = re.search(
+            r'\b(?:to|as|into)\s+(?:the\s+)?(.+?)(?:\s+category)?[.!?]*$', message[named.end():] if named else '',
+            re.IGNORECASE
+        )
+        if not category:
+            self._initialize_agent_state('update_hobby', {'name': hobby_name})
+            return f"Which category should '{hobby_name}' be in?"
+        return self.tools_by_name['update_hobby']._run(self.user_id, hobby_name, category.group(1).strip())
+
+    def _ask_delete(self, intent: str, name: str) -> str:
+        # Nothing is deleted until the next message confirms it
+        self._initialize_agent_state(intent, {'name': name})
+        return f"Delete '{name}'? (yes/no)"
+
+    def _confirm_delete(self, intent: str, message: str, name: str) -> Optional[str]:
+        words = normalize(message).split()
+        answer = self._parse_boolean(words[0]) if words else None
+        self._reset_agent_state()
+        if answer is None:
+            # Anything but yes or no drops the pending delete and is handled as a new message
+            return self._handle_new_intent(message)
+        if not answer:
+            return f"OK, '{name}' stays."
+        return self.tools_by_name[intent]._run(self.user_id, name)
 
-    def _handle_general_conversation(self, message: str) -> str:
+    def _general_chat(self, message: str) -> str:
         try:
-            # Check for task/hobby list requests
-            if any(keyword in message.lower() for keyword in ['show tasks', 'list tasks', 'my tasks']):
-                return self.tools[2]._run(self.user_id)  # GetUserTasksTool
-            
-            if any(keyword in message.lower() for keyword in ['show hobbies', 'list hobbies', 'my hobbies']):
-                return self.tools[3]._run(self.user_id)  # GetUserHobbiesTool
-
-            # Use conversation chain for general chat
-            response = self.conversation_chain.predict(input=message)
-            
-            # Add default suggestions if the conversation is not productive
-            if not any(keyword in response.lower() for keyword in ['task', 'hobby', 'schedule']):
-                response += "\n\nI can help you with:\n" + \
-                        "- Creating new tasks ('add task')\n" + \
-                        "- Adding hobbies ('add hobby')\n" + \
-                        "- Viewing your tasks ('show tasks')\n" + \
-                        "- Viewing your hobbies ('show hobbies')"
-            
-            return response
+            response = response_cache.lookup(message)
+            if response is None:
+                user_context = get_user_context(self.user_id)
+                if response_cache.cacheable(message, user_context):
+                    response = self.generic_chain.invoke({"input": message})
+                    response_cache.store(message, response, user_context)
+                else:
+                    response = self.conversation_chain.invoke(
+                        self._chat_inputs(message, self.memory.load(), user_context)
+                    )
+            return response + self._suggestions_for(response)
+        except Exception as e:
+            return GENERAL_CHAT_FALLBACK
 
+    async def _ageneral_chat(self, message: str) -> str:
+        try:
+            response = await sync_to_async(response_cache.lookup)(message)
+            if response is None:
+                chain, inputs, user_context = await self._achat_call(message)
+                response = await chain.ainvoke(inputs)
+                if chain is self.generic_chain:
+                    await sync_to_async(response_cache.store)(message, response, user_context)
+            return response + self._suggestions_for(response)
         except Exception as e:
-            return "I'm here to help with managing your tasks and hobbies. " + \
-                "You can ask me to:\n" + \
-                "- Create a new task\n" + \
-                "- Add a hobby\n" + \
-                "- Show your tasks\n" + \
-                "- Show your hobbies"
+            return GENERAL_CHAT_FALLBACK
+
+    async def _achat_call(self, message: str):
+        """
+        The chain and inputs for an LLM reply to ``message``, and the user context:
+        messages any user could send are answered without history or user data,
+        so the reply can be cached; everything else gets the full prompt.
+        """
+        user_context = await aget_user_context(self.user_id)
+        if response_cache.cacheable(message, user_context):
+            return self.generic_chain, {"input": message}, user_context
+        history = await sync_to_async(self.memory.load)()
+        return self.conversation_chain, self._chat_inputs(message, history, user_context), user_context
+
+    def _chat_inputs(self, message: str, history: str, user_context: Dict) -> Dict:
+        return {"history": history, "input": message, "user_context": format_user_context(user_context)}
+
+    def _suggestions_for(self, response: str) -> str:
+        # Add default suggestions if the conversation is not productive
+        if not any(keyword in response.lower() for keyword in ['task', 'hobby', 'schedule']):
+            return "\n\nI can help you with:\n" + \
+                    "- Creating new tasks ('add task')\n" + \
+                    "- Adding hobbies ('add hobby')\n" + \
+                    "- Viewing your tasks ('show tasks')\n" + \
+                    "- Viewing your hobbies ('show hobbies')"
+        return ""
 
     def _get_required_fields(self, intent: str, data: Dict) -> list:
         fields = {
@@ -211,6 +550,79 @@ class AgentService:
         except (ValueError, ValidationError):
             return None
 
+    def _extract_task_fields(self, message: str, with_name: bool = True) -> Dict:
+        """
+        Every task field that can be read from one utterance, validated by the
+        same _parse_* methods as the one-field-per-turn prompts.
+        """
+        fields = {}
+        # Each recognised slot is cut out so the leftover text can become the name
+        text = _CREATE_PREFIX_RE.sub('', message, count=1) if with_name else message
+
+        def take(pattern, accept=None):
+            nonlocal text
+            for match in pattern.finditer(text):
+                if accept is None or accept(match):
+                    text = text[:match.start()] + ' | ' + text[match.end():]
+                    return match
+            return None
+
+        time_slot = take(_TIME_SLOT_RE)
+        if time_slot:
+            hour, minute, meridiem = int(time_slot.group(1)), int(time_slot.group(2) or 0), time_slot.group(3)
+            if meridiem:
+                hour = hour % 12 + (12 if meridiem.lower() == 'pm' else 0)
+            parsed = self._parse_time(f"{hour:02d}:{minute:02d}:00") if hour < 24 and minute < 60 else None
+            if parsed:
+                fields['fixed_time_slot'] = parsed
+                fields['is_fixed_time'] = True
+
+        duration = take(_DURATION_RE)
+        if duration:
+            clock, hours, extra_minutes, minutes = duration.groups()
+            if clock:
+                parsed = self._parse_duration(clock)
+            else:
+                total = round(float(hours) * 60) + int(extra_minutes or 0) if hours else int(minutes)
+                parsed = self._parse_duration(f"{total // 60:02d}:{total % 60:02d}:00") if total else None
+            if parsed:
+                fields['time_required'] = parsed
+
+        # A bare "high" before any name word is part of the name ("add high jump practice")
+        priority = take(_PRIORITY_RE, lambda match: (
+            not with_name or 'priority' in match.group(0).lower() or re.search(r'\w', text[:match.start()])
+        ))
+        if priority:
+            fields['priority'] = self._parse_priority(priority.group(1) or priority.group(2))
+
+        days = []
+        while True:
+            day = take(_DAYS_RE)
+            if not day:
+                break
+            alias = re.sub(r'^(?:on|every)\s+|s$', '', day.group(0).lower())
+            # The only match that isn't an alias is "every day"
+            days += _DAY_ALIASES.get(alias, WEEKDAYS)
+        relative = take(_RELATIVE_DAY_RE)
+        if relative:
+            offset = 1 if relative.group(1).lower() == 'tomorrow' else 0
+            days.append(WEEKDAYS[(timezone.localdate() + timedelta(days=offset)).weekday()])
+        if days:
+            parsed = self._parse_days(', '.join(dict.fromkeys(days)))
+            if parsed:
+                fields['days_associated'] = sorted(parsed, key=WEEKDAYS.index)
+
+        fixed = take(_FIXED_RE)
+        if fixed and 'is_fixed_time' not in fields:
+            fields['is_fixed_time'] = bool(fixed.group(1))
+
+        if with_name:
+            # The first stretch of words left between the slots
+            name = next(filter(None, (_NAME_FILLER_RE.sub('', part.strip()) for part in text.split('|'))), '')
+            if name:
+                fields['task_name'] = name
+        return fields
+
     def _get_invalid_prompt(self, field: str) -> str:
         prompts = {
             'task_name': "Please enter a valid task name.",
@@ -259,36 +671,18 @@ class AgentService:
             self._reset_agent_state()
             return f"Unexpected error: {str(e)}"
 
-    def _initialize_agent_state(self, intent: str):
+    def _initialize_agent_state(self, intent: str, collected_data: Dict = None):
         self.agent_state.current_intent = intent
-        self.agent_state.collected_data = {}
-        self.agent_state.save()
+        self.agent_state.collected_data = collected_data or {}
+        agent_states.save(self.agent_state)
 
     def _update_agent_state(self, data: Dict):
         self.agent_state.collected_data = data
-        self.agent_state.save()
+        agent_states.save(self.agent_state)
 
     def _reset_agent_state(self):
+        if self.agent_state.current_intent is None and not self.agent_state.collected_data:
+            return
         self.agent_state.current_intent = None
         self.agent_state.collected_data = {}
-        self.agent_state.save()
-
-    def _is_task_creation_request(self, message: str) -> bool:
-    # ...existing code...
-        creation_phrases = [
-            'create task',
-            'add task', 
-            'new task',
-            'make task'
-        ]
-        return any(phrase in message.lower() for phrase in creation_phrases)
-
-    def _is_hobby_creation_request(self, message: str) -> bool:
-        # ...existing code...
-        creation_phrases = [
-            'create hobby',
-            'add hobby',
-            'new hobby',
-            'make hobby'
-        ]
-        return any(phrase in message.lower() for phrase in creation_phrases)
\ No newline at end of file
+        agent_states.save(self.agent_state)
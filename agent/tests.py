@@ -1,3 +1,306 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from langchain_core.language_models import FakeListChatModel
+
+from core.models import Hobby, Task, User, UserHobby
+
+from .buffers import AgentStateBuffer
+from .context import get_user_context
+from .intent_data import TRAINING_UTTERANCES
+from .intents import GENERAL_CHAT, WEEKDAYS, classify_intent
+from .models import AgentState, CachedResponse, Conversation
+from .response_cache import ResponseCache
+from .services import AgentComponents, AgentService
+
+
+class AgentTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent', email='agent@example.com', password='x')
+        self.components = AgentComponents(FakeListChatModel(responses=['LLM reply']))
+
+    def respond(self, message):
+        # A new service per message, as per request; _respond skips the buffered turn log
+        return AgentService(self.user.id, components=self.components)._respond(message)
+
+
+class IntentRoutingTests(TestCase):
+    def test_negations_and_questions_are_not_commands(self):
+        for message in [
+            "don't delete my gym task",
+            "I never want to remove my reading hobby",
+            "should I cancel tasks when I am sick?",
+            "how do I add a hobby",
+            "how do I add a task?",
+            "Any tips to make my tasks more fun?",
+            "I feel overwhelmed by my routine",
+            "can you help me make my schedule less stressful?",
+            "what are good tasks for a productive morning",
+        ]:
+            with self.subTest(message=message):
+                self.assertEqual(classify_intent(message).intent, GENERAL_CHAT)
+
+    def test_seed_utterances_route_to_their_label(self):
+        for message, intent in TRAINING_UTTERANCES:
+            with self.subTest(message=message):
+                self.assertEqual(classify_intent(message).intent, intent)
+
+    def test_commands_still_route(self):
+        for message, intent in [
+            ("delete my gym task", 'delete_task'),
+            ("remove painting from my hobbies", 'delete_hobby'),
+            ("add a task", 'create_task'),
+            ("add laundry", 'create_task'),
+            ("delete gym", 'delete_task'),
+            ("show my tasks", 'list_tasks'),
+            ("what should i do today", 'routine_query'),
+        ]:
+            with self.subTest(message=message):
+                self.assertEqual(classify_intent(message).intent, intent)
+
+
+class TaskAndHobbyChangeTests(AgentTestCase):
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(
+            user=self.user, task_name='gym', time_required=timedelta(hours=1),
+            days_associated=['Monday'], priority='Low'
+        )
+        UserHobby.objects.create(user=self.user, hobby=Hobby.objects.create(name='chess', category='Games'))
+
+    def test_negated_delete_keeps_the_task(self):
+        self.respond("don't delete my gym task")
+        self.assertTrue(Task.objects.filter(user=self.user, task_name='gym').exists())
+
+    def test_delete_asks_for_confirmation(self):
+        self.assertEqual(self.respond("delete my gym task"), "Delete 'gym'? (yes/no)")
+        self.assertTrue(Task.objects.filter(task_name='gym').exists())
+        self.respond("yes")
+        self.assertFalse(Task.objects.filter(task_name='gym').exists())
+
+    def test_declined_delete_keeps_the_hobby(self):
+        self.assertEqual(self.respond("delete my chess hobby"), "Delete 'chess'? (yes/no)")
+        self.assertEqual(self.respond("no"), "OK, 'chess' stays.")
+        self.assertTrue(UserHobby.objects.filter(user=self.user, hobby__name='chess').exists())
+
+    def test_hobby_category_comes_after_the_name(self):
+        hobby_count = Hobby.objects.count()
+        self.assertEqual(self.respond("I want to update my chess hobby"), "Which category should 'chess' be in?")
+        self.assertEqual(Hobby.objects.count(), hobby_count)
+        self.respond("Strategy")
+        self.assertEqual(UserHobby.objects.get(user=self.user).hobby.category, 'Strategy')
+
+    def test_command_instead_of_a_category(self):
+        self.respond("I want to update my chess hobby")
+        self.respond("move gym to friday")
+        self.assertEqual(UserHobby.objects.get(user=self.user).hobby.category, 'Games')
+        self.assertEqual(Task.objects.get(task_name='gym').days_associated, ['Friday'])
+
+    def test_bare_delete_names_a_task_or_hobby(self):
+        self.assertEqual(self.respond("delete gym"), "Delete 'gym'? (yes/no)")
+        self.respond("no")
+        self.assertEqual(self.respond("remove chess"), "Delete 'chess'? (yes/no)")
+
+    def test_hobby_category_in_one_message(self):
+        self.respond("change chess category to strategy")
+        self.assertEqual(UserHobby.objects.get(user=self.user).hobby.category, 'strategy')
+
+
+class AgentStateBufferTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='state', email='state@example.com', password='x')
+        self.state = AgentState.objects.create(conversation=Conversation.objects.create(user=user))
+        self.buffer = AgentStateBuffer(flush_interval=60)
+        self.addCleanup(cache.clear)
+        self.addCleanup(self.buffer.flush)
+
+    def fresh(self):
+        return AgentState.objects.get(pk=self.state.pk)
+
+    def test_per_process_cache_writes_through(self):
+        self.state.current_intent = 'create_task'
+        self.buffer.save(self.state)
+        self.assertEqual(self.fresh().current_intent, 'create_task')
+        self.assertEqual(self.fresh().version, 1)
+
+    def test_shared_cache_defers_progress_but_not_reset(self):
+        with mock.patch('agent.buffers._cache_is_shared', return_value=True):
+            self.state.current_intent = 'create_task'
+            self.buffer.save(self.state)
+            self.assertIsNone(self.fresh().current_intent)
+            self.assertEqual(self.buffer.load(self.fresh()).current_intent, 'create_task')
+
+            self.state.current_intent = None
+            self.buffer.save(self.state)
+            self.assertEqual((self.fresh().current_intent, self.fresh().version), (None, 2))
+
+    def test_stale_cached_copy_loses_to_newer_row(self):
+        with mock.patch('agent.buffers._cache_is_shared', return_value=True):
+            self.state.current_intent = 'create_task'
+            self.buffer.save(self.state)
+            # Another worker finished the flow and wrote the row meanwhile
+            AgentState.objects.filter(pk=self.state.pk).update(current_intent=None, version=5)
+            self.assertIsNone(self.buffer.load(self.fresh()).current_intent)
+            # ...and a late flush of the old progress doesn't bring it back
+            self.buffer.flush()
+            self.assertEqual((self.fresh().current_intent, self.fresh().version), (None, 5))
+
+
+class UserContextCacheTests(TransactionTestCase):
+    # Outside a transaction, since the context isn't cached inside one
+    def setUp(self):
+        self.user = User.objects.create_user(username='context', email='context@example.com', password='x')
+        Task.objects.create(user=self.user, task_name='gym', time_required=timedelta(hours=1), priority='Low')
+        self.addCleanup(cache.clear)
+
+    def rename_elsewhere(self):
+        # As another worker would: no eviction reaches this process's cache
+        Task.objects.filter(user=self.user).update(task_name='swim')
+
+    def task_names(self):
+        return [task['task_name'] for task in get_user_context(self.user.id)['tasks']]
+
+    def test_per_process_cache_is_not_used(self):
+        self.assertEqual(self.task_names(), ['gym'])
+        self.rename_elsewhere()
+        self.assertEqual(self.task_names(), ['swim'])
+
+    def test_shared_cache_is_used(self):
+        with mock.patch('agent.context._cache_is_shared', return_value=True):
+            self.assertEqual(self.task_names(), ['gym'])
+            self.rename_elsewhere()
+            self.assertEqual(self.task_names(), ['gym'])
+
+
+class TaskFieldExtractionTests(AgentTestCase):
+    def extract(self, message):
+        return AgentService(self.user.id, components=self.components)._extract_task_fields(message)
+
+    def test_priority_word_at_the_start_of_a_name(self):
+        self.assertEqual(self.extract("add high jump practice"), {'task_name': 'high jump practice'})
+        self.assertEqual(
+            self.extract("add high priority homework 2h"),
+            {'task_name': 'homework', 'priority': 'High', 'time_required': '02:00:00'}
+        )
+        self.assertEqual(self.extract("add reading low")['priority'], 'Low')
+
+    def test_leading_to_and_for_are_not_part_of_the_name(self):
+        self.assertEqual(self.extract("add a task to study 2h"), {'task_name': 'study', 'time_required': '02:00:00'})
+        self.assertEqual(self.extract("please add a to do for groceries"), {'task_name': 'groceries'})
+
+    def test_today_and_tomorrow_are_days(self):
+        today = timezone.localdate()
+        self.assertEqual(
+            self.extract("add call dad tomorrow 10 min"),
+            {'task_name': 'call dad', 'time_required': '00:10:00',
+             'days_associated': [WEEKDAYS[(today + timedelta(days=1)).weekday()]]}
+        )
+        self.assertEqual(self.extract("add a new task for today"), {'days_associated': [WEEKDAYS[today.weekday()]]})
+
+
+class PendingTaskCreationTests(AgentTestCase):
+    def test_answer_keeps_fields_already_given(self):
+        self.assertEqual(self.respond("add laundry 30 min high flexible"), "Got it: laundry. Which days (comma-separated)?")
+        self.respond("saturday 2h low")
+        task = Task.objects.get(user=self.user)
+        self.assertEqual(
+            (task.task_name, task.time_required, task.priority, task.days_associated),
+            ('laundry', timedelta(minutes=30), 'High', ['Saturday'])
+        )
+
+    def test_new_task_replaces_the_pending_one(self):
+        self.respond("add laundry 30 min high flexible")
+        self.respond("add water plants 10 min daily low flexible")
+        task = Task.objects.get(user=self.user)
+        self.assertEqual((task.task_name, task.time_required, task.priority), ('water plants', timedelta(minutes=10), 'Low'))
+
+        self.respond("add call dad 10 min high flexible")
+        self.respond("add meeting to 3 pm tuesday 1h high")
+        self.assertFalse(Task.objects.filter(task_name='call dad').exists())
+        meeting = Task.objects.get(task_name='meeting')
+        self.assertEqual((meeting.days_associated, meeting.is_fixed_time), (['Tuesday'], True))
+
+    def test_queries_leave_the_pending_task(self):
+        self.respond("add gym 1h high flexible")
+        self.assertEqual(self.respond("show my tasks"), self.components.tools[2]._run(self.user.id))
+        self.assertIsNone(AgentState.objects.get(conversation__user=self.user).current_intent)
+        self.respond("add gym 1h high flexible")
+        self.respond("whats on monday")
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+
+
+NO_CONTEXT = {'tasks': [], 'hobbies': [], 'routine': None, 'settings': None}
+
+
+sent_prompts = []
+
+
+class RecordingChatModel(FakeListChatModel):
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        sent_prompts.append(messages[0].content)
+        return super()._call(messages, stop, run_manager, **kwargs)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.responses = ResponseCache(min_misses=1)
+
+    def cached(self, message, response):
+        CachedResponse.objects.create(
+            normalized_message=message, response=response, expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def test_opposite_questions_dont_match(self):
+        self.cached("is it good to exercise in the morning", "good")
+        self.cached("i am feeling stressed", "stressed")
+        self.assertIsNone(self.responses.lookup("is it bad to exercise in the morning"))
+        self.assertIsNone(self.responses.lookup("I am not feeling stressed"))
+        self.assertEqual(self.responses.lookup("Is it good to exercise in the morning?"), "good")
+
+    def test_paraphrase_matches(self):
+        self.cached("how do i add a hobby", "like this")
+        self.assertEqual(self.responses.lookup("how do I add hobbies?"), "like this")
+        self.assertIsNone(self.responses.lookup("how do I delete a hobby"))
+
+    def test_personal_reply_is_not_stored(self):
+        self.responses.store("hi there", "Hi Priya! Good to see you again, how did the exam go?", NO_CONTEXT)
+        self.responses.store("what can you do", "Your gym task is on Monday.", NO_CONTEXT)
+        self.assertFalse(CachedResponse.objects.exists())
+
+    def test_stored_after_repeated_misses(self):
+        responses = ResponseCache(min_misses=2)
+        responses.store("what can you do", "I manage tasks and hobbies.", NO_CONTEXT)
+        self.assertFalse(CachedResponse.objects.exists())
+        responses.store("What can you do?", "I manage tasks and hobbies.", NO_CONTEXT)
+        self.assertEqual(CachedResponse.objects.count(), 1)
+
+    def test_least_used_entries_are_evicted(self):
+        responses = ResponseCache(min_misses=1, max_entries=2)
+        responses.store("what can you do", "I manage tasks and hobbies.", NO_CONTEXT)
+        responses.lookup("what can you do")
+        responses.store("recommend a book", "Atomic Habits.", NO_CONTEXT)
+        responses.store("recommend a podcast", "A productivity podcast.", NO_CONTEXT)
+        self.assertEqual(
+            set(CachedResponse.objects.values_list('normalized_message', flat=True)),
+            {"what can you do", "recommend a podcast"}
+        )
+
+
+class GeneralChatPromptTests(AgentTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        sent_prompts.clear()
+        self.components = AgentComponents(RecordingChatModel(responses=['LLM reply']))
+
+    def test_cacheable_messages_get_no_history_or_user_data(self):
+        service = AgentService(self.user.id, components=self.components)
+        service._general_chat("what can you do")
+        service._general_chat("any tips for my mornings")
+        generic, personal = sent_prompts
+        self.assertNotIn("Current conversation state", generic)
+        self.assertIn("Current conversation state", personal)
@@ -1,6 +1,7 @@
 from typing import Optional, Dict, Any, Type
 from langchain.tools import BaseTool
 from core.models import Task, Hobby, UserHobby
+from .context import get_user_context, invalidate_user_context, routine_for_day
 from django.contrib.auth import get_user_model
 from pydantic import BaseModel, Field
 from django.utils.dateparse import parse_duration, parse_time
@@ -17,6 +18,24 @@ class HobbyInput(BaseModel):
 class UserIdInput(BaseModel):
     user_id: int = Field(description="The ID of the user")
 
+class TaskUpdateInput(BaseModel):
+    user_id: int = Field(description="The ID of the user who owns the task")
+    task_name: str = Field(description="The name of the task to change")
+    changes: Dict[str, Any] = Field(description="New values for task_name, time_required, days_associated, priority or fixed_time_slot")
+
+class NamedItemInput(BaseModel):
+    user_id: int = Field(description="The ID of the user")
+    name: str = Field(description="The name of the task or hobby")
+
+class HobbyUpdateInput(BaseModel):
+    user_id: int = Field(description="The ID of the user who has the hobby")
+    name: str = Field(description="The name of the hobby to change")
+    category: str = Field(description="The hobby's new category")
+
+class RoutineDayInput(BaseModel):
+    user_id: int = Field(description="The ID of the user")
+    day: str = Field(description="The weekday, e.g. Monday")
+
 class CreateTaskTool(BaseTool):
     name: str = "create_task"
     description: str = "Create a new task for the user"
@@ -79,10 +98,10 @@ class GetUserTasksTool(BaseTool):
     
     def _run(self, user_id: int) -> str:
         try:
-            tasks = Task.objects.filter(user_id=user_id)
-            if not tasks.exists():
+            tasks = get_user_context(user_id)['tasks']
+            if not tasks:
                 return "You don't have any tasks yet."
-            return "\n".join([f"- {task.task_name} (Priority: {task.priority})" for task in tasks])
+            return "\n".join([f"- {task['task_name']} (Priority: {task['priority']})" for task in tasks])
         except Exception as e:
             return f"Error fetching tasks: {str(e)}"
 
@@ -93,9 +112,98 @@ class GetUserHobbiesTool(BaseTool):
     
     def _run(self, user_id: int) -> str:
         try:
-            user_hobbies = UserHobby.objects.filter(user_id=user_id).select_related('hobby')
-            if not user_hobbies.exists():
+            hobbies = get_user_context(user_id)['hobbies']
+            if not hobbies:
                 return "You don't have any hobbies yet."
-            return "\n".join([f"- {user_hobby.hobby.name} ({user_hobby.hobby.category})" for user_hobby in user_hobbies])
+            return "\n".join([f"- {hobby['name']} ({hobby['category']})" for hobby in hobbies])
+        except Exception as e:
+            return f"Error fetching hobbies: {str(e)}" 
+
+class UpdateTaskTool(BaseTool):
+    name: str = "update_task"
+    description: str = "Change the name, duration, days, priority or fixed time of one of the user's tasks"
+    args_schema: Type[BaseModel] = TaskUpdateInput
+
+    def _run(self, user_id: int, task_name: str, changes: Dict[str, Any]) -> str:
+        try:
+            fields = dict(changes)
+            if 'time_required' in fields:
+                fields['time_required'] = parse_duration(fields['time_required'])
+            if 'fixed_time_slot' in fields:
+                fields['fixed_time_slot'] = parse_time(fields['fixed_time_slot'])
+                fields['is_fixed_time'] = True
+            elif fields.get('is_fixed_time') is False:
+                fields['fixed_time_slot'] = None
+
+            updated = Task.objects.filter(user_id=user_id, task_name__iexact=task_name).update(**fields)
+            invalidate_user_context(user_id)
+            if not updated:
+                return f"You don't have a task called '{task_name}'."
+            return f"Task '{fields.get('task_name', task_name)}' updated!"
+        except Exception as e:
+            return f"Error updating task: {str(e)}"
+
+class DeleteTaskTool(BaseTool):
+    name: str = "delete_task"
+    description: str = "Delete one of the user's tasks by name"
+    args_schema: Type[BaseModel] = NamedItemInput
+
+    def _run(self, user_id: int, name: str) -> str:
+        try:
+            deleted, _ = Task.objects.filter(user_id=user_id, task_name__iexact=name).delete()
+            if not deleted:
+                return f"You don't have a task called '{name}'."
+            return f"Task '{name}' deleted."
+        except Exception as e:
+            return f"Error deleting task: {str(e)}"
+
+class UpdateHobbyTool(BaseTool):
+    name: str = "update_hobby"
+    description: str = "Move one of the user's hobbies to another category"
+    args_schema: Type[BaseModel] = HobbyUpdateInput
+
+    def _run(self, user_id: int, name: str, category: str) -> str:
+        try:
+            # Hobbies are shared between users, so point this user at the recategorized one
+            hobby, created = Hobby.objects.get_or_create(name=name, category=category)
+            updated = UserHobby.objects.filter(user_id=user_id, hobby__name__iexact=name).update(hobby=hobby)
+            invalidate_user_context(user_id)
+            if not updated:
+                return f"You don't have '{name}' in your hobbies."
+            return f"Hobby '{name}' is now in '{category}'."
+        except Exception as e:
+            return f"Error updating hobby: {str(e)}"
+
+class DeleteHobbyTool(BaseTool):
+    name: str = "delete_hobby"
+    description: str = "Remove a hobby from the user's profile"
+    args_schema: Type[BaseModel] = NamedItemInput
+
+    def _run(self, user_id: int, name: str) -> str:
+        try:
+            deleted, _ = UserHobby.objects.filter(user_id=user_id, hobby__name__iexact=name).delete()
+            if not deleted:
+                return f"You don't have '{name}' in your hobbies."
+            return f"Hobby '{name}' removed from your profile."
+        except Exception as e:
+            return f"Error removing hobby: {str(e)}"
+
+class GetRoutineTool(BaseTool):
+    name: str = "get_routine"
+    description: str = "Get the activities in the user's primary routine for one weekday"
+    args_schema: Type[BaseModel] = RoutineDayInput
+
+    def _run(self, user_id: int, day: str) -> str:
+        try:
+            context = get_user_context(user_id)
+            if context['routine'] is None:
+                return "You don't have a routine yet."
+            activities = routine_for_day(context, day)
+            if not activities:
+                return f"Nothing is planned for {day}."
+            return f"{day}:\n" + "\n".join([
+                f"- {activity['start_time']}-{activity['end_time']} {activity['activity']} ({activity['type']})"
+                for activity in activities
+            ])
         except Exception as e:
-            return f"Error fetching hobbies: {str(e)}" 
\ No newline at end of file
+            return f"Error fetching routine: {str(e)}"
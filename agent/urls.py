@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import ChatView
+from .views import AsyncChatView, ChatSearchView, ChatView
 
 urlpatterns = [
     path('chat/', ChatView.as_view(), name='chat'),
+    path('chat/async/', AsyncChatView.as_view(), name='chat-async'),
+    path('chat/search/', ChatSearchView.as_view(), name='chat-search'),
 ] 
\ No newline at end of file
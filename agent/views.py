@@ -1,59 +1,70 @@
+import json
+import logging
+
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from core.authentication import CachedJWTAuthentication
+from core.middleware import get_scope_user
 from .services import AgentService
 from .models import Conversation, Message
 from rest_framework import serializers
+from core.search import parse_search_params, search
+from chat.pagination import InvalidCursor, parse_page_size
+
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 
 class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
-        fields = ['content', 'is_user', 'created_at']
+        fields = ['id', 'content', 'is_user', 'created_at']
 
 class ChatView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        print("=== ChatView POST Request ===")
-        print("Request headers:", request.headers)
-        print("Request data:", request.data)
-        print("User:", request.user)
-        
         user_message = request.data.get('message')
         if not user_message:
-            print("Error: No message provided")
             return Response(
                 {"error": "Message is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
             
         try:
-            print("Creating AgentService for user:", request.user.id)
             agent_service = AgentService(request.user.id)
-            print("Processing message with agent service")
             response = agent_service.process_message(user_message)
-            print("Agent response:", response)
             return Response({"response": response})
         except Exception as e:
-            print("Error in ChatView:", str(e))
-            import traceback
-            print("Traceback:", traceback.format_exc())
+            logger.exception("Agent chat failed for user %s", request.user.id)
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
             
     def get(self, request):
-        print("=== ChatView GET Request ===")
-        print("Request headers:", request.headers)
-        print("User:", request.user)
-        
+        """
+        A page of the active conversation, oldest first. ``before`` is the id of the
+        oldest message already shown; the response's ``before`` fetches the next page.
+        """
+        try:
+            limit = parse_page_size(request.query_params.get('limit'))
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except ValueError:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             conversation = Conversation.objects.filter(
                 user=request.user,
@@ -61,20 +72,89 @@ class ChatView(APIView):
             ).first()
             
             if not conversation:
-                print("No active conversation found for user")
-                return Response({"messages": []})
-                
-            messages = Message.objects.filter(
-                conversation=conversation
-            ).order_by('created_at')
-            
-            serializer = MessageSerializer(messages, many=True)
-            return Response({"messages": serializer.data})
+                return Response({"messages": [], "before": None, "has_more": False})
+
+            # Ids grow with every turn, so they double as the cursor
+            messages = Message.objects.filter(conversation=conversation)
+            if before is not None:
+                messages = messages.filter(id__lt=before)
+            page = list(messages.order_by('-id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+            page.reverse()
+
+            serializer = MessageSerializer(page, many=True)
+            return Response({
+                "messages": serializer.data,
+                "before": page[0].id if has_more else None,
+                "has_more": has_more,
+            })
         except Exception as e:
-            print("Error in ChatView GET:", str(e))
-            import traceback
-            print("Traceback:", traceback.format_exc())
+            logger.exception("Loading agent chat history failed for user %s", request.user.id)
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncChatView(View):
+    """
+    ChatView.post for ASGI workers. DRF views are sync, so this is a plain async
+    Django view: while the LLM is awaited the worker's event loop keeps serving
+    other requests instead of parking a thread per conversation.
+    """
+
+    async def post(self, request):
+        # Same Bearer token checks as CachedJWTAuthentication, resolved through the user cache
+        parts = request.headers.get('Authorization', '').split()
+        raw_token = parts[1] if len(parts) == 2 and parts[0].lower() == 'bearer' else None
+        user = await get_scope_user(raw_token)
+        if not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided or are invalid."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            user_message = json.loads(request.body or b'{}').get('message')
+        except (ValueError, AttributeError):
+            user_message = None
+        if not user_message:
+            return JsonResponse({"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            agent_service = await AgentService.acreate(user.id)
+            response = await agent_service.aprocess_message(user_message)
+            return JsonResponse({"response": response})
+        except Exception as e:
+            logger.exception("Agent chat failed for user %s", user.id)
+            return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ChatSearchView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Ranked full-text search over all of the user's agent conversations."""
+        try:
+            query, page, limit = parse_search_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits, has_more = search(
+            Message.objects.filter(conversation__user=request.user),
+            'content', query, page=page, limit=limit
+        )
+        results = MessageSerializer(hits, many=True).data
+        for result, hit in zip(results, hits):
+            result['conversation'] = hit.conversation_id
+            result['rank'] = hit.rank
+            result['headline'] = hit.headline
+
+        return Response({
+            "results": results,
+            "page": page,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
@@ -18,6 +18,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) to let the front server send media files
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -33,6 +37,29 @@ ALLOWED_HOSTS = ['127.0.0.1', 'localhost', '172.16.81.99', '192.168.0.105', '10.
 
 GOOGLE_API_KEY= "your-google-api-key"
 
+# Agent chat history sent to the LLM: newest turns plus a rolling summary, in tiktoken tokens
+AGENT_MEMORY_TOKEN_BUDGET = 1500
+AGENT_MEMORY_SUMMARY_TOKENS = 300
+# Agent turns are written in batches of this size, or after this many seconds
+AGENT_LOG_BUFFER_SIZE = 50
+AGENT_LOG_FLUSH_INTERVAL = 0.5
+# Locally classified agent intents below this confidence are left to the LLM
+AGENT_INTENT_MIN_CONFIDENCE = 0.7
+# Seconds a user's tasks/hobbies/routine/settings stay cached for the agent (evicted on writes).
+# Only used with a cache shared by all workers (e.g. Redis in CACHES); 0 disables it
+AGENT_CONTEXT_CACHE_TTL = 300
+# With a cache shared by all workers (not LocMemCache), slot-filling progress is kept in the cache
+# and written to AgentState at most this often (seconds); otherwise every change is written through
+AGENT_STATE_FLUSH_INTERVAL = 5
+AGENT_STATE_CACHE_TTL = 3600
+# General-chat replies that don't depend on the user are reused for messages at least this similar
+# (cosine, 0-1; above 1 turns the cache off), for this many seconds
+AGENT_RESPONSE_CACHE_THRESHOLD = 0.75
+AGENT_RESPONSE_CACHE_TTL = 7 * 24 * 3600
+# At most this many entries (least used evicted first), each stored only after this many misses
+AGENT_RESPONSE_CACHE_MAX_ENTRIES = 1000
+AGENT_RESPONSE_CACHE_MIN_MISSES = 2
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -64,6 +91,37 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache for resolved users and other hot lookups. Point this at the Redis
+# instance above (django.core.cache.backends.redis.RedisCache) when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Seconds an authenticated user stays in the shared / per-process cache
+AUTH_USER_CACHE_TTL = 300
+AUTH_USER_LOCAL_TTL = 5
+
+# Chat messages are written in batches (chat.buffers); durable writes wait for their batch
+CHAT_WRITE_BUFFER_SIZE = 100
+CHAT_WRITE_FLUSH_INTERVAL = 0.25
+# A failed batch is retried up to this many attempts; past this many waiting, the oldest are dropped
+CHAT_WRITE_MAX_ATTEMPTS = 3
+CHAT_WRITE_MAX_PENDING = 1000
+CHAT_DURABLE_WRITES = False
+# Seconds between forwarded typing events per sender, and read markers coalesced per UPDATE
+CHAT_TYPING_INTERVAL = 1.0
+CHAT_READ_COALESCE_INTERVAL = 0.5
+# Reconnect replay (ws ?last_seen_id=): messages per frame and the most replayed
+CHAT_REPLAY_BATCH_SIZE = 50
+CHAT_REPLAY_MAX_MESSAGES = 500
+# Unread counters and presence (chat.presence) use the channel layer's Redis unless this is set
+CHAT_STATE_REDIS_URL = None
+# manage.py archive_chat_messages moves older messages into compressed monthly archives
+CHAT_ARCHIVE_AFTER_DAYS = 180
+CHAT_ARCHIVE_ZSTD_LEVEL = 10
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -132,11 +190,20 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # Internationalization
@@ -16,9 +16,9 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.http import HttpResponse
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from core.media import serve_media
 
 def home_view(request):
     return HttpResponse("<h1>Welcome to FlexiPlan Backend</h1>")
@@ -32,9 +32,6 @@ urlpatterns = [
     path('api/', include('social.urls')),
     path('api/', include('chat.urls')),
     path('api/agent/', include('agent.urls')),
-]
-
-
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Served in every environment; see core.media for caching and sendfile offload
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
\ No newline at end of file
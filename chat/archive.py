@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import orjson
+import zstandard
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+
+from .models import Message, MessageArchive, conversation_pair
+
+# Messages older than this many days are moved into MessageArchive blobs
+CHAT_ARCHIVE_AFTER_DAYS = getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 180)
+CHAT_ARCHIVE_ZSTD_LEVEL = getattr(settings, 'CHAT_ARCHIVE_ZSTD_LEVEL', 10)
+DELETE_BATCH_SIZE = 1000
+
+# Column order of the rows stored in an archive blob
+ARCHIVE_FIELDS = ('id', 'sender_id', 'receiver_id', 'message', 'timestamp', 'is_read')
+
+
+def pack_rows(rows):
+    """Compress (id, sender_id, receiver_id, message, timestamp, is_read) rows sorted by (timestamp, id)."""
+    return zstandard.ZstdCompressor(level=CHAT_ARCHIVE_ZSTD_LEVEL).compress(orjson.dumps(rows))
+
+
+def unpack_rows(data):
+    rows = orjson.loads(zstandard.ZstdDecompressor().decompress(bytes(data)))
+    for row in rows:
+        row[4] = datetime.fromisoformat(row[4])
+    return rows
+
+
+def _message(row, users):
+    message = Message(**dict(zip(ARCHIVE_FIELDS, row)))
+    message._state.adding = False
+    if users:
+        message.sender = users[message.sender_id]
+        message.receiver = users[message.receiver_id]
+    return message
+
+
+def archive_conversation_month(user_low, user_high, month_start, cutoff):
+    """Move one conversation's messages in [month_start, cutoff) of that month into its archive."""
+    month_end = min((month_start + timedelta(days=32)).replace(day=1), cutoff)
+    with transaction.atomic():
+        messages = Message.objects.between(user_low, user_high).filter(
+            timestamp__gte=month_start, timestamp__lt=month_end
+        ).select_for_update()
+        rows = [list(row) for row in messages.order_by('timestamp', 'id').values_list(*ARCHIVE_FIELDS)]
+        if not rows:
+            return 0
+        moved_ids = [row[0] for row in rows]
+
+        archive = MessageArchive.objects.select_for_update().filter(
+            user_low_id=user_low, user_high_id=user_high, month=month_start.date()
+        ).first()
+        if archive is not None:
+            # A later run finishing a month that an earlier cutoff split
+            moved = set(moved_ids)
+            rows = [row for row in unpack_rows(archive.data) if row[0] not in moved] + rows
+            rows.sort(key=lambda row: (row[4], row[0]))
+        else:
+            archive = MessageArchive(user_low_id=user_low, user_high_id=user_high, month=month_start.date())
+
+        archive.first_timestamp = rows[0][4]
+        archive.last_timestamp = rows[-1][4]
+        archive.message_count = len(rows)
+        archive.data = pack_rows(rows)
+        archive.save()
+
+        for start in range(0, len(moved_ids), DELETE_BATCH_SIZE):
+            Message.objects.filter(pk__in=moved_ids[start:start + DELETE_BATCH_SIZE]).delete()
+        return len(moved_ids)
+
+
+def archive_messages(cutoff):
+    """
+    Archive every message older than ``cutoff``, one transaction per conversation
+    and month. Returns (messages archived, conversation-months touched).
+    """
+    user_low, user_high = conversation_pair()
+    groups = Message.objects.filter(timestamp__lt=cutoff).annotate(
+        low=user_low, high=user_high, month_start=TruncMonth('timestamp')
+    ).values_list('low', 'high', 'month_start').distinct().order_by()
+
+    archived = touched = 0
+    for low, high, month_start in list(groups):
+        count = archive_conversation_month(low, high, month_start, cutoff)
+        if count:
+            archived += count
+            touched += 1
+    return archived, touched
+
+
+class ConversationArchive:
+    """
+    Read side of one conversation's archives, used by paginate_messages once the
+    hot table has no more rows in the requested direction. Archived messages are
+    always older than the conversation's hot rows. ``users`` maps user ids to the
+    User instances attached as sender/receiver.
+    """
+
+    def __init__(self, user_id, other_id, users=None):
+        self.user_low = min(user_id, other_id)
+        self.user_high = max(user_id, other_id)
+        self.users = users
+
+    def _archives(self):
+        return MessageArchive.objects.filter(user_low_id=self.user_low, user_high_id=self.user_high)
+
+    def _rows(self, archive_ids):
+        # Blobs are loaded one at a time so a page only decompresses the months it needs
+        for archive_id in archive_ids:
+            yield unpack_rows(MessageArchive.objects.values_list('data', flat=True).get(pk=archive_id))
+
+    def before(self, cursor, count):
+        """Up to ``count`` archived messages before ``cursor`` ((timestamp, id) or None), newest first."""
+        archives = self._archives()
+        if cursor is not None:
+            archives = archives.filter(first_timestamp__lte=cursor[0])
+        archive_ids = archives.order_by('-last_timestamp').values_list('id', flat=True)
+
+        messages = []
+        for rows in self._rows(archive_ids):
+            for row in reversed(rows):
+                if cursor is None or (row[4], row[0]) < cursor:
+                    messages.append(_message(row, self.users))
+                    if len(messages) == count:
+                        return messages
+        return messages
+
+    def after(self, cursor, count):
+        """Up to ``count`` archived messages after ``cursor`` ((timestamp, id)), oldest first."""
+        archive_ids = self._archives().filter(
+            last_timestamp__gte=cursor[0]
+        ).order_by('last_timestamp').values_list('id', flat=True)
+
+        messages = []
+        for rows in self._rows(archive_ids):
+            for row in rows:
+                if (row[4], row[0]) > cursor:
+                    messages.append(_message(row, self.users))
+                    if len(messages) == count:
+                        return messages
+        return messages
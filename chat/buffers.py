@@ -0,0 +1,136 @@
+import asyncio
+import atexit
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many messages are waiting...
+CHAT_WRITE_BUFFER_SIZE = getattr(settings, 'CHAT_WRITE_BUFFER_SIZE', 100)
+# ...or this many seconds after the first one arrived, whichever comes first
+CHAT_WRITE_FLUSH_INTERVAL = getattr(settings, 'CHAT_WRITE_FLUSH_INTERVAL', 0.25)
+# A batch that fails to save is retried this many times in all, with the next flush
+CHAT_WRITE_MAX_ATTEMPTS = getattr(settings, 'CHAT_WRITE_MAX_ATTEMPTS', 3)
+# Most messages kept waiting; past this the oldest are dropped
+CHAT_WRITE_MAX_PENDING = getattr(settings, 'CHAT_WRITE_MAX_PENDING', 1000)
+
+
+class MessageWriteBuffer:
+    """
+    Process-wide write-behind buffer for chat messages. Consumers hand over
+    unsaved Message objects and carry on delivering; the buffer writes them
+    with one bulk_create per flush. Callers that need the row (and its id)
+    before continuing pass ``durable=True`` and wait for their batch; if it
+    fails they get the error, while the other messages go back in the queue.
+    """
+
+    def __init__(self, max_size=CHAT_WRITE_BUFFER_SIZE, flush_interval=CHAT_WRITE_FLUSH_INTERVAL,
+                 max_attempts=CHAT_WRITE_MAX_ATTEMPTS, max_pending=CHAT_WRITE_MAX_PENDING):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self._pending = []  # (message, future or None, failed attempts)
+        self._timer = None
+        self._flush_tasks = set()
+        # One bulk insert in flight at a time; messages arriving meanwhile join the next one
+        self._flush_lock = asyncio.Lock()
+
+    async def add(self, message, durable=False):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future() if durable else None
+        self._pending.append((message, future, 0))
+        self._drop_overflow()
+
+        # A durable send flushes straight away, taking every message queued so far with it
+        if durable or len(self._pending) >= self.max_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._schedule_flush)
+
+        if future is not None:
+            await future
+        return message
+
+    def _schedule_flush(self):
+        task = asyncio.ensure_future(self.flush())
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            try:
+                await database_sync_to_async(Message.objects.bulk_create)([message for message, _, _ in batch])
+            except Exception as exc:
+                logger.exception("Failed to persist %d chat messages", len(batch))
+                self._requeue(batch, exc)
+                return
+
+        for message, future, _ in batch:
+            if future is not None and not future.done():
+                future.set_result(message)
+
+    def _requeue(self, batch, exc):
+        retry, dropped = [], 0
+        for message, future, attempts in batch:
+            if future is not None:
+                # The sender is waiting and gets the error
+                if not future.done():
+                    future.set_exception(exc)
+            elif attempts + 1 < self.max_attempts:
+                retry.append((message, None, attempts + 1))
+            else:
+                dropped += 1
+        if dropped:
+            logger.error("Dropped %d chat messages after %d failed attempts", dropped, self.max_attempts)
+        # Ahead of the messages that arrived meanwhile, so the order is kept
+        self._pending[:0] = retry
+        self._drop_overflow()
+        if self._pending and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._schedule_flush)
+
+    def _drop_overflow(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow <= 0:
+            return
+        # Oldest first; a durable sender is still waiting for its message
+        kept, dropped = [], 0
+        for entry in self._pending:
+            if dropped < overflow and entry[1] is None:
+                dropped += 1
+            else:
+                kept.append(entry)
+        self._pending = kept
+        if dropped:
+            logger.error("Dropped %d chat messages: more than %d waiting to be saved", dropped, self.max_pending)
+
+    def flush_now(self):
+        """Save every waiting message from outside the event loop, e.g. when the process exits."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            Message.objects.bulk_create([message for message, _, _ in batch])
+        except Exception:
+            logger.exception("Failed to persist %d chat messages", len(batch))
+
+
+message_buffer = MessageWriteBuffer()
+# Write whatever is still buffered when the worker shuts down
+atexit.register(message_buffer.flush_now)
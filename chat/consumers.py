@@ -1,26 +1,375 @@
+import asyncio
 import json
+import time
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import AnonymousUser
-from core.models import Friendship, Message, User
-import models, datetime
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from core.models import Friendship, User
+from .buffers import message_buffer
+from .models import Message
+from .notifications import room_group_name, user_group_name
+from .presence import update_chat_state
+
+# Wait for every message to reach the database before broadcasting it
+CHAT_DURABLE_WRITES = getattr(settings, 'CHAT_DURABLE_WRITES', False)
+# At most one typing event per sender and conversation in this many seconds
+CHAT_TYPING_INTERVAL = getattr(settings, 'CHAT_TYPING_INTERVAL', 1.0)
+# Read markers arriving within this many seconds are applied as one UPDATE
+CHAT_READ_COALESCE_INTERVAL = getattr(settings, 'CHAT_READ_COALESCE_INTERVAL', 0.5)
+# Missed messages sent per replay frame, and the most replayed before the client must page history
+CHAT_REPLAY_BATCH_SIZE = getattr(settings, 'CHAT_REPLAY_BATCH_SIZE', 50)
+CHAT_REPLAY_MAX_MESSAGES = getattr(settings, 'CHAT_REPLAY_MAX_MESSAGES', 500)
+
+
+class ChatSendMixin:
+    """Message persistence and fan-out shared by the per-user and per-friend sockets."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_typing = {}  # friend_id -> monotonic time of the last forwarded typing event
+        self._pending_reads = {}  # friend_id -> read-up-to timestamp (None means everything)
+        self._read_timer = None
+        self._read_tasks = set()
+        self._replayed = set()  # (sender_id, timestamp) of replayed messages still due live
+
+    async def send_chat_message(self, receiver_id, message, durable=CHAT_DURABLE_WRITES):
+        # Persisted by the write-behind buffer; only durable sends wait for the row
+        chat_message = Message(
+            sender_id=self.user.id,
+            receiver_id=receiver_id,
+            message=message,
+            timestamp=timezone.now()
+        )
+        await message_buffer.add(chat_message, durable=durable)
+        await sync_to_async(update_chat_state, thread_sensitive=False)(
+            'increment_unread', receiver_id, self.user.id
+        )
+
+        event = message_event(chat_message)
+        # Legacy room for per-friend sockets, then both users' personal groups
+        # (the sender's own group keeps their other devices in sync)
+        for group in (
+            room_group_name(self.user.id, receiver_id),
+            user_group_name(receiver_id),
+            user_group_name(self.user.id),
+        ):
+            await self.channel_layer.group_send(group, event)
+        return chat_message
+
+    async def replay_missed_messages(self, queryset):
+        """
+        Send the messages in ``queryset`` after the client's ``?last_seen_id=`` (or
+        ``?last_seen=<timestamp>`` when it only has buffered, id-less frames) in
+        batched ``replay`` frames, then a ``replay.done`` frame. Called at the end of
+        connect: group events queue until it returns, so live delivery starts after.
+        """
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            last_seen_id = int(params['last_seen_id'][0]) if 'last_seen_id' in params else None
+            last_seen = parse_marker(params['last_seen'][0], 'last_seen') if 'last_seen' in params else None
+        except ValueError as e:
+            await self.send(text_data=json.dumps({'type': 'error', 'error': str(e)}))
+            return
+        if last_seen_id is None and last_seen is None:
+            return
+
+        # Buffered messages must be rows before the range query can see them
+        await message_buffer.flush()
+        messages = await self.get_missed_messages(queryset, last_seen_id, last_seen)
+        has_more = len(messages) > CHAT_REPLAY_MAX_MESSAGES
+        messages = messages[:CHAT_REPLAY_MAX_MESSAGES]
+
+        for start in range(0, len(messages), CHAT_REPLAY_BATCH_SIZE):
+            events = [message_event(message) for message in messages[start:start + CHAT_REPLAY_BATCH_SIZE]]
+            # Sent after the socket joined its groups, so the same message may also arrive live
+            self._replayed.update((event['sender_id'], event['timestamp']) for event in events)
+            await self.send(text_data=json.dumps({
+                'type': 'replay',
+                'messages': [self.message_frame(event) for event in events]
+            }))
+        await self.send(text_data=json.dumps({
+            'type': 'replay.done',
+            'count': len(messages),
+            # Too far behind: load the rest through MessageListView
+            'has_more': has_more
+        }))
+
+    @database_sync_to_async
+    def get_missed_messages(self, queryset, last_seen_id, last_seen):
+        if last_seen_id is not None:
+            anchor = Message.objects.filter(pk=last_seen_id).values_list('timestamp', flat=True).first()
+            if anchor is None:
+                # Archived or deleted; ids still only grow
+                queryset = queryset.filter(id__gt=last_seen_id)
+            else:
+                queryset = queryset.filter(Q(timestamp__gt=anchor) | Q(timestamp=anchor, id__gt=last_seen_id))
+        else:
+            queryset = queryset.filter(timestamp__gt=last_seen)
+        return list(queryset.order_by('timestamp', 'id')[:CHAT_REPLAY_MAX_MESSAGES + 1])
+
+    def already_replayed(self, event):
+        key = (event['sender_id'], event['timestamp'])
+        if key in self._replayed:
+            self._replayed.discard(key)
+            return True
+        # Events arrive in send order, so the first new one ends the overlap with the replay
+        self._replayed.clear()
+        return False
+
+    async def send_typing(self, friend_id):
+        # Drop keystroke bursts: one event per CHAT_TYPING_INTERVAL is enough to show the indicator
+        now = time.monotonic()
+        if now - self._last_typing.get(friend_id, 0) < CHAT_TYPING_INTERVAL:
+            return
+        self._last_typing[friend_id] = now
+
+        event = {'type': 'chat.typing', 'sender_id': self.user.id, 'receiver_id': friend_id}
+        for group in (room_group_name(self.user.id, friend_id), user_group_name(friend_id)):
+            await self.channel_layer.group_send(group, event)
+
+    async def queue_read(self, friend_id, up_to=None):
+        """
+        Record that the user has read ``friend_id``'s messages up to the ``up_to``
+        timestamp (everything if None). Markers are coalesced per conversation and
+        applied after CHAT_READ_COALESCE_INTERVAL.
+        """
+        if friend_id in self._pending_reads:
+            current = self._pending_reads[friend_id]
+            up_to = None if current is None or up_to is None else max(current, up_to)
+        self._pending_reads[friend_id] = up_to
+
+        if self._read_timer is None:
+            self._read_timer = asyncio.get_running_loop().call_later(
+                CHAT_READ_COALESCE_INTERVAL, self._schedule_read_flush
+            )
+
+    def _schedule_read_flush(self):
+        task = asyncio.ensure_future(self.flush_reads())
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._read_tasks.add(task)
+        task.add_done_callback(self._read_tasks.discard)
+
+    async def flush_reads(self):
+        if self._read_timer is not None:
+            self._read_timer.cancel()
+            self._read_timer = None
+        pending, self._pending_reads = self._pending_reads, {}
+        for friend_id, up_to in pending.items():
+            await self.mark_conversation_read(friend_id, up_to)
+
+    async def mark_conversation_read(self, friend_id, up_to=None):
+        # Buffered messages must be rows before the ranged UPDATE can cover them
+        await message_buffer.flush()
+        updated = await self.mark_read(self.user.id, friend_id, up_to)
+        if up_to is None:
+            await sync_to_async(update_chat_state, thread_sensitive=False)(
+                'clear_unread', self.user.id, friend_id
+            )
+        elif updated:
+            await sync_to_async(update_chat_state, thread_sensitive=False)(
+                'increment_unread', self.user.id, friend_id, -updated
+            )
+
+        event = {
+            'type': 'chat.read',
+            'reader_id': self.user.id,
+            'sender_id': friend_id,
+            'up_to': up_to.isoformat() if up_to is not None else None,
+            'messages_updated': updated
+        }
+        for group in (
+            room_group_name(self.user.id, friend_id),
+            user_group_name(friend_id),
+            user_group_name(self.user.id),
+        ):
+            await self.channel_layer.group_send(group, event)
+
+    @database_sync_to_async
+    def mark_read(self, user_id, friend_id, up_to=None):
+        # One UPDATE over the conversation's (pair, timestamp) index range
+        messages = Message.objects.between(user_id, friend_id).filter(receiver_id=user_id, is_read=False)
+        if up_to is not None:
+            messages = messages.filter(timestamp__lte=up_to)
+        return messages.update(is_read=True)
+
+
+def parse_marker(value, name='up_to'):
+    """Aware datetime from a client timestamp marker (None stays None); raises ValueError."""
+    if value is None:
+        return None
+    marker = parse_datetime(value) if isinstance(value, str) else None
+    if marker is None:
+        raise ValueError(f"{name} must be an ISO 8601 timestamp")
+    if timezone.is_naive(marker):
+        marker = timezone.make_aware(marker)
+    return marker
+
+
+def message_event(message):
+    """Channel-layer event for a chat message, shared by live sends and replays."""
+    return {
+        'type': 'chat.message',
+        'message': message.message,
+        'message_id': message.id,
+        'sender_id': message.sender_id,
+        'receiver_id': message.receiver_id,
+        'timestamp': message.timestamp.isoformat()
+    }
+
+
+class UserConsumer(ChatSendMixin, AsyncWebsocketConsumer):
+    """One socket per user carrying every conversation.
+
+    Client frames name the conversation by the friend's user id::
+
+        {"type": "chat.message", "conversation": 7, "message": "hi"}
+        {"type": "chat.read", "conversation": 7, "up_to": "<timestamp of the last message seen>"}
+        {"type": "chat.typing", "conversation": 7}
+
+    Server frames carry the same ``conversation`` key, plus ``user.notification``
+    events such as routine updates pushed through ``notify_user``.
+    """
 
-class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"]
-        if self.user == AnonymousUser():
+        if not self.user.is_authenticated:
             await self.close()
             return
 
-        self.friend_id = self.scope['url_route']['kwargs']['friend_id']
-        
-        # Check if users are friends
-        if not await self.are_friends(self.user.id, self.friend_id):
+        # One query for every accepted friend instead of one check per socket
+        self.friend_ids = await self.get_friend_ids(self.user.id)
+        self.group_name = user_group_name(self.user.id)
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await sync_to_async(update_chat_state, thread_sensitive=False)('connected', self.user.id)
+        await self.replay_missed_messages(
+            Message.objects.filter(Q(sender_id=self.user.id) | Q(receiver_id=self.user.id))
+        )
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.flush_reads()
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await sync_to_async(update_chat_state, thread_sensitive=False)('disconnected', self.user.id)
+
+    @database_sync_to_async
+    def get_friend_ids(self, user_id):
+        pairs = Friendship.objects.filter(
+            Q(user_id=user_id) | Q(friend_id=user_id),
+            status="Accepted"
+        ).values_list('user_id', 'friend_id')
+        return {friend_id if owner_id == user_id else owner_id for owner_id, friend_id in pairs}
+
+    async def is_friend(self, friend_id):
+        if friend_id in self.friend_ids:
+            return True
+        # Friendships accepted after the socket opened are picked up on first use
+        self.friend_ids = await self.get_friend_ids(self.user.id)
+        return friend_id in self.friend_ids
+
+    async def send_error(self, error, conversation=None):
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'conversation': conversation,
+            'error': error
+        }))
+
+    # Receive frame from WebSocket
+    async def receive(self, text_data):
+        try:
+            data = json.loads(text_data)
+            conversation = int(data['conversation'])
+        except (ValueError, TypeError, KeyError):
+            await self.send_error("Frames need a JSON body with a numeric 'conversation'")
+            return
+
+        if not await self.is_friend(conversation):
+            await self.send_error("You can only chat with accepted friends", conversation)
+            return
+
+        frame_type = data.get('type', 'chat.message')
+        if frame_type == 'chat.message':
+            if not data.get('message'):
+                await self.send_error("Message content is required", conversation)
+                return
+            await self.send_chat_message(conversation, data['message'])
+        elif frame_type == 'chat.read':
+            try:
+                up_to = parse_marker(data.get('up_to'))
+            except ValueError as e:
+                await self.send_error(str(e), conversation)
+                return
+            await self.queue_read(conversation, up_to)
+        elif frame_type == 'chat.typing':
+            await self.send_typing(conversation)
+        else:
+            await self.send_error(f"Unknown frame type '{frame_type}'", conversation)
+
+    def message_frame(self, event):
+        sender_id = event['sender_id']
+        return {
+            'type': 'chat.message',
+            'conversation': event['receiver_id'] if sender_id == self.user.id else sender_id,
+            'message': event['message'],
+            'message_id': event.get('message_id'),
+            'sender_id': sender_id,
+            'timestamp': event['timestamp']
+        }
+
+    # Receive message from a personal group
+    async def chat_message(self, event):
+        if not self.already_replayed(event):
+            await self.send(text_data=json.dumps(self.message_frame(event)))
+
+    async def chat_read(self, event):
+        reader_id = event['reader_id']
+        conversation = event['sender_id'] if reader_id == self.user.id else reader_id
+
+        await self.send(text_data=json.dumps({
+            'type': 'chat.read',
+            'conversation': conversation,
+            'reader_id': reader_id,
+            'up_to': event.get('up_to'),
+            'messages_updated': event['messages_updated']
+        }))
+
+    async def chat_typing(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'chat.typing',
+            'conversation': event['sender_id']
+        }))
+
+    async def user_notification(self, event):
+        await self.send(text_data=json.dumps({
+            'type': event['event'],
+            'data': event['data']
+        }))
+
+
+class ChatConsumer(ChatSendMixin, AsyncWebsocketConsumer):
+    """Per-friend socket kept for older clients; prefer ``UserConsumer``."""
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
             await self.close()
             return
 
-        self.room_name = f"chat_{min(self.user.id, int(self.friend_id))}_{max(self.user.id, int(self.friend_id))}"
-        self.room_group_name = f"chat_{self.room_name}"
+        friend_id = int(self.scope['url_route']['kwargs']['friend_id'])
+
+        # Resolve the friend once for the lifetime of the socket (None if not friends)
+        self.friend = await self.get_friend(self.user.id, friend_id)
+        if self.friend is None:
+            await self.close()
+            return
+
+        self.room_group_name = room_group_name(self.user.id, friend_id)
 
         # Join room group
         await self.channel_layer.group_add(
@@ -29,57 +378,68 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
         await self.accept()
+        await sync_to_async(update_chat_state, thread_sensitive=False)('connected', self.user.id)
+        await self.replay_missed_messages(Message.objects.between(self.user.id, friend_id))
 
     async def disconnect(self, close_code):
         # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if hasattr(self, 'room_group_name'):
+            await self.flush_reads()
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+            await sync_to_async(update_chat_state, thread_sensitive=False)('disconnected', self.user.id)
 
     @database_sync_to_async
-    def are_friends(self, user1_id, user2_id):
-        return Friendship.objects.filter(
-            (models.Q(user_id=user1_id, friend_id=user2_id) | models.Q(user_id=user2_id, friend_id=user1_id)),
+    def get_friend(self, user_id, friend_id):
+        if not Friendship.objects.filter(
+            (Q(user_id=user_id, friend_id=friend_id) | Q(user_id=friend_id, friend_id=user_id)),
             status="Accepted"
-        ).exists()
-
-    @database_sync_to_async
-    def create_message(self, sender, receiver, message):
-        return Message.objects.create(
-            sender=sender,
-            receiver=receiver,
-            message=message
-        )
+        ).exists():
+            return None
+        return User.objects.filter(id=friend_id).first()
 
     # Receive message from WebSocket
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
-        message = text_data_json['message']
+        frame_type = text_data_json.get('type', 'message')
 
-        # Save message to database
-        receiver = await database_sync_to_async(User.objects.get)(id=self.friend_id)
-        await self.create_message(self.user, receiver, message)
+        if frame_type == 'typing':
+            await self.send_typing(self.friend.id)
+        elif frame_type == 'read':
+            try:
+                up_to = parse_marker(text_data_json.get('up_to'))
+            except ValueError as e:
+                await self.send(text_data=json.dumps({'type': 'error', 'error': str(e)}))
+                return
+            await self.queue_read(self.friend.id, up_to)
+        else:
+            message = text_data_json['message']
+            await self.send_chat_message(self.friend.id, message)
 
-        # Send message to room group
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message': message,
-                'sender_id': self.user.id,
-                'timestamp': str(datetime.now())
-            }
-        )
+    def message_frame(self, event):
+        return {
+            'message': event['message'],
+            'message_id': event.get('message_id'),
+            'sender_id': event['sender_id'],
+            'timestamp': event['timestamp']
+        }
 
     # Receive message from room group
     async def chat_message(self, event):
-        message = event['message']
-        sender_id = event['sender_id']
-
         # Send message to WebSocket
+        if not self.already_replayed(event):
+            await self.send(text_data=json.dumps(self.message_frame(event)))
+
+    async def chat_read(self, event):
         await self.send(text_data=json.dumps({
-            'message': message,
-            'sender_id': sender_id,
-            'timestamp': event['timestamp']
-        }))
\ No newline at end of file
+            'type': 'read',
+            'reader_id': event['reader_id'],
+            'up_to': event['up_to']
+        }))
+
+    async def chat_typing(self, event):
+        # The room holds both users' sockets; only the other side needs the indicator
+        if event['sender_id'] != self.user.id:
+            await self.send(text_data=json.dumps({'type': 'typing', 'sender_id': event['sender_id']}))
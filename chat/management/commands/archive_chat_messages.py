@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat.archive import CHAT_ARCHIVE_AFTER_DAYS, archive_messages
+
+
+class Command(BaseCommand):
+    help = (
+        "Move chat messages older than --older-than-days into per-conversation, per-month "
+        "zstandard-compressed MessageArchive rows. Safe to re-run; partial months are merged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=CHAT_ARCHIVE_AFTER_DAYS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        archived, touched = archive_messages(cutoff)
+        self.stdout.write(f"Archived {archived} messages before {cutoff:%Y-%m-%d} into {touched} conversation-months")
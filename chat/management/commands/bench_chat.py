@@ -0,0 +1,74 @@
+import asyncio
+import json
+import time
+
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from chat import routing
+from chat.buffers import message_buffer
+from chat.models import Message
+from core.models import Friendship, User
+
+
+class Command(BaseCommand):
+    help = (
+        "WebSocket throughput of ChatConsumer on one worker, with write-behind and durable "
+        "persistence. Runs against a throwaway test database and an in-memory channel layer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CHANNEL_LAYERS={'default': {
+                'BACKEND': 'channels.layers.InMemoryChannelLayer', 'CONFIG': {'capacity': 1_000_000},
+            }}):
+                sender = User.objects.create_user(username='bench_sender', email='s@bench.local', password='x')
+                receiver = User.objects.create_user(username='bench_receiver', email='r@bench.local', password='x')
+                Friendship.objects.create(user=sender, friend=receiver, status="Accepted")
+
+                for durable in (False, True):
+                    elapsed = asyncio.run(self._run(sender, receiver, options['messages'], durable))
+                    self.stdout.write(
+                        f"{'durable' if durable else 'write-behind':<13} {options['messages']} messages  "
+                        f"{options['messages'] / elapsed:10.0f} msg/s  ({Message.objects.count()} rows stored)"
+                    )
+                    Message.objects.all().delete()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    async def _connect(self, application, path, user):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'websocket', 'path': path, 'headers': [], 'query_string': b'', 'subprotocols': [], 'user': user,
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        accepted = await communicator.receive_output(timeout=5)
+        if accepted['type'] != 'websocket.accept':
+            raise RuntimeError(f"Connection to {path} was refused")
+        return communicator
+
+    async def _run(self, sender, receiver, count, durable):
+        application = URLRouter(routing.websocket_urlpatterns)
+        sending = await self._connect(application, f"/ws/chat/{receiver.id}/", sender)
+        listening = await self._connect(application, f"/ws/chat/{sender.id}/", receiver)
+
+        started = time.perf_counter()
+        for index in range(count):
+            await sending.send_input({
+                'type': 'websocket.receive', 'text': json.dumps({'message': f"message {index}", 'durable': durable})
+            })
+        for _ in range(count):
+            await listening.receive_output(timeout=30)
+        await message_buffer.flush()
+        elapsed = time.perf_counter() - started
+
+        for communicator in (sending, listening):
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(timeout=5)
+        return elapsed
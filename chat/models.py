@@ -1,5 +1,53 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from core.models import User
+from django.db.models import Case, Exists, F, OuterRef, Q, Sum, When, Window
+from django.db.models.functions import FirstValue, Greatest, Least
+from django.utils import timezone
+from core.models import Friendship, User
+
+
+def conversation_pair():
+    """(low, high) user id expressions identifying a conversation regardless of direction."""
+    return Least('sender', 'receiver'), Greatest('sender', 'receiver')
+
+
+class MessageQuerySet(models.QuerySet):
+    def between(self, user_id, other_id):
+        """Messages exchanged by two users, matched through the normalized pair index."""
+        user_low, user_high = conversation_pair()
+        return self.alias(user_low=user_low, user_high=user_high).filter(
+            user_low=min(user_id, other_id),
+            user_high=max(user_id, other_id)
+        )
+
+    def inbox(self, user_id):
+        """
+        The latest message of each conversation ``user_id`` has with an accepted friend,
+        annotated with ``unread`` (messages to ``user_id`` not yet read) and the
+        ``last_timestamp``/``last_id`` cursor columns. One query: window functions over
+        the normalized pair pick the latest row and count unread in the same pass.
+        """
+        def latest_first(expression):
+            return Window(
+                expression,
+                partition_by=list(conversation_pair()),
+                order_by=[F('timestamp').desc(), F('id').desc()]
+            )
+
+        accepted = Friendship.objects.filter(
+            Q(user=OuterRef('sender'), friend=OuterRef('receiver')) |
+            Q(user=OuterRef('receiver'), friend=OuterRef('sender')),
+            status="Accepted"
+        )
+        return self.filter(Q(sender_id=user_id) | Q(receiver_id=user_id), Exists(accepted)).annotate(
+            last_timestamp=latest_first(FirstValue('timestamp')),
+            last_id=latest_first(FirstValue('id')),
+            unread=Window(
+                Sum(Case(When(receiver_id=user_id, is_read=False, then=1), default=0)),
+                partition_by=list(conversation_pair())
+            ),
+        ).filter(id=F('last_id'))
+
 
 # Create your models here.
 # Messages Table
@@ -7,11 +55,47 @@ class Message(models.Model):
     sender = models.ForeignKey(User, related_name='sent_messages', on_delete=models.CASCADE)
     receiver = models.ForeignKey(User, related_name='received_messages', on_delete=models.CASCADE)
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set by the sender (not auto_now_add) so the broadcast timestamp is the stored one
+    timestamp = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
+    # Maintained by a PostgreSQL trigger and GIN-indexed (see migration 0003); unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = MessageQuerySet.as_manager()
 
     class Meta:
         ordering = ('timestamp',)
+        indexes = [
+            # Keyset pagination of one conversation: pair equality, then (timestamp, id)
+            models.Index(*conversation_pair(), F('timestamp'), F('id'), name='chat_msg_pair_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"From {self.sender} to {self.receiver}: {self.message[:20]}..."
+
+class MessageArchive(models.Model):
+    """
+    One conversation's messages for one calendar month, moved out of Message by
+    ``manage.py archive_chat_messages``. ``data`` holds the rows as
+    zstandard-compressed JSON (see chat.archive); the other columns index it.
+    """
+    user_low = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    user_high = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    month = models.DateField()
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high', 'month'], name='chat_archive_pair_month_uniq'),
+        ]
+        indexes = [
+            # Finding the archives before/after a pagination cursor
+            models.Index(fields=['user_low', 'user_high', 'last_timestamp'], name='chat_archive_pair_ts_idx'),
+        ]
 
     def __str__(self):
-        return f"From {self.sender} to {self.receiver}: {self.message[:20]}..."
\ No newline at end of file
+        return f"Archive of {self.user_low_id}/{self.user_high_id} for {self.month:%Y-%m} ({self.message_count} messages)"
@@ -0,0 +1,35 @@
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def user_group_name(user_id):
+    """Personal group joined by every multiplexed socket of a user."""
+    return f"user_{user_id}"
+
+
+def room_group_name(user_id, friend_id):
+    """Group joined by the legacy per-friend sockets of a conversation."""
+    return f"chat_chat_{min(user_id, friend_id)}_{max(user_id, friend_id)}"
+
+
+def send_to_user(user_id, event):
+    """Push a channel-layer event to a user's sockets from synchronous code.
+
+    Delivery is best effort: a missing or unreachable channel layer is logged
+    rather than failing the request that triggered it.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(user_group_name(user_id), event)
+    except Exception:
+        logger.exception("Failed to push %s to user %s", event.get('type'), user_id)
+
+
+def notify_user(user_id, event, data):
+    """Send a named notification (e.g. ``routine.updated``) to a user's sockets."""
+    send_to_user(user_id, {'type': 'user.notification', 'event': event, 'data': data})
@@ -0,0 +1,97 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+MESSAGE_PAGE_SIZE = getattr(settings, 'MESSAGE_PAGE_SIZE', 50)
+MESSAGE_PAGE_SIZE_MAX = getattr(settings, 'MESSAGE_PAGE_SIZE_MAX', 200)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(message):
+    """Opaque cursor for a message's (timestamp, id) position."""
+    raw = f"{message.timestamp.isoformat()},{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.rsplit(',', 1)
+        timestamp = parse_datetime(timestamp)
+        message_id = int(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Invalid cursor.")
+    if timestamp is None:
+        raise InvalidCursor("Invalid cursor.")
+    return timestamp, message_id
+
+
+def parse_page_size(value):
+    try:
+        return max(1, min(int(value), MESSAGE_PAGE_SIZE_MAX)) if value else MESSAGE_PAGE_SIZE
+    except ValueError:
+        raise InvalidCursor("limit must be a number.")
+
+
+def paginate_messages(queryset, before=None, after=None, limit=MESSAGE_PAGE_SIZE, archive=None):
+    """
+    One page of a conversation using keyset pagination on (timestamp, id).
+
+    ``before`` pages back from a cursor, ``after`` pages forward from one and
+    neither returns the latest page. Returns (messages oldest-first, has_more),
+    where has_more refers to the direction being paged.
+
+    With an ``archive`` (chat.archive.ConversationArchive) the page continues into
+    archived messages once ``queryset`` runs out of older rows, so cursors work the
+    same on both sides of the archive boundary.
+    """
+    if after:
+        cursor = decode_cursor(after)
+        timestamp, message_id = cursor
+        # Archived messages are older than every hot row, so they come first
+        messages = archive.after(cursor, limit + 1) if archive is not None else []
+        if len(messages) <= limit:
+            queryset = queryset.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id)
+            ).order_by('timestamp', 'id')
+            messages += list(queryset[:limit + 1 - len(messages)])
+        return messages[:limit], len(messages) > limit
+
+    cursor = None
+    if before:
+        cursor = decode_cursor(before)
+        timestamp, message_id = cursor
+        queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id))
+
+    messages = list(queryset.order_by('-timestamp', '-id')[:limit + 1])
+    if archive is not None and len(messages) <= limit:
+        if messages:
+            cursor = (messages[-1].timestamp, messages[-1].id)
+        messages += archive.before(cursor, limit + 1 - len(messages))
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()
+    return messages, has_more
+
+
+def paginate_inbox(queryset, before=None, limit=MESSAGE_PAGE_SIZE):
+    """
+    One page of ``Message.objects.inbox()`` ordered by last activity, newest first.
+    ``before`` is the cursor of the last conversation on the previous page.
+    Returns (latest messages, has_more).
+    """
+    if before:
+        timestamp, message_id = decode_cursor(before)
+        # Filter on the window columns so the cursor is applied after the latest message is picked
+        queryset = queryset.filter(
+            Q(last_timestamp__lt=timestamp) | Q(last_timestamp=timestamp, last_id__lt=message_id)
+        )
+
+    conversations = list(queryset.order_by('-timestamp', '-id')[:limit + 1])
+    return conversations[:limit], len(conversations) > limit
@@ -0,0 +1,173 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Hash field marking that a user's unread counters have been loaded from the database
+SEEDED_FIELD = '_seeded'
+
+
+class InMemoryChatState:
+    """Per-process stand-in for RedisChatState, for tests and single-worker development."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._unread = {}
+        self._connections = {}
+        self._last_seen = {}
+
+    def increment_unread(self, user_id, friend_id, amount=1):
+        with self._lock:
+            counters = self._unread.setdefault(user_id, {})
+            counters[friend_id] = counters.get(friend_id, 0) + amount
+
+    def clear_unread(self, user_id, friend_id):
+        with self._lock:
+            self._unread.get(user_id, {}).pop(friend_id, None)
+
+    def seed_unread(self, user_id, counts):
+        with self._lock:
+            self._unread[user_id] = dict(counts, **{SEEDED_FIELD: 1})
+
+    def unread_counts(self, user_id, friend_ids):
+        """{friend_id: count} for the given friends, or None if the counters were never seeded."""
+        with self._lock:
+            counters = self._unread.get(user_id)
+            if not counters or SEEDED_FIELD not in counters:
+                return None
+            return {friend_id: counters.get(friend_id, 0) for friend_id in friend_ids}
+
+    def connected(self, user_id):
+        with self._lock:
+            self._connections[user_id] = self._connections.get(user_id, 0) + 1
+            self._last_seen[user_id] = timezone.now().isoformat()
+
+    def disconnected(self, user_id):
+        with self._lock:
+            self._connections[user_id] = max(self._connections.get(user_id, 0) - 1, 0)
+            self._last_seen[user_id] = timezone.now().isoformat()
+
+    def presence(self, user_ids):
+        """{user_id: (online, last_seen)}"""
+        with self._lock:
+            return {
+                user_id: (self._connections.get(user_id, 0) > 0, self._last_seen.get(user_id))
+                for user_id in user_ids
+            }
+
+
+class RedisChatState:
+    """
+    Unread counters and presence kept in Redis so every worker sees the same state.
+      chat:unread:<user_id>  hash  friend_id -> unread count
+      chat:connections       hash  user_id -> open sockets
+      chat:last_seen         hash  user_id -> ISO timestamp
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def increment_unread(self, user_id, friend_id, amount=1):
+        self.client.hincrby(f"chat:unread:{user_id}", friend_id, amount)
+
+    def clear_unread(self, user_id, friend_id):
+        self.client.hdel(f"chat:unread:{user_id}", friend_id)
+
+    def seed_unread(self, user_id, counts):
+        key = f"chat:unread:{user_id}"
+        with self.client.pipeline() as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=dict(counts, **{SEEDED_FIELD: 1}))
+            pipe.execute()
+
+    def unread_counts(self, user_id, friend_ids):
+        friend_ids = list(friend_ids)
+        values = self.client.hmget(f"chat:unread:{user_id}", [SEEDED_FIELD, *friend_ids])
+        if values[0] is None:
+            return None
+        return {friend_id: int(value or 0) for friend_id, value in zip(friend_ids, values[1:])}
+
+    def connected(self, user_id):
+        with self.client.pipeline() as pipe:
+            pipe.hincrby("chat:connections", user_id, 1)
+            pipe.hset("chat:last_seen", user_id, timezone.now().isoformat())
+            pipe.execute()
+
+    def disconnected(self, user_id):
+        with self.client.pipeline() as pipe:
+            pipe.hincrby("chat:connections", user_id, -1)
+            pipe.hset("chat:last_seen", user_id, timezone.now().isoformat())
+            remaining, _ = pipe.execute()
+        if remaining < 0:
+            # A worker died without reporting its disconnects; don't let the count go negative
+            self.client.hset("chat:connections", user_id, 0)
+
+    def presence(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        with self.client.pipeline() as pipe:
+            pipe.hmget("chat:connections", user_ids)
+            pipe.hmget("chat:last_seen", user_ids)
+            connections, last_seen = pipe.execute()
+        return {
+            user_id: (int(count or 0) > 0, seen.decode() if seen else None)
+            for user_id, count, seen in zip(user_ids, connections, last_seen)
+        }
+
+
+def _create_chat_state():
+    # Reuse the Redis instance behind the channel layer; anything else gets the in-memory stand-in
+    layer = settings.CHANNEL_LAYERS.get('default', {})
+    redis_url = getattr(settings, 'CHAT_STATE_REDIS_URL', None)
+    if not redis_url and layer.get('BACKEND', '').startswith('channels_redis.'):
+        host = layer.get('CONFIG', {}).get('hosts', [('127.0.0.1', 6379)])[0]
+        redis_url = host if isinstance(host, str) else f"redis://{host[0]}:{host[1]}/0"
+    if not redis_url:
+        return InMemoryChatState()
+
+    import redis
+    return RedisChatState(redis.Redis.from_url(redis_url))
+
+
+_chat_state = None
+
+
+def get_chat_state():
+    global _chat_state
+    if _chat_state is None:
+        _chat_state = _create_chat_state()
+    return _chat_state
+
+
+def get_unread_counts(user_id, friend_ids):
+    """Unread counts per friend, loading them from chat.Message the first time a user is seen."""
+    from .models import Message
+
+    state = get_chat_state()
+    counts = state.unread_counts(user_id, friend_ids)
+    if counts is None:
+        seeded = dict(
+            Message.objects.filter(receiver_id=user_id, is_read=False)
+            .order_by()
+            .values_list('sender_id')
+            .annotate(unread=Count('id'))
+        )
+        state.seed_unread(user_id, seeded)
+        counts = {friend_id: seeded.get(friend_id, 0) for friend_id in friend_ids}
+    return counts
+
+
+def update_chat_state(method, *args):
+    """
+    Apply one state update (e.g. ``update_chat_state('increment_unread', user_id, friend_id)``).
+    Counters are advisory, so an unavailable store is logged rather than failing the caller.
+    """
+    try:
+        getattr(get_chat_state(), method)(*args)
+    except Exception:
+        logger.exception("Chat state update %s%r failed", method, args)
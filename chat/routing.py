@@ -2,5 +2,8 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    # One multiplexed socket per user
+    re_path(r'ws/chat/$', consumers.UserConsumer.as_asgi()),
+    # Per-friend socket kept as a compatibility shim
     re_path(r'ws/chat/(?P<friend_id>\d+)/$', consumers.ChatConsumer.as_asgi()),
-]
\ No newline at end of file
+]
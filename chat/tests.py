@@ -1,3 +1,62 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+
+from .buffers import MessageWriteBuffer
+from .models import Message
+
+
+def chat_message(text):
+    return Message(sender_id=1, receiver_id=2, message=text)
+
+
+class MessageWriteBufferTests(SimpleTestCase):
+    def saved_batches(self, bulk_create):
+        return [[message.message for message in call.args[0]] for call in bulk_create.call_args_list]
+
+    def test_failed_batch_is_retried(self):
+        async def run():
+            buffer = MessageWriteBuffer(flush_interval=0.01)
+            await buffer.add(chat_message('hi'))
+            await buffer.flush()
+            await buffer.add(chat_message('there'))
+            await asyncio.sleep(0.1)
+
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=[DatabaseError('down'), None]) as bulk_create:
+            with self.assertLogs('chat.buffers', 'ERROR'):
+                asyncio.run(run())
+        self.assertEqual(self.saved_batches(bulk_create), [['hi'], ['hi', 'there']])
+
+    def test_gives_up_after_max_attempts(self):
+        async def run():
+            buffer = MessageWriteBuffer(flush_interval=60, max_attempts=2)
+            await buffer.add(chat_message('hi'))
+            await buffer.flush()
+            with self.assertRaises(DatabaseError):
+                await buffer.add(chat_message('durable'), durable=True)
+            await buffer.flush()
+            return buffer
+
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=DatabaseError('down')) as bulk_create:
+            with self.assertLogs('chat.buffers', 'ERROR') as logs:
+                buffer = asyncio.run(run())
+        self.assertEqual(self.saved_batches(bulk_create), [['hi'], ['hi', 'durable']])
+        self.assertIn("Dropped 1 chat messages after 2 failed attempts", logs.output[-1])
+        with mock.patch.object(Message.objects, 'bulk_create') as bulk_create:
+            buffer.flush_now()
+        bulk_create.assert_not_called()
+
+    def test_oldest_are_dropped_past_max_pending(self):
+        async def run():
+            buffer = MessageWriteBuffer(flush_interval=60, max_pending=2)
+            for text in ['one', 'two', 'three']:
+                await buffer.add(chat_message(text))
+            return buffer
+
+        with self.assertLogs('chat.buffers', 'ERROR'):
+            buffer = asyncio.run(run())
+        with mock.patch.object(Message.objects, 'bulk_create') as bulk_create:
+            buffer.flush_now()
+        self.assertEqual(self.saved_batches(bulk_create), [['two', 'three']])
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import MessageListView, SendMessageView, MarkMessagesAsReadView
+from .views import InboxView, MessageListView, MessageSearchView, SendMessageView, MarkMessagesAsReadView, ChatStatusView
 
 urlpatterns = [
+    path('messages/inbox/', InboxView.as_view(), name='chat-inbox'),
+    path('messages/search/', MessageSearchView.as_view(), name='message-search'),
+    path('messages/status/', ChatStatusView.as_view(), name='chat-status'),
     path('messages/<int:friend_id>/', MessageListView.as_view(), name='message-list'),
     path('messages/<int:friend_id>/send/', SendMessageView.as_view(), name='send-message'),
     path('messages/<int:friend_id>/mark-read/', MarkMessagesAsReadView.as_view(), name='mark-messages-read'),
@@ -2,30 +2,119 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from core.authentication import CachedJWTAuthentication
 from django.shortcuts import get_object_or_404
 from core.models import User, Friendship
+from .archive import ConversationArchive
 from .models import Message
-from core.serializers import MessageSerializer
+from core.search import parse_search_params, search
+from .pagination import InvalidCursor, encode_cursor, paginate_inbox, paginate_messages, parse_page_size
+from .notifications import send_to_user
+from .presence import get_chat_state, get_unread_counts, update_chat_state
+from core.serializers import ConversationReadSerializer, MessageSerializer, MessageReadSerializer
 from django.db.models import Q
-from datetime import datetime
+from django.utils import timezone
+
+class InboxView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Conversations with accepted friends, most recent activity first: each with the
+        friend, the latest message and the unread count. Page back with ``before``.
+        """
+        try:
+            limit = parse_page_size(request.query_params.get('limit'))
+            conversations, has_more = paginate_inbox(
+                Message.objects.inbox(request.user.id).select_related('sender', 'receiver'),
+                before=request.query_params.get('before'),
+                limit=limit
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ConversationReadSerializer(
+            conversations, many=True, context={'user_id': request.user.id}
+        )
+        return Response({
+            "results": serializer.data,
+            # Pass back as ?before= to load the next page
+            "before": encode_cursor(conversations[-1]) if has_more else None,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
+
+class MessageSearchView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Ranked full-text search over the messages the user sent or received."""
+        try:
+            query, page, limit = parse_search_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits, has_more = search(
+            Message.objects.filter(Q(sender_id=request.user.id) | Q(receiver_id=request.user.id))
+            .select_related('sender', 'receiver'),
+            'message', query, page=page, limit=limit
+        )
+        results = MessageReadSerializer(hits, many=True).data
+        for result, hit in zip(results, hits):
+            result['rank'] = hit.rank
+            result['headline'] = hit.headline
+
+        return Response({
+            "results": results,
+            "page": page,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
 
 class MessageListView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, friend_id):
-        """Get all messages between the authenticated user and the specified friend"""
+        """
+        Get one page of messages between the authenticated user and the specified friend.
+        Without a cursor this is the latest page; ``before`` scrolls back and ``after``
+        fetches newer messages, using the cursors returned with each page.
+        """
         friend = get_object_or_404(User, id=friend_id)
         if not self.are_friends(request.user, friend):
             return Response({"error": "You are not friends with this user."}, status=status.HTTP_403_FORBIDDEN)
 
-        messages = Message.objects.filter(
-            (Q(sender=request.user, receiver=friend) | Q(sender=friend, receiver=request.user))
-        ).order_by('timestamp')
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+        try:
+            limit = parse_page_size(request.query_params.get('limit'))
+            messages, has_more = paginate_messages(
+                Message.objects.between(request.user.id, friend.id).select_related('sender', 'receiver'),
+                before=before,
+                after=after,
+                limit=limit,
+                archive=ConversationArchive(
+                    request.user.id, friend.id, users={request.user.id: request.user, friend.id: friend}
+                )
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if after:
+            has_older, has_newer = True, has_more
+        else:
+            has_older, has_newer = has_more, bool(before)
 
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = MessageReadSerializer(messages, many=True)
+        return Response({
+            "results": serializer.data,
+            # Pass back as ?before= to load older messages / ?after= to load newer ones
+            "before": encode_cursor(messages[0]) if messages and has_older else None,
+            "after": encode_cursor(messages[-1]) if messages else after,
+            "has_older": has_older,
+            "has_newer": has_newer,
+        }, status=status.HTTP_200_OK)
 
     def are_friends(self, user1, user2):
         """Check if two users are friends"""
@@ -35,7 +124,7 @@ class MessageListView(APIView):
         ).exists()
 
 class SendMessageView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, friend_id):
@@ -58,14 +147,16 @@ class SendMessageView(APIView):
             sender=request.user,
             receiver=friend,
             message=message_text,
-            timestamp=datetime.now()
+            timestamp=timezone.now()
         )
 
+        update_chat_state('increment_unread', friend.id, request.user.id)
+
         serializer = MessageSerializer(message)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 class MarkMessagesAsReadView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, friend_id):
@@ -76,8 +167,48 @@ class MarkMessagesAsReadView(APIView):
             sender=friend,
             is_read=False
         ).update(is_read=True)
-        
+        update_chat_state('clear_unread', request.user.id, friend.id)
+
+        # Read receipt for both users' multiplexed sockets
+        event = {
+            'type': 'chat.read',
+            'reader_id': request.user.id,
+            'sender_id': friend.id,
+            'messages_updated': updated
+        }
+        send_to_user(friend.id, event)
+        send_to_user(request.user.id, event)
+
         return Response({
             "status": "success",
             "messages_updated": updated
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+class ChatStatusView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Unread count and online/last-seen presence for every accepted friend."""
+        try:
+            friend_ids = [
+                friend_id if user_id == request.user.id else user_id
+                for user_id, friend_id in Friendship.objects.filter(
+                    Q(user_id=request.user.id) | Q(friend_id=request.user.id),
+                    status="Accepted"
+                ).values_list('user_id', 'friend_id')
+            ]
+            unread = get_unread_counts(request.user.id, friend_ids)
+            presence = get_chat_state().presence(friend_ids)
+
+            return Response([
+                {
+                    "friend_id": friend_id,
+                    "unread": unread.get(friend_id, 0),
+                    "online": presence[friend_id][0],
+                    "last_seen": presence[friend_id][1],
+                }
+                for friend_id in friend_ids
+            ], status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,129 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+# Seconds a resolved user stays in the shared cache; every User save/delete evicts it
+AUTH_USER_CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 300)
+# Seconds a resolved user stays in this process. Other workers can't be told about
+# changes, so this bounds how stale a user can be across processes.
+AUTH_USER_LOCAL_TTL = getattr(settings, 'AUTH_USER_LOCAL_TTL', 5)
+AUTH_USER_LOCAL_MAX_ENTRIES = 10000
+
+# Claims added to issued tokens so request.user can answer them without a lookup
+TOKEN_USER_CLAIMS = ('username',)
+
+USER_FIELD_NAMES = [field.attname for field in User._meta.concrete_fields]
+
+# user_id -> (expires_at, row values)
+_local_users = {}
+
+
+def _cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def get_tokens_for_user(user):
+    """RefreshToken for ``user`` that also carries TOKEN_USER_CLAIMS (copied into its access tokens)."""
+    refresh = RefreshToken.for_user(user)
+    for claim in TOKEN_USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+def get_cached_user(user_id):
+    """
+    Return the User with ``user_id`` from the process cache, then the shared
+    cache, then the database. Returns None if the user doesn't exist.
+    Every call builds a fresh instance, so callers may modify and save it.
+    """
+    now = time.monotonic()
+    entry = _local_users.get(user_id)
+    if entry is not None and entry[0] > now:
+        values = entry[1]
+    else:
+        values = cache.get(_cache_key(user_id))
+        if values is None:
+            values = User.objects.filter(pk=user_id).values_list(*USER_FIELD_NAMES).first()
+            if values is None:
+                return None
+            cache.set(_cache_key(user_id), values, AUTH_USER_CACHE_TTL)
+
+        if len(_local_users) >= AUTH_USER_LOCAL_MAX_ENTRIES:
+            _local_users.clear()
+        _local_users[user_id] = (now + AUTH_USER_LOCAL_TTL, values)
+
+    return User.from_db(DEFAULT_DB_ALIAS, USER_FIELD_NAMES, values)
+
+
+def invalidate_cached_user(user_id):
+    _local_users.pop(user_id, None)
+    cache.delete(_cache_key(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_user_on_change(sender, instance, **kwargs):
+    # QuerySet.update() bypasses signals; callers doing bulk updates on users must invalidate themselves
+    invalidate_cached_user(instance.pk)
+
+
+class LazyTokenUser(SimpleLazyObject):
+    """
+    request.user that answers ``id``/``pk`` and TOKEN_USER_CLAIMS straight from the
+    token and only resolves the User (through the cache) when anything else is used.
+    """
+
+    def __init__(self, validated_token, func):
+        self.__dict__['_token'] = validated_token
+        super().__init__(func)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            if name in ('id', 'pk'):
+                return self._token[api_settings.USER_ID_CLAIM]
+            if name in TOKEN_USER_CLAIMS and name in self._token:
+                return self._token[name]
+        return super().__getattr__(name)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User SELECT. The user is resolved
+    lazily from get_cached_user, with the same not-found/inactive/revoked checks.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return LazyTokenUser(validated_token, lambda: self._resolve_user(validated_token, user_id))
+
+    def _resolve_user(self, validated_token, user_id):
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
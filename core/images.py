@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PICTURE_DIR = 'profile_pics'
+
+# Longest edge in pixels for each resized copy
+PROFILE_PICTURE_VARIANT_SIZES = getattr(settings, 'PROFILE_PICTURE_VARIANT_SIZES', {
+    'thumb': 128,
+    'medium': 512,
+})
+
+_variant_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PROFILE_PICTURE_WORKERS', 2),
+    thread_name_prefix='pfp-variants'
+)
+
+
+def _variant_name(name, variant):
+    stem = os.path.splitext(name)[0]
+    return f"{stem}_{variant}.jpg"
+
+
+def store_profile_picture(upload):
+    """
+    Stream ``upload`` to disk chunk by chunk and file it under the SHA-256 of
+    its content, so identical uploads share one file. Returns the storage name.
+    Raises ValueError if the upload isn't an image Pillow can read.
+    """
+    directory = default_storage.path(PROFILE_PICTURE_DIR)
+    os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='.incoming-', delete=False) as temp_file:
+        for chunk in upload.chunks():
+            digest.update(chunk)
+            temp_file.write(chunk)
+
+    try:
+        try:
+            with Image.open(temp_file.name) as image:
+                image_format = image.format
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError) as e:
+            raise ValueError("Uploaded file is not a valid image.") from e
+
+        extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+        name = f"{PROFILE_PICTURE_DIR}/{digest.hexdigest()}.{extension}"
+        if not default_storage.exists(name):
+            os.replace(temp_file.name, default_storage.path(name))
+        return name
+    finally:
+        if os.path.exists(temp_file.name):
+            os.remove(temp_file.name)
+
+
+def existing_profile_picture_variants(name):
+    """Variants of ``name`` that are already on disk (e.g. from a deduplicated upload)."""
+    return {
+        variant: _variant_name(name, variant)
+        for variant in PROFILE_PICTURE_VARIANT_SIZES
+        if default_storage.exists(_variant_name(name, variant))
+    }
+
+
+def _render_variant(name, variant, size):
+    target = _variant_name(name, variant)
+    if default_storage.exists(target):
+        return target
+
+    target_path = default_storage.path(target)
+    with Image.open(default_storage.path(name)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        # Write next to the target and rename so readers never see a partial file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(target_path), prefix='.incoming-', delete=False) as temp_file:
+            image.convert('RGB').save(temp_file, 'JPEG', quality=85, optimize=True)
+    os.replace(temp_file.name, target_path)
+    return target
+
+
+def _generate_variants(user_id, name):
+    from .authentication import invalidate_cached_user
+    from .models import User
+
+    close_old_connections()
+    variants = {}
+    for variant, size in PROFILE_PICTURE_VARIANT_SIZES.items():
+        try:
+            variants[variant] = _render_variant(name, variant, size)
+        except Exception:
+            logger.exception("Could not render %s variant of %s", variant, name)
+
+    # Only record the variants if the user hasn't uploaded another picture meanwhile
+    User.objects.filter(pk=user_id, profile_picture=name).update(profile_picture_variants=variants)
+    invalidate_cached_user(user_id)
+    close_old_connections()
+
+
+def schedule_profile_picture_variants(user_id, name):
+    """Render the resized copies of ``name`` on the worker pool and attach them to the user."""
+    return _variant_pool.submit(_generate_variants, user_id, name)
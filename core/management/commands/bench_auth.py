@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.authentication import CachedJWTAuthentication, get_tokens_for_user
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request authentication overhead of simplejwt's JWTAuthentication "
+        "against CachedJWTAuthentication, including resolving request.user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help="User to issue the token for (defaults to the first user)")
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(pk=options['user_id']).first() if options['user_id'] else User.objects.first()
+        if user is None:
+            raise CommandError("No user to authenticate as")
+
+        access = str(get_tokens_for_user(user).access_token)
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {access}")
+        count = options['requests']
+
+        for name, authenticator in (('JWTAuthentication', JWTAuthentication()),
+                                    ('CachedJWTAuthentication', CachedJWTAuthentication())):
+            # One warm-up request so the cached path is measured in its steady state
+            authenticator.authenticate(request)[0].is_active
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(count):
+                    request_user, _token = authenticator.authenticate(request)
+                    request_user.is_active  # what IsAuthenticated + the view would touch
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:<24} {elapsed / count * 1e6:8.1f} us/request  "
+                f"{len(queries) / count:.2f} queries/request"
+            )
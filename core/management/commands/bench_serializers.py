@@ -0,0 +1,76 @@
+import time
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from chat.models import Message
+from core.models import Friendship, Task, User
+from core.renderers import ORJSONRenderer
+from core.serializers import (
+    FriendshipReadSerializer, FriendshipSerializer, MessageReadSerializer, MessageSerializer,
+    TaskReadSerializer, TaskSerializer
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stock ModelSerializer + JSONRenderer path against the hand-written "
+        "read serializers + ORJSONRenderer on in-memory payloads. Fails if the bytes differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Objects per payload")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per variant (best is reported)")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        now = timezone.now()
+        alice = User(id=1, username='alice', email='alice@example.com', first_name='Alice', last_name='Ä',
+                     profile_picture='profile_pics/alice.jpg',
+                     profile_picture_variants={'thumb': 'profile_pics/alice_thumb.jpg'})
+        bob = User(id=2, username='bob', email='bob@example.com', first_name='Bob', last_name='')
+
+        payloads = {
+            'tasks': (TaskSerializer, TaskReadSerializer, [
+                Task(id=i, user=alice, task_name=f"Task {i}  ", description=None if i % 2 else "desc",
+                     time_required=timedelta(minutes=i % 180) if i % 3 else None,
+                     days_associated=['Monday', 'Friday'], priority='High', created_at=now,
+                     is_fixed_time=bool(i % 2), fixed_time_slot=dt_time(8, 30) if i % 2 else None)
+                for i in range(rows)
+            ]),
+            'messages': (MessageSerializer, MessageReadSerializer, [
+                Message(id=i, sender=alice if i % 2 else bob, receiver=bob if i % 2 else alice,
+                        message=f"hello {i} 👋", timestamp=now - timedelta(seconds=i), is_read=bool(i % 3))
+                for i in range(rows)
+            ]),
+            'friendships': (FriendshipSerializer, FriendshipReadSerializer, [
+                Friendship(id=i, user=alice if i % 2 else bob, friend=bob if i % 2 else alice,
+                           status='Accepted', created_at=now)
+                for i in range(rows)
+            ]),
+        }
+
+        for name, (model_serializer, read_serializer, objects) in payloads.items():
+            baseline, baseline_time = self._run(
+                lambda: JSONRenderer().render(model_serializer(objects, many=True).data), repeat
+            )
+            fast, fast_time = self._run(
+                lambda: ORJSONRenderer().render(read_serializer(objects, many=True).data), repeat
+            )
+            if fast != baseline:
+                raise CommandError(f"{name}: rendered output differs from the ModelSerializer baseline")
+            self.stdout.write(
+                f"{name:<12} {rows} rows  baseline {baseline_time * 1000:8.2f} ms  "
+                f"fast {fast_time * 1000:8.2f} ms  speedup {baseline_time / fast_time:5.1f}x  (identical bytes)"
+            )
+
+    def _run(self, render, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return output, best
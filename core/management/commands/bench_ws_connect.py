@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.management.base import BaseCommand, CommandError
+
+from core import middleware
+from core.authentication import get_tokens_for_user, invalidate_cached_user
+from core.middleware import JWTAuthMiddleware
+from core.models import User
+
+
+async def accept_authenticated(scope, receive, send):
+    """Stand-in consumer: accepts authenticated handshakes, rejects the rest."""
+    await receive()
+    if scope['user'].is_authenticated:
+        await send({'type': 'websocket.accept'})
+    else:
+        await send({'type': 'websocket.close'})
+
+
+class Command(BaseCommand):
+    help = (
+        "WebSocket handshake rate through JWTAuthMiddleware, with the token and user caches "
+        "cleared before every connect (cold) and kept warm (reconnect storm)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help="User to issue the token for (defaults to the first user)")
+        parser.add_argument('--connects', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(pk=options['user_id']).first() if options['user_id'] else User.objects.first()
+        if user is None:
+            raise CommandError("No user to authenticate as")
+
+        access = str(get_tokens_for_user(user).access_token)
+        application = JWTAuthMiddleware(accept_authenticated)
+
+        for name, cold in (('cold', True), ('cached', False)):
+            elapsed = asyncio.run(self._run(application, user, access, options['connects'],
+                                            options['concurrency'], cold))
+            self.stdout.write(
+                f"{name:<7} {options['connects']} connects  {options['connects'] / elapsed:10.0f} connects/s  "
+                f"({elapsed / options['connects'] * 1e6:.0f} us each)"
+            )
+
+    async def _connect(self, application, access, user, cold):
+        if cold:
+            middleware._validated_tokens.clear()
+            invalidate_cached_user(user.id)
+        communicator = ApplicationCommunicator(application, {
+            'type': 'websocket', 'path': '/ws/chat/', 'headers': [],
+            'query_string': f"token={access}".encode(), 'subprotocols': [],
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        response = await communicator.receive_output(timeout=5)
+        if response['type'] != 'websocket.accept':
+            raise CommandError("Handshake was rejected")
+        await communicator.wait(timeout=5)
+
+    async def _run(self, application, user, access, count, concurrency, cold):
+        # One warm-up connect so both runs start with the thread pool and connection open
+        await self._connect(application, access, user, cold)
+
+        started = time.perf_counter()
+        for offset in range(0, count, concurrency):
+            await asyncio.gather(*(
+                self._connect(application, access, user, cold)
+                for _ in range(min(concurrency, count - offset))
+            ))
+        return time.perf_counter() - started
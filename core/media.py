@@ -0,0 +1,124 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# Browsers/CDNs may keep media this many seconds; uploads get new (content-hashed) names instead of changing
+MEDIA_CACHE_MAX_AGE = getattr(settings, 'MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 365)
+# None (stream from Python), 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd)
+MEDIA_SENDFILE_BACKEND = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+# Internal nginx location that maps onto MEDIA_ROOT, used with x-accel-redirect
+MEDIA_ACCEL_REDIRECT_PREFIX = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
+RANGE_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _parse_range(header, size):
+    """
+    (start, end) byte positions, inclusive, for a single-range ``Range`` header.
+    None means "send the whole file" (no/unsupported header); raises ValueError
+    when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT with validators, long-lived caching and byte
+    ranges. When MEDIA_SENDFILE_BACKEND is set the body is left to the front
+    server; otherwise whole files go through FileResponse (wsgi.file_wrapper).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404("Media file not found")
+    if not stat.S_ISREG(file_stat.st_mode) or os.path.basename(full_path).startswith('.'):
+        raise Http404("Media file not found")
+
+    size = file_stat.st_size
+    etag = '"%x-%x"' % (file_stat.st_mtime_ns, size)
+    last_modified = int(file_stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = f"public, max-age={MEDIA_CACHE_MAX_AGE}"
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if MEDIA_SENDFILE_BACKEND:
+        # The front server handles the body and any Range itself
+        response = HttpResponse(content_type=content_type)
+        if MEDIA_SENDFILE_BACKEND == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = MEDIA_ACCEL_REDIRECT_PREFIX + path.lstrip('/')
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        # A stale If-Range means the client's partial copy is outdated: send the whole file
+        if not if_range or if_range == etag or parse_http_date_safe(if_range) == last_modified:
+            try:
+                byte_range = _parse_range(request.headers.get('Range'), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f"bytes */{size}"
+                return response
+
+        if byte_range is None:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(full_path, start, length), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+            response['Content-Length'] = str(length)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = f"public, max-age={MEDIA_CACHE_MAX_AGE}"
+    return response
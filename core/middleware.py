@@ -0,0 +1,89 @@
+import time
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import CachedJWTAuthentication
+
+# Subprotocol browsers can use to send the token: new WebSocket(url, ["jwt", token])
+JWT_SUBPROTOCOL = 'jwt'
+JWT_QUERY_PARAM = 'token'
+VALIDATED_TOKEN_MAX_ENTRIES = 10000
+
+# raw token -> (expires_at, validated token), kept until the token itself expires
+_validated_tokens = {}
+
+_authenticator = CachedJWTAuthentication()
+
+
+def _raw_token(scope):
+    """The access token from the query string, the subprotocol list or an Authorization header."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get(JWT_QUERY_PARAM):
+        return query[JWT_QUERY_PARAM][0], None
+
+    subprotocols = scope.get('subprotocols') or []
+    if JWT_SUBPROTOCOL in subprotocols:
+        index = subprotocols.index(JWT_SUBPROTOCOL)
+        if index + 1 < len(subprotocols):
+            return subprotocols[index + 1], JWT_SUBPROTOCOL
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1], None
+    return None, None
+
+
+def get_validated_token(raw_token):
+    """Validate ``raw_token`` once and reuse the result for the rest of its lifetime."""
+    now = time.time()
+    entry = _validated_tokens.get(raw_token)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    validated_token = _authenticator.get_validated_token(raw_token)
+    if len(_validated_tokens) >= VALIDATED_TOKEN_MAX_ENTRIES:
+        _validated_tokens.clear()
+    _validated_tokens[raw_token] = (validated_token['exp'], validated_token)
+    return validated_token
+
+
+@database_sync_to_async
+def get_scope_user(raw_token):
+    """User for a WebSocket handshake, or AnonymousUser if the token is missing or rejected."""
+    if raw_token is None:
+        return AnonymousUser()
+    try:
+        validated_token = get_validated_token(raw_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        # Goes through the evicting user cache, so deactivations and password changes still apply
+        return _authenticator._resolve_user(validated_token, user_id)
+    except (InvalidToken, AuthenticationFailed, KeyError):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Populates scope["user"] from a SimpleJWT access token instead of the session.
+    A token sent as a subprotocol is echoed back on accept, as browsers require.
+    """
+
+    async def __call__(self, scope, receive, send):
+        raw_token, subprotocol = _raw_token(scope)
+        scope = dict(scope, user=await get_scope_user(raw_token))
+
+        if subprotocol is not None:
+            inner_send = send
+
+            async def send(message):
+                if message['type'] == 'websocket.accept' and not message.get('subprotocol'):
+                    message = dict(message, subprotocol=subprotocol)
+                await inner_send(message)
+
+        return await super().__call__(scope, receive, send)
@@ -17,6 +17,8 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    # Resized copies of profile_picture, e.g. {"thumb": "profile_pics/<hash>_thumb.jpg"}
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return self.username
@@ -28,6 +30,16 @@ class User(AbstractUser):
             return self.profile_picture.url
         return None # Or return URL to a default image on the server
 
+    def get_profile_picture_name(self, variant=None):
+        """Storage name of the requested size variant, falling back to the original upload."""
+        if variant and self.profile_picture_variants.get(variant):
+            return self.profile_picture_variants[variant]
+        return self.profile_picture.name or ''
+
+    def get_profile_picture_url(self, variant=None):
+        name = self.get_profile_picture_name(variant)
+        return self.profile_picture.storage.url(name) if name else None
+
 # Hobbies Table
 class Hobby(models.Model):
     name = models.CharField(max_length=150)
@@ -0,0 +1,91 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+
+# Text search configuration; the search_vector triggers in the migrations use the same one
+SEARCH_CONFIG = 'english'
+SEARCH_PAGE_SIZE = getattr(settings, 'SEARCH_PAGE_SIZE', 20)
+SEARCH_PAGE_SIZE_MAX = 100
+# Without PostgreSQL only this many of the newest matches are ranked
+SEARCH_FALLBACK_MAX_CANDIDATES = getattr(settings, 'SEARCH_FALLBACK_MAX_CANDIDATES', 1000)
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+SNIPPET_CHARS = 160
+
+_token_re = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _token_re.findall(text.lower())
+
+
+def parse_search_params(params):
+    """(query, page, limit) from request query params; raises ValueError on bad input."""
+    query = (params.get('q') or '').strip()
+    if not query:
+        raise ValueError("q is required.")
+    try:
+        page = max(1, int(params.get('page') or 1))
+        limit = max(1, min(int(params.get('limit') or SEARCH_PAGE_SIZE), SEARCH_PAGE_SIZE_MAX))
+    except ValueError:
+        raise ValueError("page and limit must be numbers.")
+    return query, page, limit
+
+
+def search(queryset, field, query, page=1, limit=SEARCH_PAGE_SIZE):
+    """
+    Rank rows of ``queryset`` whose ``field`` matches ``query``, best first.
+
+    On PostgreSQL this uses the model's trigger-maintained ``search_vector`` column
+    and its GIN index; elsewhere it falls back to token matching over the newest
+    rows. Returns (hits, has_more); every hit has ``rank`` and a ``headline``
+    snippet with matches wrapped in HIGHLIGHT_START/HIGHLIGHT_STOP.
+    """
+    offset = (page - 1) * limit
+    if connections[queryset.db].vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        hits = list(queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            headline=SearchHeadline(
+                field, search_query, config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP, max_fragments=2
+            ),
+        ).order_by('-rank', '-id')[offset:offset + limit + 1])
+    else:
+        hits = _fallback_search(queryset, field, query)[offset:offset + limit + 1]
+    return hits[:limit], len(hits) > limit
+
+
+def _fallback_search(queryset, field, query):
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return []
+
+    condition = Q()
+    for token in tokens:
+        condition &= Q(**{f'{field}__icontains': token})
+    hits = list(queryset.filter(condition).order_by('-id')[:SEARCH_FALLBACK_MAX_CANDIDATES])
+
+    for hit in hits:
+        text = getattr(hit, field)
+        words = tokenize(text)
+        # Whole-word occurrences; substring-only matches still qualify with rank 0
+        hit.rank = float(sum(words.count(token) for token in tokens))
+        hit.headline = highlight(text, tokens)
+    # Stable sort keeps newer messages first among equal ranks
+    hits.sort(key=lambda hit: -hit.rank)
+    return hits
+
+
+def highlight(text, tokens):
+    """A snippet of ``text`` around the first match with every token occurrence marked."""
+    pattern = re.compile('|'.join(re.escape(token) for token in tokens), re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - SNIPPET_CHARS // 4) if first else 0
+    end = min(len(text), start + SNIPPET_CHARS)
+    snippet = pattern.sub(lambda match: f"{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_STOP}", text[start:end])
+    return f"{'...' if start else ''}{snippet}{'...' if end < len(text) else ''}"
@@ -1,7 +1,14 @@
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.duration import duration_string
 from rest_framework import serializers
 from .models import Task, User, Friendship
+from .signals import tasks_bulk_changed
 from chat.models import Message
 
+# Rows per INSERT/UPDATE statement for batch task writes
+TASK_BULK_BATCH_SIZE = 500
+
 
 class SignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -26,21 +33,48 @@ class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
 
+class ProfilePictureField(serializers.ImageField):
+    """Read-only URL of a profile picture size variant, falling back to the original."""
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = value.instance.get_profile_picture_url(self.variant)
+        request = self.context.get('request', None)
+        return request.build_absolute_uri(url) if request is not None else url
+
+
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture = ProfilePictureField(variant='medium')
+
     class Meta:
         model = User
         fields = ['id', 'first_name', 'last_name', 'username', 'email', 'profile_picture']  # Include necessary fields
 
+
+# Same payload for lists and chat bubbles, where the thumbnail is enough
+class UserSummarySerializer(UserSerializer):
+    profile_picture = ProfilePictureField(variant='thumb')
+
 class FriendshipSerializer(serializers.ModelSerializer):
     sender_username = serializers.CharField(source="user.username", read_only=True)
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
-    profile_picture = serializers.CharField(source="user.profile_picture", read_only=True)
+    profile_picture = serializers.SerializerMethodField()
 
     class Meta:
         model = Friendship
         fields = ['id', 'user', 'friend', 'sender_username', 'status', 'created_at', 'first_name', 'last_name', 'profile_picture']
 
+    def get_profile_picture(self, friendship):
+        # Storage name (not URL) of the sender's thumbnail, as this payload always carried
+        return friendship.user.get_profile_picture_name('thumb')
+
 
 # Serializer for the Task model
 class TaskSerializer(serializers.ModelSerializer):
@@ -48,9 +82,68 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = '__all__'
 
+
+class TaskBulkListSerializer(serializers.ListSerializer):
+    """Writes a whole batch of validated tasks with one bulk query."""
+
+    def run_child_validation(self, data):
+        # On updates every row must point at one of the tasks being edited
+        if self.instance is not None:
+            if not hasattr(self, '_tasks_by_id'):
+                self._tasks_by_id = {task.id: task for task in self.instance}
+            task_id = data.get('id') if isinstance(data, dict) else None
+            try:
+                task = self._tasks_by_id.get(int(task_id))
+            except (TypeError, ValueError):
+                task = None
+            if task is None:
+                raise serializers.ValidationError({"id": [f"Task {task_id} not found."]})
+            self.child.instance = task
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        user_id = self.context['user_id']
+        tasks = []
+        for item in validated_data:
+            item.pop('id', None)  # ids are assigned by the database on create
+            tasks.append(Task(user_id=user_id, **item))
+        tasks = Task.objects.bulk_create(tasks, batch_size=TASK_BULK_BATCH_SIZE)
+        tasks_bulk_changed.send(sender=Task, user_ids={user_id})
+        return tasks
+
+    def update(self, instance, validated_data):
+        tasks_by_id = {task.id: task for task in instance}
+        updated_tasks = []
+        updated_fields = set()
+        for item in validated_data:
+            task = tasks_by_id[item.pop('id')]
+            for attr, value in item.items():
+                setattr(task, attr, value)
+                updated_fields.add(attr)
+            updated_tasks.append(task)
+
+        if updated_fields:
+            Task.objects.bulk_update(updated_tasks, list(updated_fields), batch_size=TASK_BULK_BATCH_SIZE)
+            tasks_bulk_changed.send(sender=Task, user_ids={task.user_id for task in updated_tasks})
+        return updated_tasks
+
+
+class TaskBulkSerializer(serializers.ModelSerializer):
+    """
+    Per-row serializer for batch task writes. The owner comes from the URL
+    (passed as ``user_id`` in the context) so rows never hit the DB to resolve it.
+    """
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Task
+        exclude = ['user']
+        read_only_fields = ['created_at']
+        list_serializer_class = TaskBulkListSerializer
+
 class MessageSerializer(serializers.ModelSerializer):
-    sender = UserSerializer(read_only=True)
-    receiver = UserSerializer(read_only=True)
+    sender = UserSummarySerializer(read_only=True)
+    receiver = UserSummarySerializer(read_only=True)
 
     class Meta:
         model = Message
@@ -59,4 +152,141 @@ class MessageSerializer(serializers.ModelSerializer):
 class ProfilePictureSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['profile_picture']
\ No newline at end of file
+        fields = ['profile_picture']
+
+
+# Hand-written read-only serializers for the hot list endpoints. Each one emits
+# exactly what its ModelSerializer counterpart above does, minus the per-field
+# introspection; bench_serializers checks the rendered bytes stay identical.
+
+def _datetime_representation(value, tz):
+    """Same output as DRF's DateTimeField: ISO 8601 in ``tz``, UTC as 'Z'."""
+    if not value:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(tz)
+    else:
+        value = timezone.make_aware(value, tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _profile_picture_url(user, variant, request=None):
+    """Same output as ProfilePictureField."""
+    if not user.profile_picture:
+        return None
+    url = user.get_profile_picture_url(variant)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class _ReadSerializer(serializers.BaseSerializer):
+    @cached_property
+    def current_timezone(self):
+        # Looked up once per list rather than once per row
+        return timezone.get_current_timezone()
+
+
+class UserReadSerializer(_ReadSerializer):
+    """Matches UserSummarySerializer."""
+
+    def to_representation(self, user):
+        return {
+            'id': user.id,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'username': user.username,
+            'email': user.email,
+            'profile_picture': _profile_picture_url(user, 'thumb', self.context.get('request')),
+        }
+
+
+class TaskReadSerializer(_ReadSerializer):
+    def to_representation(self, task):
+        return {
+            'id': task.id,
+            'task_name': task.task_name,
+            'description': task.description,
+            'time_required': duration_string(task.time_required) if task.time_required is not None else None,
+            'days_associated': task.days_associated,
+            'priority': task.priority,
+            'created_at': _datetime_representation(task.created_at, self.current_timezone),
+            'is_fixed_time': task.is_fixed_time,
+            'fixed_time_slot': task.fixed_time_slot.isoformat() if task.fixed_time_slot is not None else None,
+            'user': task.user_id,
+            'routine': task.routine_id,
+        }
+
+
+class MessageReadSerializer(_ReadSerializer):
+    """Expects sender/receiver to be select_related; a conversation only has two users,
+    so each user payload is built once per list and reused."""
+
+    def _user(self, user):
+        cache = self.__dict__.setdefault('_user_cache', {})
+        if user.id not in cache:
+            cache[user.id] = UserReadSerializer(user, context=self.context).data
+        return cache[user.id]
+
+    def to_representation(self, message):
+        return {
+            'id': message.id,
+            'sender': self._user(message.sender),
+            'receiver': self._user(message.receiver),
+            'message': message.message,
+            'timestamp': _datetime_representation(message.timestamp, self.current_timezone),
+            'is_read': message.is_read,
+        }
+
+
+class ConversationReadSerializer(_ReadSerializer):
+    """One inbox row from ``Message.objects.inbox()``. Expects sender/receiver to be
+    select_related and the viewing user's id as ``user_id`` in the context."""
+
+    def to_representation(self, message):
+        friend = message.receiver if message.sender_id == self.context['user_id'] else message.sender
+        return {
+            'friend': UserReadSerializer(context=self.context).to_representation(friend),
+            'last_message': {
+                'id': message.id,
+                'sender_id': message.sender_id,
+                'message': message.message,
+                'timestamp': _datetime_representation(message.timestamp, self.current_timezone),
+                'is_read': message.is_read,
+            },
+            'unread': message.unread,
+        }
+
+
+class FriendshipReadSerializer(_ReadSerializer):
+    """Expects ``user`` to be select_related."""
+
+    def to_representation(self, friendship):
+        sender = friendship.user
+        return {
+            'id': friendship.id,
+            'user': friendship.user_id,
+            'friend': friendship.friend_id,
+            'sender_username': sender.username,
+            'status': friendship.status,
+            'created_at': _datetime_representation(friendship.created_at, self.current_timezone),
+            'first_name': sender.first_name,
+            'last_name': sender.last_name,
+            'profile_picture': sender.get_profile_picture_name('thumb'),
+        }
+
+
+def routine_with_completion(routine_data, completions):
+    """
+    Copy of ``routine_data`` with ``is_completed`` set on every activity.
+    ``completions`` is an iterable of (day, activity_name, is_completed) rows.
+    """
+    completion_status = {(day, activity_name): is_completed for day, activity_name, is_completed in completions}
+    return {
+        day: [
+            {**activity, 'is_completed': completion_status.get((day, activity['activity']), False)}
+            for activity in activities
+        ]
+        for day, activities in routine_data.items()
+    }
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent with ``user_ids`` after bulk task writes, which send no post_save / post_delete
+tasks_bulk_changed = Signal()
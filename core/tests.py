@@ -1,3 +1,23 @@
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import User
+
+
+class UserTasksBulkViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='bulk', email='bulk@example.com', password='x')
+        self.client.force_authenticate(self.user)
+        self.task = {'task_name': 'gym', 'time_required': '01:00:00', 'priority': 'Low'}
+
+    def test_creates_tasks(self):
+        response = self.client.post(reverse('user-tasks-bulk', args=[self.user.id]), [self.task], format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_unknown_user_is_not_found(self):
+        for method, name in [('post', 'user-tasks-bulk'), ('put', 'user-tasks-bulk'), ('post', 'user-tasks-import')]:
+            with self.subTest(method=method, name=name):
+                response = getattr(self.client, method)(reverse(name, args=[999999]), [self.task], format='json')
+                self.assertEqual(response.status_code, 404)
@@ -2,13 +2,16 @@ from django.urls import path
 from .views import (
     MarkActivityCompletedView, RefreshTokenView, RemoveActivityFromRoutineView,
     SignupView, LoginView, UserRoutineView, UserTaskDetailView, UserTasksView,
-    UploadUserPfp, FriendsListView
+    UploadUserPfp, FriendsListView, UserTasksBulkView, UserTasksImportView, UserTasksExportView
 )
 urlpatterns = [
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', LoginView.as_view(), name='login'),
     path('refresh-token/', RefreshTokenView.as_view(), name='refresh-token'),
     path('users/<int:user_id>/tasks/', UserTasksView.as_view(), name='user-tasks'), 
+    path('users/<int:user_id>/tasks/bulk/', UserTasksBulkView.as_view(), name='user-tasks-bulk'),
+    path('users/<int:user_id>/tasks/import/', UserTasksImportView.as_view(), name='user-tasks-import'),
+    path('users/<int:user_id>/tasks/export/', UserTasksExportView.as_view(), name='user-tasks-export'),
     path('users/<int:user_id>/tasks/<int:task_id>/', UserTaskDetailView.as_view(), name='user-task-detail'),
     path('users/<int:user_id>/update-task/<int:task_id>/', UserTaskDetailView.as_view(), name='user-task-update'),
     path('user-routine/', UserRoutineView.as_view(), name='user-routines'),
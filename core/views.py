@@ -7,11 +7,25 @@ from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 # from .models import Routine, RoutineActivityCompletion, Task, User, UserRoutine  # Import your custom User model
 from .models import Routine, RoutineActivityCompletion, Task, User, UserRoutine, Friendship  # Import your custom User model
-from .serializers import SignupSerializer, LoginSerializer, TaskSerializer
+from .serializers import (
+    SignupSerializer, LoginSerializer, TaskSerializer, TaskBulkSerializer, TaskReadSerializer,
+    routine_with_completion
+)
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import CachedJWTAuthentication, get_tokens_for_user
+from chat.notifications import notify_user
+from .images import (
+    PROFILE_PICTURE_VARIANT_SIZES, existing_profile_picture_variants, schedule_profile_picture_variants,
+    store_profile_picture
+)
 from rest_framework import serializers
-from django.db import models
+from django.db import models, transaction
+from django.http import HttpResponse
+from django.utils.duration import duration_string
+import csv
+import io
+import json
+import re
 
 # Signup View
 class SignupView(APIView):
@@ -37,7 +51,7 @@ class LoginView(APIView):
 
         if user:
             # Generate refresh and access tokens for the authenticated user
-            refresh = RefreshToken.for_user(user)
+            refresh = get_tokens_for_user(user)
 
             # Return the response with tokens and user data
             return Response({
@@ -88,7 +102,7 @@ class RefreshTokenView(APIView):
             )
 
 class FriendsListView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -98,19 +112,19 @@ class FriendsListView(APIView):
             friendships = Friendship.objects.filter(
                 (models.Q(user=request.user) | models.Q(friend=request.user)),
                 status="Accepted"
-            )
+            ).select_related('user', 'friend')
 
             friends_list = []
             for friendship in friendships:
                 # Determine which user is the friend (not the current user)
-                friend_user = friendship.friend if friendship.user == request.user else friendship.user
+                friend_user = friendship.friend if friendship.user_id == request.user.id else friendship.user
                 
                 friends_list.append({
                     'id': friend_user.id,
                     'username': friend_user.username,
                     'first_name': friend_user.first_name,
                     'last_name': friend_user.last_name,
-                    'profile_picture': friend_user.profile_picture.url if friend_user.profile_picture else None
+                    'profile_picture': friend_user.get_profile_picture_url('thumb')
                 })
 
             return Response(friends_list, status=status.HTTP_200_OK)
@@ -119,14 +133,14 @@ class FriendsListView(APIView):
 
 # API for user-specific tasks
 class UserTasksView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def get(self, request, user_id):
         """Get all tasks of a specific user."""
         try:
             tasks = Task.objects.filter(user_id=user_id)
-            serializer = TaskSerializer(tasks, many=True)
+            serializer = TaskReadSerializer(tasks, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -144,7 +158,7 @@ class UserTasksView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class UserTaskDetailView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def put(self, request, user_id, task_id):
@@ -172,8 +186,173 @@ class UserTaskDetailView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Largest task import accepted in a single request
+TASK_IMPORT_MAX_ROWS = 5000
+
+# Column order shared by the CSV export and import
+TASK_CSV_COLUMNS = [
+    'task_name', 'description', 'time_required', 'days_associated',
+    'priority', 'is_fixed_time', 'fixed_time_slot'
+]
+
+
+def _task_row_errors(errors):
+    """Keep only the failing rows of a list-serializer error, numbered from 1."""
+    if isinstance(errors, dict):
+        return errors
+    return [{"row": index + 1, "errors": row_errors} for index, row_errors in enumerate(errors) if row_errors]
+
+
+def _read_task_import_rows(upload):
+    """Parse an uploaded CSV or JSON task file into a list of row dicts."""
+    if upload.name.lower().endswith('.json'):
+        rows = json.load(upload)
+        if not isinstance(rows, list):
+            raise ValueError("JSON import must contain a list of tasks.")
+        return rows
+
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig'))
+    rows = []
+    for record in reader:
+        # Empty cells mean "not provided" so optional fields fall back to their defaults
+        row = {key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()}
+        days = row.get('days_associated')
+        if days is not None:
+            row['days_associated'] = json.loads(days) if days.startswith('[') else [
+                day.strip() for day in re.split(r'[,;]', days) if day.strip()
+            ]
+        rows.append(row)
+    return rows
+
+
+class UserTasksBulkView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, user_id):
+        """Create a list of tasks for the user in a single transaction."""
+        try:
+            if not User.objects.filter(id=user_id).exists():
+                return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+            serializer = TaskBulkSerializer(data=request.data, many=True, context={'user_id': user_id})
+            if not serializer.is_valid():
+                return Response({"errors": _task_row_errors(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                tasks = serializer.save()
+            return Response(TaskReadSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def put(self, request, user_id):
+        """Update a list of the user's tasks; every row carries the task ``id``."""
+        try:
+            if not User.objects.filter(id=user_id).exists():
+                return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+            if not isinstance(request.data, list):
+                return Response({"error": "Expected a list of tasks."}, status=status.HTTP_400_BAD_REQUEST)
+
+            task_ids = [row.get('id') for row in request.data if isinstance(row, dict)]
+            tasks = list(Task.objects.filter(user_id=user_id, id__in=[
+                task_id for task_id in task_ids if str(task_id).isdigit()
+            ]))
+            serializer = TaskBulkSerializer(
+                tasks, data=request.data, many=True, partial=True, context={'user_id': user_id}
+            )
+            if not serializer.is_valid():
+                return Response({"errors": _task_row_errors(serializer.errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                tasks = serializer.save()
+            return Response(TaskReadSerializer(tasks, many=True).data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    patch = put
+
+
+class UserTasksImportView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, user_id):
+        """
+        Import tasks from an uploaded CSV or JSON file.
+        Invalid rows are reported by row number; nothing is written unless every
+        row is valid, or ``skip_invalid=true`` is sent to import the valid rows only.
+        """
+        if not User.objects.filter(id=user_id).exists():
+            return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "No import file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            rows = _read_task_import_rows(upload)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return Response({"error": f"Could not read import file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(rows) > TASK_IMPORT_MAX_ROWS:
+            return Response(
+                {"error": f"Import is limited to {TASK_IMPORT_MAX_ROWS} rows."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            context = {'user_id': user_id}
+            serializer = TaskBulkSerializer(data=rows, many=True, context=context)
+            errors = []
+            if not serializer.is_valid():
+                errors = _task_row_errors(serializer.errors)
+                skip_invalid = str(request.data.get('skip_invalid', '')).lower() in {'1', 'true', 'yes'}
+                if not skip_invalid or isinstance(errors, dict):
+                    return Response({"imported": 0, "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+                failed_rows = {error['row'] for error in errors}
+                valid_rows = [row for index, row in enumerate(rows, start=1) if index not in failed_rows]
+                serializer = TaskBulkSerializer(data=valid_rows, many=True, context=context)
+                serializer.is_valid(raise_exception=True)
+
+            with transaction.atomic():
+                tasks = serializer.save()
+            return Response({"imported": len(tasks), "errors": errors}, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UserTasksExportView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id):
+        """Export the user's tasks as CSV (``?file_format=csv``) or JSON."""
+        try:
+            tasks = Task.objects.filter(user_id=user_id).order_by('id')
+            if request.query_params.get('file_format', 'json').lower() != 'csv':
+                serializer = TaskReadSerializer(tasks, many=True)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+
+            response = HttpResponse(content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="tasks_{user_id}.csv"'
+            writer = csv.writer(response)
+            writer.writerow(TASK_CSV_COLUMNS)
+            for task in tasks.values_list(*TASK_CSV_COLUMNS):
+                task_name, description, time_required, days, priority, is_fixed_time, fixed_time_slot = task
+                writer.writerow([
+                    task_name,
+                    description or '',
+                    duration_string(time_required) if time_required else '',
+                    ', '.join(days or []),
+                    priority,
+                    is_fixed_time,
+                    fixed_time_slot.isoformat() if fixed_time_slot else '',
+                ])
+            return response
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class UserRoutineView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -189,25 +368,12 @@ class UserRoutineView(APIView):
             if not user_routine or not user_routine.routine:
                 return Response({"error": "No primary routine found"}, status=status.HTTP_404_NOT_FOUND)
 
-            routine_data = user_routine.routine.routine_data.copy()
-
-            # Fetch all completion records for this user + routine
+            # Fetch all completion records for this user + routine and merge them into the routine
             completions = RoutineActivityCompletion.objects.filter(
                 user=user,
                 routine=user_routine.routine
-            ).values('day', 'activity_name', 'is_completed')
-
-            # Convert to a lookup dictionary: {(day, activity_name) -> is_completed}
-            completion_status = {
-                (comp['day'], comp['activity_name']): comp['is_completed']
-                for comp in completions
-            }
-
-            # Add is_completed to each activity in the routine
-            for day, activities in routine_data.items():
-                for activity in activities:
-                    key = (day, activity['activity'])
-                    activity['is_completed'] = completion_status.get(key, False)
+            ).values_list('day', 'activity_name', 'is_completed')
+            routine_data = routine_with_completion(user_routine.routine.routine_data, completions)
 
             return Response({"routine_data": routine_data}, status=status.HTTP_200_OK)
 
@@ -215,7 +381,7 @@ class UserRoutineView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # class UploadUserPfp(APIView):
-#     authentication_classes = [JWTAuthentication]  # Ensure the user is authenticated
+#     authentication_classes = [CachedJWTAuthentication]  # Ensure the user is authenticated
 #     permission_classes = [IsAuthenticated]  # Only authenticated users can upload a profile picture
 
 #     def put(self, request):
@@ -233,7 +399,7 @@ class UserRoutineView(APIView):
 #         return Response({"message": "Profile picture uploaded successfully!"}, status=status.HTTP_200_OK)
 
 class UploadUserPfp(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def put(self, request):
@@ -244,12 +410,21 @@ class UploadUserPfp(APIView):
         if not profile_picture_file:
             return Response({"error": "No profile picture file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        user.profile_picture = profile_picture_file
-        user.save()
+        try:
+            # Stored under its content hash; an identical earlier upload is reused as-is
+            name = store_profile_picture(profile_picture_file)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        user.profile_picture.name = name
+        user.profile_picture_variants = existing_profile_picture_variants(name)
+        user.save(update_fields=['profile_picture', 'profile_picture_variants'])
+
+        # Thumbnail/medium copies are rendered off the request; until then URLs fall back to the original
+        if len(user.profile_picture_variants) < len(PROFILE_PICTURE_VARIANT_SIZES):
+            schedule_profile_picture_variants(user.id, name)
 
-        profile_picture_url = None
-        if user.profile_picture:
-             profile_picture_url = request.build_absolute_uri(user.profile_picture.url)
+        profile_picture_url = request.build_absolute_uri(user.profile_picture.url)
 
         return Response({
             "message": "Profile picture uploaded successfully!",
@@ -257,7 +432,7 @@ class UploadUserPfp(APIView):
         }, status=status.HTTP_200_OK)
 
 class MarkActivityCompletedView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -282,6 +457,7 @@ class MarkActivityCompletedView(APIView):
                 activity_type=activity_type,
                 defaults={'is_completed': is_completed}
             )
+            notify_user(user.id, 'routine.updated', {"day": day})
 
             return Response({
                 "status": "success",
@@ -294,7 +470,7 @@ class MarkActivityCompletedView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class RemoveActivityFromRoutineView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -353,6 +529,7 @@ class RemoveActivityFromRoutineView(APIView):
                 activity_name=activity_name,
                 activity_type=activity_type
             ).delete()
+            notify_user(user.id, 'routine.updated', {"day": day})
 
             return Response({
                 "status": "success",
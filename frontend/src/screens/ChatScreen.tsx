@@ -144,8 +144,8 @@ const ChatScreen = () => {
 
       setLoading(true)
       try {
-        const msgs = await fetchMessages(friendId)
-        const sortedMsgs = msgs.sort(
+        const page = await fetchMessages(friendId)
+        const sortedMsgs = page.results.sort(
           (a: Message, b: Message) =>
             new Date(a.timestamp).getTime() - new Date(b.timestamp).getTime()
         )
@@ -403,11 +403,16 @@ export const fetchFriendRequests = async (): Promise<FriendRequest[]> => {
   }
 };
 
-// Get all messages between the authenticated user and a friend
-export const fetchMessages = async (friendId: number) => {
+// Get one page of messages between the authenticated user and a friend.
+// Without a cursor this is the latest page; pass the returned `before` cursor to scroll back.
+export const fetchMessages = async (
+  friendId: number,
+  cursor: { before?: string; after?: string } = {}
+) => {
   try {
+    const params = new URLSearchParams(cursor as Record<string, string>).toString();
     const response = await makeAuthenticatedRequest(
-      `/api/messages/${friendId}/`
+      `/api/messages/${friendId}/${params ? `?${params}` : ""}`
     );
     return await response.json();
   } catch (error: any) {
@@ -561,7 +566,7 @@ export const uploadUserPfp = async (profilePictureUri: string) => {
 export const chatApi = {
   sendMessage: async (message: string): Promise<ChatResponse> => {
     try {
-      const response = await makeAuthenticatedRequest("/api/agent/chat/", {
+      const response = await makeAuthenticatedRequest("/api/agent/chat/async/", {
         method: "POST",
         body: JSON.stringify({ message }),
       });
@@ -572,9 +577,12 @@ export const chatApi = {
     }
   },
 
-  getMessages: async (): Promise<{ messages: Message[] }> => {
+  getMessages: async (
+    before?: number
+  ): Promise<{ messages: Message[]; before: number | null; has_more: boolean }> => {
     try {
-      const response = await makeAuthenticatedRequest("/api/agent/chat/");
+      const query = before ? `?before=${before}` : "";
+      const response = await makeAuthenticatedRequest(`/api/agent/chat/${query}`);
       return await response.json();
     } catch (error) {
       console.error("Error fetching messages:", error);
@@ -11,7 +11,8 @@ from core.models import Routine, RoutineActivityCompletion, Task, UserHobby, Hob
 from django.contrib.auth import get_user_model
 import re  # ✅ Import the regular expression module
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from core.authentication import CachedJWTAuthentication
+from chat.notifications import notify_user
 
 User = get_user_model()
 
@@ -54,13 +55,14 @@ def parse_routine_text(routine_text):
     return routine_data
 
 class GenerateRoutineView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def post(self, request, user_id, *args, **kwargs):  # ✅ Take user_id as path parameter
 
         try:
-            user = User.objects.get(pk=user_id)  # ✅ Fetch user based on user_id from URL
+            # The authenticated user is already resolved (and cached); only fetch when acting on someone else
+            user = request.user if request.user.id == user_id else User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return Response({"error": f"User with ID {user_id} not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -182,6 +184,7 @@ class GenerateRoutineView(APIView):
                         permission='Edit',
                         is_primary=True  # ✅ Set the new one as primary
                     )
+                    notify_user(user.id, 'routine.generated', {"start_date": today.isoformat(), "end_date": end_date.isoformat()})
                     return Response({"routine": generated_routine}, status=status.HTTP_201_CREATED)
                 except Exception as db_error:  # Catch database errors
                     return Response(
@@ -198,7 +201,7 @@ class GenerateRoutineView(APIView):
 
     def put(self, request, user_id, *args, **kwargs):
         try:
-            user = User.objects.get(pk=user_id)
+            user = request.user if request.user.id == user_id else User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return Response({"error": f"User with ID {user_id} not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -272,6 +275,7 @@ class GenerateRoutineView(APIView):
                         # Update routine with normalized activities
                         current_routine.routine_data[today_str] = normalized_activities
                         current_routine.save()
+                        notify_user(user.id, 'routine.updated', {"day": today_str})
                         return Response({"routine_data": current_routine.routine_data}, status=status.HTTP_200_OK)
                     else:
                         return Response({"error": f"The model did not return a routine for {today_str} or returned an empty routine. Raw response:\n{response.text}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -290,7 +294,7 @@ class GenerateRoutineView(APIView):
             return Response({"error": str(general_error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class EnhancedRoutineAnalyticsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
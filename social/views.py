@@ -3,12 +3,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from core.models import RoutineActivityCompletion, User, Friendship, UserRoutine
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from core.authentication import CachedJWTAuthentication
 from django.shortcuts import get_object_or_404
 from django.db import models
 
 # Serializer for the User model
-from core.serializers import UserSerializer, FriendshipSerializer
+from core.serializers import UserSerializer, FriendshipSerializer, UserReadSerializer, FriendshipReadSerializer, routine_with_completion
 
 class PublicUserDetailAPIView(APIView):
     """
@@ -23,7 +23,7 @@ class PublicUserDetailAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class UserDetailAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -35,21 +35,21 @@ class UserDetailAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class UsersView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def get(self, request):
         """Fetch all users except the current user and the admin (id == 1)."""
         try:
             users = User.objects.exclude(id__in=[request.user.id, 1])
-            serializer = UserSerializer(users, many=True)
+            serializer = UserReadSerializer(users, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         
 class SendFriendRequestView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def post(self, request, to_user_id):
@@ -74,7 +74,7 @@ class SendFriendRequestView(APIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 class RespondToFriendRequestView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def post(self, request, request_id):
@@ -95,7 +95,7 @@ class RespondToFriendRequestView(APIView):
 
 
 class ListFriendsView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def get(self, request):
@@ -103,7 +103,7 @@ class ListFriendsView(APIView):
         friends = Friendship.objects.filter(
             (models.Q(user=request.user) | models.Q(friend=request.user)),
             status="Accepted"
-        )
+        ).select_related('user', 'friend')
 
         friend_list = [
             {
@@ -111,7 +111,7 @@ class ListFriendsView(APIView):
                 "username": friend.friend.username if friend.user == request.user else friend.user.username,
                 "first_name": friend.friend.first_name if friend.user == request.user else friend.user.first_name,
                 "last_name": friend.friend.last_name if friend.user == request.user else friend.user.last_name,
-                "profile_picture": friend.friend.profile_picture if friend.user == request.user else friend.user.profile_picture
+                "profile_picture": (friend.friend if friend.user == request.user else friend.user).get_profile_picture_url('thumb')
             }
             for friend in friends
         ]
@@ -119,7 +119,7 @@ class ListFriendsView(APIView):
         return Response(friend_list, status=status.HTTP_200_OK)
     
 class RemoveFriendView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def delete(self, request, friend_id):
@@ -137,27 +137,29 @@ class RemoveFriendView(APIView):
         return Response({"message": "Friend removed successfully."}, status=status.HTTP_200_OK)
     
 class ViewFriendshipDetailsView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def get(self, request):
         """View friendship details of the logged-in user."""
-        friendships = Friendship.objects.filter(models.Q(user=request.user) | models.Q(friend=request.user))
-        serializer = FriendshipSerializer(friendships, many=True)
+        friendships = Friendship.objects.filter(
+            models.Q(user=request.user) | models.Q(friend=request.user)
+        ).select_related('user')
+        serializer = FriendshipReadSerializer(friendships, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 class ViewFriendRequestsView(APIView):
-    authentication_classes = [JWTAuthentication]  # Enforce JWT authentication
+    authentication_classes = [CachedJWTAuthentication]  # Enforce JWT authentication
     permission_classes = [IsAuthenticated]  # Require authentication
 
     def get(self, request):
         """List all pending friend requests received by the authenticated user."""
-        friend_requests = Friendship.objects.filter(friend=request.user, status="Pending")
-        serializer = FriendshipSerializer(friend_requests, many=True)
+        friend_requests = Friendship.objects.filter(friend=request.user, status="Pending").select_related('user')
+        serializer = FriendshipReadSerializer(friend_requests, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class FriendRoutineView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, friend_id):
@@ -195,31 +197,18 @@ class FriendRoutineView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            routine_data = user_routine.routine.routine_data.copy()
-
-            # Fetch all completion records for this friend's routine
+            # Fetch all completion records for this friend's routine and merge them into the routine
             completions = RoutineActivityCompletion.objects.filter(
                 user=friend,
                 routine=user_routine.routine
-            ).values('day', 'activity_name', 'is_completed')
-
-            # Convert to a lookup dictionary: {(day, activity_name) -> is_completed}
-            completion_status = {
-                (comp['day'], comp['activity_name']): comp['is_completed']
-                for comp in completions
-            }
-
-            # Add is_completed to each activity in the routine
-            for day, activities in routine_data.items():
-                for activity in activities:
-                    key = (day, activity['activity'])
-                    activity['is_completed'] = completion_status.get(key, False)
+            ).values_list('day', 'activity_name', 'is_completed')
+            routine_data = routine_with_completion(user_routine.routine.routine_data, completions)
 
             return Response({
                 "friend_id": friend.id,
                 "friend_username": friend.username,
                 "friend_name": f"{friend.first_name} {friend.last_name}",
-                "profile_picture": friend.profile_picture.url if friend.profile_picture else None,
+                "profile_picture": friend.get_profile_picture_url('medium'),
                 "routine_data": routine_data
             }, status=status.HTTP_200_OK)
 